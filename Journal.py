@@ -1,149 +1,708 @@
 import openpyxl
-from openpyxl.styles import Alignment, Font, PatternFill
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, NamedStyle, PatternFill
+from openpyxl.styles.fonts import DEFAULT_FONT
 from openpyxl.worksheet.datavalidation import DataValidation
 from openpyxl.formatting.rule import CellIsRule, FormulaRule
-from openpyxl.utils import get_column_letter
-from datetime import datetime, timedelta
+from openpyxl.utils import column_index_from_string, get_column_letter
+from openpyxl.worksheet.cell_range import CellRange, MultiCellRange
+from openpyxl.worksheet.merge import MergedCellRange
+from openpyxl.worksheet._writer import WorksheetWriter
+from openpyxl.xml.functions import Element
+from openpyxl.reader.workbook import WorkbookParser
+from datetime import date, datetime, timedelta
+from copy import copy
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import contextlib
+import csv
+import hashlib
+import html
+import io
+import json
+import re
+import time
+import tracemalloc
+import zipfile
 import sys
 import os
 import subprocess
+import tempfile
 import platform
 
-def generate_trading_journal_excel(start_date_str, initial_capital, num_weeks, filename="trading_journal.xlsx"):
+# Journals longer than this many weeks are built on a write-only worksheet, so that
+# cells, merges and dropdown ranges are not held in memory (see _build_journal_workbook_streaming).
+STREAMING_WEEKS_THRESHOLD = 4
+
+TIME_SLOTS = ["18:30", "19:30", "20:30", "21:30"]
+
+# Skeleton workbooks are cached here by generate_trading_journal_excel(template_cache=True)
+TEMPLATE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".template_cache")
+
+# Bump whenever JOURNAL_COLUMNS or the row structure changes in a way that alters the generated sheet.
+LAYOUT_SCHEMA_VERSION = 2
+
+# Column layout of the journal, left to right. Formula and summary templates refer to
+# other columns by key ({result}, {balance}, ...) and are compiled into cell letters by
+# _compile_layout(), so adding or moving a column never means rewriting formulas by hand.
+#   span         -- the header (and, with row_span/day_span, the data cells) merge across this many columns
+#   row_span     -- the span is merged on every data row
+#   day_span     -- the span is merged across all of a day's data rows
+#   slot_merge   -- the cell is merged across the two rows of a time slot
+#   style        -- data row style variant: "wrap" or "time" (HH:mm)
+#   validation   -- dropdown list, see _create_validations()
+#   value        -- constant written into every data row
+#   formula      -- (first data row template, chained row template); {r} is the row, {prev} the
+#                   previous row in the cumulative chain, {slot} the slot's first row, {cap} the capital
+#   summary      -- "average", "sum", "total" or "last", see SUMMARY_FORMULAS
+JOURNAL_COLUMNS = [
+    {"key": "time_slot", "header": "Time Slot", "width": 11.25, "slot_merge": True},
+    {"key": "entry_time", "header": "Entry Time", "width": 11.25, "style": "time", "validation": "slot_entry"},
+    {"key": "exit_time", "header": "Exit Time", "width": 11.25, "style": "time", "validation": "slot_exit"},
+    {"key": "signal", "header": "Signal", "width": 11.25, "validation": "signal", "slot_merge": True},
+    {"key": "status", "header": "Status", "width": 11.25, "validation": "status", "slot_merge": True},
+    {"key": "momentum", "header": "Momentum", "width": 11.25, "validation": "momentum", "slot_merge": True},
+    {"key": "enter_type", "header": "Enter type", "width": 11.25, "validation": "order_type"},
+    {"key": "trade_type", "header": "Trade Type", "width": 11.25, "validation": "trade_type"},
+    {"key": "reason", "header": "Reason / Flex / Mistakes", "width": 10, "style": "wrap", "span": 5, "row_span": True},
+    {"key": "plan_adherence", "header": "Plan Adherence", "width": 20, "style": "wrap", "validation": "adherence"}, # Translated from "پایبندی پلن"
+    {"key": "stop_loss", "header": "Stop Loss (%)", "width": 7.5, "summary": "average"},
+    {"key": "risk", "header": "Risk (%)", "width": 7.5, "value": 1, "slot_merge": True, "summary": "sum"},
+    {"key": "target_reward", "header": "Target Reward (R)", "width": 7.5, "summary": "sum"},
+    {"key": "duration", "header": "Trade Duration (min)", "width": 7.5, "summary": "average",
+     "formula": ('=IF(AND({entry_time}{r}<>"",{exit_time}{r}<>""), ({exit_time}{r}-{entry_time}{r})*24*4, "")',) * 2},
+    {"key": "max_reward", "header": "Max Reward (R)", "width": 7.5},
+    {"key": "result", "header": "Result (R)", "width": 7.5, "value": 0, "summary": "total"},
+    {"key": "cum_result", "header": "Cumulative Result (R)", "width": 7.5, "summary": "last",
+     "formula": ("={result}{r}", "={cum_result}{prev}+{result}{r}")},
+    {"key": "cum_max_reward", "header": "Cumulative Max Reward (R)", "width": 7.5, "summary": "last",
+     "formula": ("={max_reward}{r}", "={cum_max_reward}{prev}+{max_reward}{r}")},
+    {"key": "balance", "header": "Balance", "width": 15, "summary": "last",
+     "formula": ("=IF({result}{r}=0,{cap},{cap}*(1+{result}{r}*{risk}{r}/100))",
+                 "=IF({result}{r}=0,{balance}{prev},{balance}{prev} + {result}{r}*{cap}*{risk}{slot}/100)")},
+    {"key": "max_reward_balance", "header": "Max Reward Balance", "width": 15, "summary": "last",
+     "formula": ("=IF({max_reward}{r}=0,{cap},{cap}*(1+{max_reward}{r}*{risk}{r}/100))",
+                 "=IF({max_reward}{r}=0,{max_reward_balance}{prev},{max_reward_balance}{prev} + {max_reward}{r}*{cap}*{risk}{slot}/100)")},
+    {"key": "min_balance", "header": "Min Balance", "width": 15, "summary": "last",
+     "formula": ("={balance}{r}", "=MIN({min_balance}{prev},{balance}{r})")},
+    {"key": "max_balance", "header": "Max Balance", "width": 15, "summary": "last",
+     "formula": ("={balance}{r}", "=MAX({max_balance}{prev},{balance}{r})")},
+    {"key": "drawdown", "header": "Min Lows % Drawdown", "width": 15, "summary": "last",
+     "formula": ("=IF({min_balance}{r}={cap},0,({min_balance}{r}-{cap})/{cap}*100)",) * 2},
+    {"key": "screenshot", "header": "Trade Screenshot", "width": 8, "span": 9, "day_span": True},
+]
+
+# Labels of the date and weekly summary rows, and the capital in the first data row's balance formula
+DATE_LABEL_PATTERN = re.compile(r"^[A-Za-z]+ (\d{4}-\d{2}-\d{2})$")
+WEEK_LABEL_PATTERN = re.compile(r"^Week (\d+) ")
+FIRST_BALANCE_CAPITAL_PATTERN = re.compile(r"^=IF\([A-Z]+\d+=0,([-+0-9.eE]+),")
+
+# (daily summary template over the day's data rows, weekly summary template over the daily summary cells)
+SUMMARY_FORMULAS = {
+    "average": ('=IFERROR(AVERAGE({self}{first}:{self}{last}),"")', '=IFERROR(AVERAGE({cells}),"")'),
+    "sum": ('=IFERROR(SUM({self}{first}:{self}{last}),"")', '=IFERROR(SUM({cells}),"")'),
+    "total": ("=SUM({self}{first}:{self}{last})", "=SUM({cells})"),
+    "last": ("={self}{last}", "={self}{last}"),
+}
+
+
+def open_file_os_agnostic(filepath_to_open):
+    """Opens the given file with the default application."""
+    try:
+        abs_filepath = os.path.abspath(filepath_to_open)
+        print(f"\nAttempting to open: {abs_filepath}")
+        if platform.system() == 'Darwin':       # macOS
+            subprocess.call(('open', abs_filepath))
+        elif platform.system() == 'Windows':    # Windows
+            os.startfile(abs_filepath)
+        else:                                   # linux variants
+            subprocess.call(('xdg-open', abs_filepath))
+    except FileNotFoundError:
+        print(f"Error: File not found at {abs_filepath}. Cannot open.")
+    except AttributeError: # os.startfile might not be available on some minimal Python installs on Windows
+        if platform.system() == 'Windows':
+            try: # Fallback for Windows if os.startfile is not available
+                subprocess.call(['cmd', '/c', 'start', '', abs_filepath], shell=False)
+            except Exception as e_sub_win:
+                print(f"Error opening file {abs_filepath} using subprocess fallback on Windows: {e_sub_win}")
+    except Exception as e_open:
+        print(f"Error opening file {abs_filepath}: {e_open}")
+        print("Please ensure you have a default application set for .xlsx files or that the file path is correct.")
+
+
+def _compile_layout(initial_capital, compact=False):
     """
-    Generates an Excel file for a Trading Plan with proper formulas and formatting,
-    incorporating the requested changes and fixing the NoneType split error.
+    Compiles JOURNAL_COLUMNS into the per-column tables the builders work from:
+    headers, widths, styles, validations, merges, the cells present on each kind
+    of row and formula templates in which only row numbers are left to fill in.
+
+    compact=True compiles the merge-free variant of the layout. Spanning columns
+    (reason, screenshot) become one column as wide as the whole span, with the
+    columns it used to cover hidden; the date and summary labels are centred across
+    their row ("centre across selection"); and the slot-level fields (time slot,
+    signal, status, momentum, risk) are written in the slot's first row only, which
+    is where the formulas read them from anyway. Column letters, and so every formula,
+    stay the same.
     """
-    try:
-        start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
-    except ValueError:
-        print("Error: Invalid date format. Please use YYYY-MM-DD.")
-        return
+    columns = []
+    for spec in JOURNAL_COLUMNS:
+        span = spec.get("span", 1)
+        columns.append(dict(spec, col=len(columns) + 1, covered=False, width=spec["width"] * span if compact else spec["width"]))
+        for _ in range(span - 1): # Columns hidden under the span keep its width
+            columns.append({"key": None, "header": "", "width": spec["width"], "col": len(columns) + 1, "covered": True, "hidden": compact})
+    for column in columns: column["letter"] = get_column_letter(column["col"])
+    letters = {column["key"]: column["letter"] for column in columns if column["key"]}
+    by_key = {column["key"]: column for column in columns if column["key"]}
 
-    wb = openpyxl.Workbook()
-    ws = wb.active
+    def compile_template(template, **extra):
+        # Resolve column keys and the capital now, leave the row placeholders for emission time
+        return template.format(cap=initial_capital, r="{r}", prev="{prev}", slot="{slot}", first="{first}", last="{last}",
+                               cells="{cells}", source="{source}", **extra, **letters)
 
-    # Helper function to open the file
-    def open_file_os_agnostic(filepath_to_open):
-        """Opens the given file with the default application."""
-        try:
-            abs_filepath = os.path.abspath(filepath_to_open)
-            print(f"\nAttempting to open: {abs_filepath}")
-            if platform.system() == 'Darwin':       # macOS
-                subprocess.call(('open', abs_filepath))
-            elif platform.system() == 'Windows':    # Windows
-                os.startfile(abs_filepath)
-            else:                                   # linux variants
-                subprocess.call(('xdg-open', abs_filepath))
-        except FileNotFoundError:
-            print(f"Error: File not found at {abs_filepath}. Cannot open.")
-        except AttributeError: # os.startfile might not be available on some minimal Python installs on Windows
-            if platform.system() == 'Windows':
-                try: # Fallback for Windows if os.startfile is not available
-                    subprocess.call(['cmd', '/c', 'start', '', abs_filepath], shell=False)
-                except Exception as e_sub_win:
-                    print(f"Error opening file {abs_filepath} using subprocess fallback on Windows: {e_sub_win}")
-        except Exception as e_open:
-            print(f"Error opening file {abs_filepath}: {e_open}")
-            print("Please ensure you have a default application set for .xlsx files or that the file path is correct.")
+    span_columns = [column for column in columns if column.get("span", 1) > 1]
+    def span_of(column): return (column["letter"], get_column_letter(column["col"] + column["span"] - 1))
+    first_summary_col = min(column["col"] for column in columns if column.get("summary"))
+    screenshot_col = by_key["screenshot"]["col"]
+    # The date row spans everything left of the screenshot area, summary labels span A:B and
+    # the next merge runs up to the first summarised column
+    date_span = ("A", get_column_letter(screenshot_col - 1))
+    summary_spans = [("A", "B"), ("C", get_column_letter(first_summary_col - 1))]
+    return {
+        "columns": columns,
+        "num_cols": len(columns),
+        "letters": letters,
+        "cols": {key: column["col"] for key, column in by_key.items()},
+        "headers": [column["header"] for column in columns],
+        "widths": [column["width"] for column in columns],
+        "data_styles": [column.get("style") for column in columns],
+        "compact": compact,
+        # Columns styled "centre across selection" in the compact layout, per kind of row
+        "date_span_cols": set(range(1, screenshot_col)) if compact else set(),
+        "summary_span_cols": {1, 2} if compact else set(),
+        # Columns that keep the shade of the slot's (or the day's) first row in the compact layout
+        "slot_cols": {column["col"] for column in columns if column.get("slot_merge")},
+        "day_cols": {column["col"] for column in columns if column.get("day_span")},
+        "header_spans": [] if compact else [span_of(column) for column in span_columns],
+        "row_span_merges": [] if compact else [span_of(column) for column in span_columns if column.get("row_span")],
+        "day_span_merges": [] if compact else [span_of(column) for column in span_columns if column.get("day_span")],
+        "slot_merge_letters": [] if compact else [column["letter"] for column in columns if column.get("slot_merge")],
+        "date_merges": [] if compact else [date_span],
+        "summary_merges": [] if compact else summary_spans,
+        "validations": [(column["validation"], column["letter"]) for column in columns if column.get("validation")],
+        # Cells that survive the merges on each kind of row, as 1-based column numbers
+        "header_cells": [column["col"] for column in columns if not column["covered"]],
+        "date_cells": list(range(1, screenshot_col)) if compact else [1],
+        "first_of_day_cells": [column["col"] for column in columns if not column["covered"]],
+        "slot_start_cells": [column["col"] for column in columns if not column["covered"] and (compact or not column.get("day_span"))],
+        "slot_second_cells": [column["col"] for column in columns if not column["covered"] and (compact or not column.get("day_span") and not column.get("slot_merge"))],
+        "row_constants": {column["col"]: column["value"] for column in columns if "value" in column},
+        "first_row_formulas": [(column["col"], compile_template(column["formula"][0])) for column in columns if column.get("formula")],
+        "chain_row_formulas": [(column["col"], compile_template(column["formula"][1])) for column in columns if column.get("formula")],
+        "daily_summary": [(column["col"], compile_template(SUMMARY_FORMULAS[column["summary"]][0], self=column["letter"]))
+                          for column in columns if column.get("summary")],
+        "weekly_summary": [(column["col"], column["letter"], compile_template(SUMMARY_FORMULAS[column["summary"]][1], self=column["letter"]))
+                           for column in columns if column.get("summary")],
+        "monthly_summary": [(column["col"], f"={column['letter']}{{source}}") for column in columns if column.get("summary")],
+    }
 
-    ws.title = "Trading Journal"
-    ws.freeze_panes = "A2"
 
-    headers = [
-        "Time Slot", "Entry Time", "Exit Time", "Signal", "Status", "Momentum",
-        "Order Type", "Trade Type", "Reason / Flex / Mistakes",
-        "Reason for Target/Limit", "", "", "Plan Adherence", # Translated from "پایبندی پلن"
-        "Stop Loss (%)", "Risk (%)", "Target Reward (R)", "Trade Duration (min)", # Changed from "Trade Duration (15 min)" for clarity
-        "Max Reward (R)", "Result (R)", "Cumulative Result (R)", "Cumulative Max Reward (R)", # Column Q, R, S, T, U
-        "Balance", "Max Reward Balance", "Min Balance", "Max Balance", "Min Lows % Drawdown", # Columns V, W, X, Y, Z
-        "Trade Screenshot", "", "", "", "", "", "", "", "" # Columns AA onwards
+def _apply_column_widths(ws, layout):
+    """Sets the width of every journal column and hides the columns the compact layout folds into a wider one."""
+    for column in layout["columns"]:
+        ws.column_dimensions[column["letter"]].width = column["width"]
+        if column.get("hidden"): ws.column_dimensions[column["letter"]].hidden = True
+
+
+def _slot_time_options(slot_time_str):
+    """Returns the (entry, exit) dropdown options for a time slot."""
+    hour, minute = map(int, slot_time_str.split(":"))
+    entry_options_list = [f"{(hour + (minute + 15 * i) // 60):02d}:{( (minute + 15 * i) % 60):02d}" for i in range(4)]
+    exit_options_list = []
+    ch, cm = hour, minute
+    while ch < 24 and not (ch == 23 and cm > 30):
+        exit_options_list.append(f"{ch:02d}:{cm:02d}")
+        cm += 15
+        if cm >= 60: ch += 1; cm = 0
+    return entry_options_list, exit_options_list
+
+
+# The dropdown options only depend on the fixed time slots, so they are computed once
+SLOT_TIME_OPTIONS = {slot_time_str: _slot_time_options(slot_time_str) for slot_time_str in TIME_SLOTS}
+
+
+# Named styles that get a "centre across selection" variant in the compact layout
+_SPAN_STYLE_BASES = ["Journal Date", "Journal Daily Summary", "Journal Weekly Summary", "Journal Monthly Summary"]
+
+
+def _register_journal_styles(wb, layout):
+    """
+    Registers one named style per kind of journal cell on the workbook and returns
+    the style name to assign for each row kind (per column for header and data rows).
+
+    Assigning a named style only copies its precomputed style array, so the
+    generator no longer builds and hashes a Font/Alignment/PatternFill per cell.
+    """
+    dana_bold = Font(bold=True, name="Dana")
+    center = Alignment(horizontal='center', vertical='center')
+    wrap = Alignment(horizontal='center', vertical='center', wrap_text=True)
+    row_fill = PatternFill(start_color="F5F5F5", end_color="F5F5F5", fill_type="solid")
+    named_styles = [
+        NamedStyle("Journal Header", font=dana_bold, fill=PatternFill(start_color="CCE5FF", end_color="CCE5FF", fill_type="solid"),
+                   alignment=Alignment(horizontal='center', vertical='center', wrap_text=True, readingOrder=2)),
+        NamedStyle("Journal Header Merged", font=dana_bold, fill=PatternFill(start_color="CCE5FF", end_color="CCE5FF", fill_type="solid"), alignment=wrap),
+        NamedStyle("Journal Date", font=Font(bold=True, size=14, color="FFFFFF", name="Dana"),
+                   fill=PatternFill(start_color="4169E1", end_color="4169E1", fill_type="solid"), alignment=center),
+        NamedStyle("Journal Row", font=copy(DEFAULT_FONT), alignment=center),
+        NamedStyle("Journal Row Wrap", font=copy(DEFAULT_FONT), alignment=wrap),
+        NamedStyle("Journal Row Time", font=copy(DEFAULT_FONT), alignment=center, number_format="HH:mm"),
+        NamedStyle("Journal Row Shaded", font=copy(DEFAULT_FONT), fill=row_fill, alignment=center),
+        NamedStyle("Journal Row Shaded Wrap", font=copy(DEFAULT_FONT), fill=row_fill, alignment=wrap),
+        NamedStyle("Journal Row Shaded Time", font=copy(DEFAULT_FONT), fill=row_fill, alignment=center, number_format="HH:mm"),
+        NamedStyle("Journal Daily Summary", font=dana_bold, fill=PatternFill(start_color="E6E6FA", end_color="E6E6FA", fill_type="solid"), alignment=wrap),
+        NamedStyle("Journal Weekly Summary", font=Font(bold=True, color="FFFFFF", name="Dana"),
+                   fill=PatternFill(start_color="4682B4", end_color="4682B4", fill_type="solid"), alignment=wrap),
+        NamedStyle("Journal Monthly Summary", font=dana_bold, fill=PatternFill(start_color="87CEEB", end_color="87CEEB", fill_type="solid"), alignment=wrap),
     ]
+    if layout["compact"]: # "Span" variants centre their label across the run of cells that stands in for a merge
+        span = Alignment(horizontal='centerContinuous', vertical='center')
+        named_styles += [NamedStyle(f"{named_style.name} Span", font=copy(named_style.font), fill=copy(named_style.fill),
+                                    number_format=named_style.number_format, alignment=span)
+                         for named_style in named_styles if named_style.name in _SPAN_STYLE_BASES]
+    for named_style in named_styles:
+        if named_style.name not in wb.named_styles: # Journals being appended to already have them
+            wb.add_named_style(named_style)
 
-    # --- Apply changes to headers and column structure ---
-    # 1. Rename "Order Type" to "enter type"
-    headers[6] = "Enter type"
+    suffixes = {None: "", "wrap": " Wrap", "time": " Time"}
+    merged_header_cols = {column["col"] for column in layout["columns"] if column.get("span", 1) > 1}
+    cols = range(1, layout["num_cols"] + 1)
+    def per_column(name, span_cols): return [f"{name} Span" if col in span_cols else name for col in cols]
+    return {
+        "header": ["Journal Header Merged" if col in merged_header_cols else "Journal Header" for col in cols],
+        "date": per_column("Journal Date", layout["date_span_cols"]),
+        "data": [f"Journal Row{suffixes[style]}" for style in layout["data_styles"]],
+        "data_shaded": [f"Journal Row Shaded{suffixes[style]}" for style in layout["data_styles"]],
+        "daily_summary": per_column("Journal Daily Summary", layout["summary_span_cols"]),
+        "weekly_summary": per_column("Journal Weekly Summary", layout["summary_span_cols"]),
+        "monthly_summary": per_column("Journal Monthly Summary", layout["summary_span_cols"]),
+    }
 
-    # 2. Remove "Reason for Target/Limit" (original index 9, column 10)
-    headers.pop(9)
 
-    # 3. Add two more empty cells for "Reason / Flex / Mistakes" merge (original index 8, column 9)
-    # After pop(9), the original headers[10] and headers[11] are now at headers[9] and headers[10].
-    # We need 4 empty cells after "Reason / Flex / Mistakes" (index 8).
-    # So, insert two more empty strings at index 11 and 12.
-    headers.insert(11, "")
-    headers.insert(12, "")
-    # Now, "Reason / Flex / Mistakes" (column 9) will be followed by 4 empty strings (columns 10, 11, 12, 13).
-    # "Plan Adherence" will now be at column 14 (index 13).
+def _prime_journal_styles(wb):
+    """
+    Claims a cell style id for every registered named style, in registration order.
+    Ids are otherwise handed out in order of first use, so workbooks whose sheets
+    start differently would number the same styles differently; primed workbooks
+    share one styles part and their sheet XML can be combined into one package.
+    """
+    for named_style in wb._named_styles:
+        wb._cell_styles.add(copy(named_style.as_tuple()))
 
-    header_fill = PatternFill(start_color="CCE5FF", end_color="CCE5FF", fill_type="solid")
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col)
-        cell.value = header
-        cell.font = Font(bold=True, name="Dana")
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True, readingOrder=2)
-
-    for col_idx, col_letter_enum in enumerate(range(1, len(headers) + 1)):
-        col_letter = get_column_letter(col_letter_enum)
-        current_header = headers[col_idx]
-        if current_header == "Reason / Flex / Mistakes": ws.column_dimensions[col_letter].width = 10
-        # Adjusted column indices for width settings
-        elif col_letter_enum >= 10 and col_letter_enum <= 13 : ws.column_dimensions[col_letter].width = 10 # These are the 4 new merged empty cells
-        elif current_header == "Plan Adherence": ws.column_dimensions[col_letter].width = 20
-        elif col_letter_enum >= 15 and col_letter_enum <= 22: ws.column_dimensions[col_letter].width = 7.5 # Shifted by 1
-        elif current_header in ["Balance", "Max Reward Balance", "Min Balance", "Max Balance", "Min Lows % Drawdown"]: ws.column_dimensions[col_letter].width = 15 # Shifted by 1 (U, V, W, X, Y)
-        elif col_letter_enum >= 1 and col_letter_enum <= 8: ws.column_dimensions[col_letter].width = 11.25
-        elif col_letter_enum >= 28 and col_letter_enum <= 36: ws.column_dimensions[col_letter].width = 8 # Screenshot columns AB-AJ (shifted by 1)
-        else: ws.column_dimensions[col_letter].width = 15
-
-    # Adjust merge cells for "Reason / Flex / Mistakes" and "Trade Screenshot"
-    ws.merge_cells(start_row=1, start_column=9, end_row=1, end_column=13) # Reason / Flex / Mistakes now spans 5 columns
-    ws.cell(row=1, column=9).alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-    ws.merge_cells(start_row=1, start_column=28, end_row=1, end_column=36) # Trade Screenshot shifted by 1
-    ws.cell(row=1, column=28).alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-
-    time_slots = ["18:30", "19:30", "20:30", "21:30"]
-    current_date = start_date
-    row_num = 2
-    all_data_rows = []
 
+def _list_validation(ws, options, validations_by_formula):
+    """Returns the list validation for the given options, creating and registering it only once."""
+    formula1 = f'"{",".join(options)}"'
+    if formula1 not in validations_by_formula:
+        dv = DataValidation(type="list", formula1=formula1, allow_blank=True)
+        # data_validations.append works for both regular and write-only worksheets
+        ws.data_validations.append(dv)
+        validations_by_formula[formula1] = dv
+    return validations_by_formula[formula1]
+
+
+def _create_validations(ws):
+    """
+    Creates one dropdown validation per distinct option list and registers it on the sheet.
+    Every day's data rows are later added to these through _add_day_validations().
+    List validations already on the sheet are reused, so appended days extend them.
+    """
+    validations_by_formula = {dv.formula1: dv for dv in ws.data_validations.dataValidation if dv.type == "list"}
     status_options = [
         "Range", "Trend", "Pullback", "Undefined/Transition",
         "V-Range", "V-Trend", "V-Pullback", "V-Undefined/Transition"
     ]
-    dv_status = DataValidation(type="list", formula1=f'"{",".join(status_options)}"', allow_blank=True)
+    dv_status = _list_validation(ws, status_options, validations_by_formula)
     signal_options = [
         "Weak", "Strong", "Normal",
         "V-Weak", "V-Strong", "V-Normal"
     ]
-    dv_signal = DataValidation(type="list", formula1=f'"{",".join(signal_options)}"', allow_blank=True)
+    dv_signal = _list_validation(ws, signal_options, validations_by_formula)
     momentum_options = [
         "Decreasing", "Increasing",
         "V-Decreasing", "V-Increasing"
     ]
-    dv_momentum = DataValidation(type="list", formula1=f'"{",".join(momentum_options)}"', allow_blank=True)
-    
+    dv_momentum = _list_validation(ws, momentum_options, validations_by_formula)
+
     # Update dv_order_type options
     order_type_options = [
         "2R", "2R-ME","2R-MS",
         "4R-MS", "4R-ME"
     ]
-    dv_order_type = DataValidation(type="list", formula1=f'"{",".join(order_type_options)}"', allow_blank=True)
-    
-    dv_trade_type = DataValidation(type="list", formula1='"Reversal,Continuation"', allow_blank=True)
+    dv_order_type = _list_validation(ws, order_type_options, validations_by_formula)
+
+    dv_trade_type = _list_validation(ws, ["Reversal", "Continuation"], validations_by_formula)
     adherence_options = [
         "Full Adherence", "Entry Flaw", "Exit/Flexibility Flaw",
         "High Target Flaw", "Fear of entering "
     ]
-    dv_adherence = DataValidation(type="list", formula1=f'"{",".join(adherence_options)}"', allow_blank=True)
+    dv_adherence = _list_validation(ws, adherence_options, validations_by_formula)
+
+    slot_validations = {}
+    for slot_time_str, (entry_options_list, exit_options_list) in SLOT_TIME_OPTIONS.items():
+        slot_validations[slot_time_str] = {"slot_entry": _list_validation(ws, entry_options_list, validations_by_formula),
+                                           "slot_exit": _list_validation(ws, exit_options_list, validations_by_formula)}
+    return {
+        "signal": dv_signal, "status": dv_status, "momentum": dv_momentum,
+        "order_type": dv_order_type, "trade_type": dv_trade_type, "adherence": dv_adherence,
+        "slots": slot_validations,
+    }
+
+
+def _day_validation_refs(dvs, layout, first_row_of_day_data):
+    """Yields (validation, range) for one day's block of data rows (two rows per time slot)."""
+    last_row_of_day_data = first_row_of_day_data + 2 * len(TIME_SLOTS) - 1
+    for validation, col_letter in layout["validations"]:
+        if validation in dvs:
+            yield dvs[validation], f"{col_letter}{first_row_of_day_data}:{col_letter}{last_row_of_day_data}"
+            continue
+        for slot_idx, slot_time_str in enumerate(TIME_SLOTS): # Entry/exit options differ per slot
+            slot_start_row = first_row_of_day_data + 2 * slot_idx
+            yield dvs["slots"][slot_time_str][validation], f"{col_letter}{slot_start_row}:{col_letter}{slot_start_row + 1}"
+
 
-    ws.add_data_validation(dv_signal)
-    ws.add_data_validation(dv_status)
-    ws.add_data_validation(dv_momentum)
-    ws.add_data_validation(dv_order_type)
-    ws.add_data_validation(dv_trade_type)
-    ws.add_data_validation(dv_adherence)
+def _add_day_validations(dvs, layout, first_row_of_day_data):
+    """Extends the shared validations over one day's block of data rows."""
+    for dv, ref in _day_validation_refs(dvs, layout, first_row_of_day_data): dv.add(ref)
+
+
+def _data_row_values(layout, row_num, prev_row, current_slot_start_row):
+    """
+    Returns {column: value} for the constant and formula columns of a data row.
+    prev_row is the row the cumulative columns chain from, or None for the journal's first data row.
+    Slot-level constants (Risk) only go in the slot's first row.
+    """
+    values = {col: value for col, value in layout["row_constants"].items() if row_num == current_slot_start_row or col not in layout["slot_cols"]}
+    if prev_row is None:
+        for col, template in layout["first_row_formulas"]: values[col] = template.format(r=row_num, slot=current_slot_start_row)
+    else:
+        for col, template in layout["chain_row_formulas"]: values[col] = template.format(r=row_num, prev=prev_row, slot=current_slot_start_row)
+    return values
+
+
+def _daily_summary_values(layout, first_row_of_day_data, last_row_of_day_data):
+    """Returns {column: formula} for a "Daily Summary" row."""
+    return {col: template.format(first=first_row_of_day_data, last=last_row_of_day_data) for col, template in layout["daily_summary"]}
+
+
+def _weekly_summary_values(layout, daily_summary_rows_info):
+    """Returns {column: formula} for a weekly summary row built from the week's daily summary rows."""
+    summary_rows = [info['summary_row'] for info in daily_summary_rows_info if info['data_start_row'] <= info['data_end_row']]
+    if not summary_rows: return {}
+    last_daily_summary_row = daily_summary_rows_info[-1]["summary_row"]
+    return {col: template.format(cells=",".join(f"{col_letter}{row}" for row in summary_rows), last=last_daily_summary_row)
+            for col, col_letter, template in layout["weekly_summary"]}
+
+
+def _monthly_summary_values(layout, source_summary_row):
+    """Returns {column: formula} for the "Monthly Summary" row, mirroring the last weekly summary."""
+    return {col: template.format(source=source_summary_row) for col, template in layout["monthly_summary"]}
+
+
+def _add_conditional_formatting(ws, layout, data_row_ranges, initial_capital, green_fill, red_fill):
+    """
+    Adds the green/red rules once per column over a multi-range sqref covering every
+    (first_row, last_row) block of data rows. Formula rules use references relative
+    to the first data row, so the number of rules does not grow with the journal;
+    called with a single (row, row) block it formats just that row.
+    """
+    if not data_row_ranges: return
+    data_row_ranges = sorted(data_row_ranges)
+    r = data_row_ranges[0][0] # Relative formulas are anchored on the top-left cell of the sqref
+    L = layout["letters"]
+    D, E, F, N, P = L["signal"], L["status"], L["momentum"], L["plan_adherence"], L["risk"]
+
+    def sqref(first_key, last_key=None):
+        first_col, last_col = L[first_key], L[last_key or first_key]
+        return " ".join(f"{first_col}{start}:{last_col}{end}" for start, end in data_row_ranges)
+
+    # A blank Risk counts as 0 for "less than", which would colour the empty second row of a compact slot
+    ws.conditional_formatting.add(sqref("risk"), FormulaRule(formula=[f'AND({P}{r}<>"",{P}{r}<1)'], stopIfTrue=True, fill=green_fill))
+    ws.conditional_formatting.add(sqref("result", "cum_max_reward"), CellIsRule(operator='greaterThan', formula=['0'], stopIfTrue=True, fill=green_fill))
+    ws.conditional_formatting.add(sqref("result", "cum_max_reward"), CellIsRule(operator='lessThan', formula=['0'], stopIfTrue=True, fill=red_fill))
+    ws.conditional_formatting.add(sqref("balance", "max_balance"), CellIsRule(operator='greaterThanOrEqual', formula=[str(initial_capital)], stopIfTrue=True, fill=green_fill))
+    ws.conditional_formatting.add(sqref("balance", "max_balance"), CellIsRule(operator='lessThan', formula=[str(initial_capital)], stopIfTrue=True, fill=red_fill))
+    ws.conditional_formatting.add(sqref("drawdown"), CellIsRule(operator='greaterThanOrEqual', formula=['0'], stopIfTrue=True, fill=green_fill))
+    ws.conditional_formatting.add(sqref("drawdown"), CellIsRule(operator='lessThan', formula=['0'], stopIfTrue=True, fill=red_fill))
+    ws.conditional_formatting.add(sqref("signal"), FormulaRule(formula=[f'OR(EXACT({D}{r},"Strong"), EXACT({D}{r},"Normal"), EXACT({D}{r},"V-Strong"), EXACT({D}{r},"V-Normal"))'], stopIfTrue=True, fill=green_fill))
+    ws.conditional_formatting.add(sqref("signal"), FormulaRule(formula=[f'OR(EXACT({D}{r},"Weak"), EXACT({D}{r},"V-Weak"))'], stopIfTrue=True, fill=red_fill))
+    ws.conditional_formatting.add(sqref("status"), FormulaRule(formula=[f'AND(NOT(ISBLANK({E}{r})),OR(EXACT({E}{r},"Range"),EXACT({E}{r},"V-Range")) )'], stopIfTrue=True, fill=red_fill))
+    ws.conditional_formatting.add(sqref("status"), FormulaRule(formula=[f'AND(NOT(ISBLANK({E}{r})),NOT(OR(EXACT({E}{r},"Range"),EXACT({E}{r},"V-Range"))))'], stopIfTrue=True, fill=green_fill))
+    ws.conditional_formatting.add(sqref("momentum"), FormulaRule(formula=[f'AND(NOT(ISBLANK({F}{r})),OR(EXACT({F}{r},"Increasing"),EXACT({F}{r},"V-Increasing")) )'], stopIfTrue=True, fill=green_fill))
+    ws.conditional_formatting.add(sqref("momentum"), FormulaRule(formula=[f'AND(NOT(ISBLANK({F}{r})),NOT(OR(EXACT({F}{r},"Increasing"),EXACT({F}{r},"V-Increasing"))))'], stopIfTrue=True, fill=red_fill))
+    ws.conditional_formatting.add(sqref("plan_adherence"), CellIsRule(operator='equal', formula=['"Full Adherence"'], stopIfTrue=True, fill=green_fill))
+    ws.conditional_formatting.add(sqref("plan_adherence"), FormulaRule(formula=[f'AND({N}{r}<>"", {N}{r}<>"Full Adherence")'], stopIfTrue=True, fill=red_fill))
+
+
+def _save_workbook(wb, filename, open_after=True):
+    """Saves the workbook under output/ (falling back to the cwd) and optionally opens it. Returns the saved path."""
+    try:
+        script_dir = os.path.dirname(os.path.abspath(__file__)) if "__file__" in locals() or "__file__" in globals() else os.getcwd()
+        output_dir = os.path.join(script_dir, 'output')
+        os.makedirs(output_dir, exist_ok=True)
+        output_path = os.path.join(output_dir, filename)
+        wb.save(output_path)
+        print(f"Successfully generated Excel file at:\n{os.path.abspath(output_path)}")
+        if open_after: open_file_os_agnostic(output_path) # Open the file
+        return output_path
+    except Exception as e:
+        print(f"Error saving file: {e}")
+        if "__file__" not in locals() and "__file__" not in globals():
+            alt_output_path = os.path.join(os.getcwd(), filename)
+            try:
+                wb.save(alt_output_path)
+                print(f"Successfully generated Excel file (fallback location):\n{os.path.abspath(alt_output_path)}")
+                if open_after: open_file_os_agnostic(alt_output_path) # Open the file from fallback location
+                return alt_output_path
+            except Exception as e_alt:
+                print(f"Error saving file (fallback attempt) or opening it: {e_alt}")
+
+
+class JournalProfiler:
+    """
+    Collects where generate_trading_journal_excel(profiler=...) spends its time and memory.
+
+    The generator switches phases with start(name) ("setup", "data_rows", "summary_rows",
+    "conditional_formatting", "template", "save"); the time until the next
+    switch accrues to the active phase, so a phase entered once per day reports its
+    total. With trace_memory=True each phase also records the tracemalloc peak reached
+    while it was active (tracing slows generation down, so time and memory are best
+    measured in separate runs). report() returns everything as a JSON-ready dict.
+    """
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.phases = {}
+        self.counts = {}
+        self.details = {}
+        self.total_seconds = 0.0
+        self._active, self._phase_started, self._run_started = None, None, None
+        self._owns_tracing = False
+
+    def start(self, phase):
+        now = time.perf_counter()
+        self._close_phase(now)
+        if self._run_started is None:
+            self._run_started = now
+            if self.trace_memory and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._owns_tracing = True
+            if tracemalloc.is_tracing(): tracemalloc.reset_peak()
+        self._active, self._phase_started = phase, now
+
+    def stop(self):
+        now = time.perf_counter()
+        self._close_phase(now)
+        if self._run_started is not None: self.total_seconds += now - self._run_started
+        self._run_started = None
+        if self._owns_tracing:
+            tracemalloc.stop()
+            self._owns_tracing = False
+
+    def _close_phase(self, now):
+        if self._active is None: return
+        stats = self.phases.setdefault(self._active, {"seconds": 0.0, "calls": 0, "peak_bytes": None})
+        stats["seconds"] += now - self._phase_started
+        stats["calls"] += 1
+        if self.trace_memory and tracemalloc.is_tracing():
+            stats["peak_bytes"] = max(stats["peak_bytes"] or 0, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self._active = None
+
+    def count(self, name, n=1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def record_workbook(self, ws):
+        """Counts the cells, merges and validation ranges (unless counted while streaming), validations and formatting rules of a built sheet."""
+        if not ws.parent.write_only:
+            self.counts["cells"] = len(ws._cells)
+            self.counts["merges"] = len(ws.merged_cells.ranges)
+            self.counts["validation_ranges"] = sum(len(dv.sqref.ranges) for dv in ws.data_validations.dataValidation)
+        self.counts["validations"] = len(ws.data_validations.dataValidation)
+        self.counts["formatting_ranges"] = len(ws.conditional_formatting)
+        self.counts["formatting_rules"] = sum(len(cf.rules) for cf in ws.conditional_formatting)
+
+    def report(self):
+        peaks = [stats["peak_bytes"] for stats in self.phases.values() if stats["peak_bytes"] is not None]
+        return dict(self.details, total_seconds=self.total_seconds, peak_bytes=max(peaks) if peaks else None,
+                    phases=self.phases, counts=self.counts)
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+
+
+class _NullProfiler(JournalProfiler):
+    """
+    Stands in when no profiler is passed, so the builders can report phases unconditionally.
+    One instance is shared by every call, so it must never record anything.
+    """
+
+    def start(self, phase): pass
+    def stop(self): pass
+    def count(self, name, n=1): pass
+    def record_workbook(self, ws): pass
+
+
+_NULL_PROFILER = _NullProfiler(trace_memory=False)
+
+
+def generate_trading_journal_excel(start_date_str, initial_capital, num_weeks, filename="trading_journal.xlsx", streaming=False, consolidated_formatting=False, open_after=True,
+                                   template_cache=False, profiler=None, compact=False, cached_values=False):
+    """
+    Generates an Excel file for a Trading Plan with proper formulas and formatting,
+    incorporating the requested changes and fixing the NoneType split error.
+
+    With streaming=True the rows are written one at a time to a write-only
+    worksheet, which produces the same layout while keeping memory low for
+    multi-month and multi-year journals (see _build_journal_workbook_streaming).
+
+    With consolidated_formatting=True the conditional formatting is applied as
+    one rule per column over all data rows instead of a set of rules per row,
+    which looks the same but keeps spreadsheet apps responsive on long journals.
+
+    With template_cache=True the sheet structure is built once per layout and
+    number of weeks and kept in TEMPLATE_CACHE_DIR; later runs copy the cached
+    file and only patch in the dates and the capital.
+
+    With a JournalProfiler passed as profiler, the wall time and memory of each
+    generation phase and the number of cells, merges, validations and formatting
+    rules are recorded on it (see JournalProfiler.report()).
+
+    With compact=True the journal uses the merge-free layout (see _compile_layout),
+    which looks alike and keeps the same formulas but opens and saves faster.
+
+    With cached_values=True every formula is saved with its computed result, so Excel
+    opens the file without recalculating it and pandas or openpyxl (data_only=True)
+    read the balances, summaries and durations directly.
+    """
+    try:
+        start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
+    except ValueError:
+        print("Error: Invalid date format. Please use YYYY-MM-DD.")
+        return
+
+    if profiler is None:
+        profiler = _NULL_PROFILER
+    else:
+        profiler.details.update(weeks=num_weeks, time_slots=len(TIME_SLOTS), streaming=streaming,
+                                consolidated_formatting=consolidated_formatting, template_cache=template_cache, compact=compact,
+                                cached_values=cached_values)
+    try:
+        if template_cache:
+            try:
+                profiler.start("template")
+                patched = _PatchedTemplate(_cached_template(num_weeks, streaming, consolidated_formatting, compact, profiler=profiler),
+                                           start_date, initial_capital, num_weeks)
+                profiler.start("save")
+                return _save_workbook(_CachedResultsWorkbook(patched) if cached_values else patched, filename, open_after)
+            except OSError as e:
+                print(f"Template cache unavailable ({e}), building the journal directly.")
+
+        profiler.start("setup")
+        layout = _compile_layout(initial_capital, compact)
+        if streaming:
+            wb = _build_journal_workbook_streaming(layout, start_date, initial_capital, num_weeks, consolidated_formatting, profiler=profiler)
+        else:
+            wb = _build_journal_workbook(layout, start_date, initial_capital, num_weeks, consolidated_formatting, profiler=profiler)
+        profiler.record_workbook(wb.worksheets[0])
+        profiler.start("save")
+        return _save_workbook(_CachedResultsWorkbook(wb) if cached_values else wb, filename, open_after)
+    finally:
+        profiler.stop()
+
+
+def sibling_journal_path(filepath, suffix):
+    """Returns the path next to filepath with suffix added to its name, e.g. journal.xlsx -> journal_imported.xlsx."""
+    root, extension = os.path.splitext(filepath)
+    return f"{root}_{suffix}{extension or '.xlsx'}"
+
+
+def _load_workbook_with_plain_merges(filepath):
+    """
+    Loads a workbook like openpyxl.load_workbook(), except that merged ranges are
+    restored afterwards as plain ranges. openpyxl otherwise re-formats the borders of
+    every merged cell while loading, which dominates the load time of a long journal.
+    """
+    merged_refs = {}
+    package = io.BytesIO()
+    with zipfile.ZipFile(filepath) as source, zipfile.ZipFile(package, "w", zipfile.ZIP_DEFLATED) as stripped:
+        workbook_parser = WorkbookParser(source, "xl/workbook.xml")
+        workbook_parser.parse()
+        sheet_names = {rel.target: sheet.name for sheet, rel in workbook_parser.find_sheets()}
+        for item in source.infolist():
+            data = source.read(item.filename)
+            if item.filename in sheet_names:
+                merged_refs[sheet_names[item.filename]] = [ref.decode("ascii") for ref in re.findall(rb'<mergeCell ref="([A-Z]+[0-9]+:[A-Z]+[0-9]+)"', data)]
+                data = re.sub(rb"<mergeCells[^>]*>.*?</mergeCells>|<mergeCells[^>]*/>", b"", data, flags=re.S)
+            stripped.writestr(item, data)
+    wb = openpyxl.load_workbook(package)
+    for sheet_name, refs in merged_refs.items():
+        if refs: wb[sheet_name].merged_cells = MultiCellRange(refs)
+    return wb
+
+
+def append_weeks_to_journal(filepath, num_weeks, output_path=None, initial_capital=None, open_after=True, cached_values=False, in_place=False):
+    """
+    Appends num_weeks to an existing journal after its last weekly or monthly summary
+    row. The new rows continue the cumulative chain from the journal's last data row
+    and the week numbering from its last "Week N" row. Existing rows and formatting
+    are left untouched; the existing dropdowns and formatting rules are only extended
+    over the new days (see _AppendedJournal).
+    Saves to output_path, by default <name>_extended.xlsx next to filepath, or over
+    filepath with in_place=True, and returns the saved path.
+    cached_values=True saves every formula, old and new, with its computed result.
+    """
+    appended = _AppendedJournal(filepath, num_weeks, initial_capital)
+    output_path = output_path or (filepath if in_place else sibling_journal_path(filepath, "extended"))
+    (_CachedResultsWorkbook(appended) if cached_values else appended).save(output_path)
+    print(f"Appended {num_weeks} week(s) to:\n{os.path.abspath(output_path)}")
+    if open_after: open_file_os_agnostic(output_path)
+    return output_path
+
+
+def _merge(ws, first_letter, first_row, last_letter, last_row):
+    # Same as ws.merge_cells() minus its check against every existing merge, which made
+    # merging quadratic in the journal length; journal merges never overlap.
+    merged_range = MergedCellRange(ws, f"{first_letter}{first_row}:{last_letter}{last_row}")
+    ws.merged_cells.ranges.add(merged_range)
+    ws._clean_merge_range(merged_range)
+
+
+def _data_row_styles(layout, styles, row_num, slot_start_row, day_start_row):
+    """
+    Returns the per-column styles of a data row: rows are shaded alternately, and in the
+    compact layout the unmerged slot fields and screenshot column keep the shade of the
+    slot's and the day's first row, as their merged cells do in the regular layout.
+    """
+    def shade(row): return styles["data_shaded"] if row % 2 == 0 else styles["data"]
+    row_styles = shade(row_num)
+    if not layout["compact"] or row_num == day_start_row: return row_styles
+    slot_styles, day_styles = shade(slot_start_row), shade(day_start_row)
+    return [slot_styles[col - 1] if col in layout["slot_cols"] else day_styles[col - 1] if col in layout["day_cols"] else style
+            for col, style in enumerate(row_styles, 1)]
+
+
+def _write_journal_weeks(ws, layout, styles, dvs, start_date, num_weeks, first_row, first_week_number=1, chain_from_row=None, profiler=_NULL_PROFILER):
+    """
+    Writes num_weeks of day blocks, daily and weekly summaries and a closing Monthly
+    Summary row to a regular worksheet, starting at first_row and numbering weeks from
+    first_week_number. The cumulative formulas of the first data row chain from
+    chain_from_row, or start from the capital when it is None. Returns the
+    (first_row, last_row) blocks of data rows written.
+    """
+    current_date = start_date
+    row_num = first_row
+    data_row_ranges = []
+    num_cols = layout["num_cols"]
 
     first_data_row = None
     last_weekly_summary_row = None
@@ -158,133 +717,53 @@ def generate_trading_journal_excel(start_date_str, initial_capital, num_weeks, f
             day_date_str = current_date.strftime('%Y-%m-%d')
             day_date_display = f"{weekday_name} {day_date_str}"
 
+            profiler.start("data_rows")
             date_row = row_num
-            # Adjusted end_column for date row merge (was 26, now 27)
-            ws.merge_cells(start_row=date_row, start_column=1, end_row=date_row, end_column=27)
-            date_cell = ws.cell(row=date_row, column=1)
-            date_cell.value = day_date_display
-            date_cell.font = Font(bold=True, size=14, color="FFFFFF", name="Dana")
-            date_cell.fill = PatternFill(start_color="4169E1", end_color="4169E1", fill_type="solid")
-            date_cell.alignment = Alignment(horizontal='center', vertical='center')
+            for first_letter, last_letter in layout["date_merges"]: _merge(ws, first_letter, date_row, last_letter, date_row)
+            for col in layout["date_cells"]: ws.cell(row=date_row, column=col).style = styles["date"][col - 1]
+            ws.cell(row=date_row, column=1).value = day_date_display
             ws.row_dimensions[date_row].height = 35
             row_num += 1
 
             if first_data_row is None: first_data_row = row_num
             first_row_of_day_data = row_num
 
-            for slot_time_str in time_slots:
+            for slot_time_str in TIME_SLOTS:
                 current_slot_start_row = row_num
-                hour, minute = map(int, slot_time_str.split(":"))
-                entry_options_list = [f"{(hour + (minute + 15 * i) // 60):02d}:{( (minute + 15 * i) % 60):02d}" for i in range(4)]
-                exit_options_list = []
-                ch, cm = hour, minute
-                while ch < 24 and not (ch == 23 and cm > 30):
-                    exit_options_list.append(f"{ch:02d}:{cm:02d}")
-                    cm += 15
-                    if cm >= 60: ch += 1; cm = 0
-                
-                dv_entry_for_slot = DataValidation(type="list", formula1=f'"{",".join(entry_options_list)}"', allow_blank=True)
-                dv_exit_for_slot = DataValidation(type="list", formula1=f'"{",".join(exit_options_list)}"', allow_blank=True)
-                ws.add_data_validation(dv_entry_for_slot)
-                ws.add_data_validation(dv_exit_for_slot)
-
-                # Define the cell address for Risk Percentage (Column P, shifted from O) for the current slot.
-                risk_percentage_actual_cell = f"P{current_slot_start_row}"
-
                 for sub_row_idx in range(2):
-                    all_data_rows.append(row_num)
-                    row_fill = PatternFill(start_color="F5F5F5", end_color="F5F5F5", fill_type="solid") if row_num % 2 == 0 else None
-                    for col_idx_plus_1 in range(1, len(headers) + 1):
-                        cell = ws.cell(row=row_num, column=col_idx_plus_1)
-                        if row_fill: cell.fill = row_fill
-                        current_alignment = Alignment(horizontal='center', vertical='center')
-                        header_name_for_col = headers[col_idx_plus_1-1]
-                        # Adjusted column index for Reason / Flex / Mistakes (was 10, now 9)
-                        if header_name_for_col == "Reason / Flex / Mistakes": current_alignment.wrap_text = True
-                        elif col_idx_plus_1 == 9 : current_alignment.wrap_text = True # This is the start of the merged Reason / Flex / Mistakes
-                        elif header_name_for_col == "Plan Adherence": current_alignment.wrap_text = True
-                        cell.alignment = current_alignment
+                    row_styles = _data_row_styles(layout, styles, row_num, current_slot_start_row, first_row_of_day_data)
+                    if row_num == first_row_of_day_data: present_cols = layout["first_of_day_cells"]
+                    else: present_cols = layout["slot_start_cells"] if sub_row_idx == 0 else layout["slot_second_cells"]
+                    for col in present_cols:
+                        ws.cell(row=row_num, column=col).style = row_styles[col - 1]
 
                     if sub_row_idx == 0: ws.cell(row=row_num, column=1).value = slot_time_str
-                    # Adjusted merge cells for Reason / Flex / Mistakes (was 10-12, now 9-13)
-                    ws.merge_cells(start_row=row_num, start_column=9, end_row=row_num, end_column=13)
-                    
-                    # Adjusted column indices for data validations
-                    dv_signal.add(f"D{row_num}"); dv_status.add(f"E{row_num}"); dv_momentum.add(f"F{row_num}")
-                    dv_order_type.add(f"G{row_num}"); dv_trade_type.add(f"H{row_num}"); dv_adherence.add(f"N{row_num}") # M -> N
-                    
-                    ws.cell(row=row_num, column=16).value = 1 # P: Risk (%) (was O)
-                    ws.cell(row=row_num, column=18).value = f'=IF(AND(B{row_num}<>"",C{row_num}<>""), (C{row_num}-B{row_num})*24*4, "")' # R: Trade Duration (was Q)
-
-                    ws.cell(row=row_num, column=20).value = 0  # T: Result (R) (was S)
-
-                    # U: Cumulative Result (was T)
-                    if row_num == first_data_row: ws.cell(row=row_num, column=21).value = f"=T{row_num}"
-                    elif row_num == first_row_of_day_data: ws.cell(row=row_num, column=21).value = f"=U{row_num-2}+T{row_num}"
-                    else: ws.cell(row=row_num, column=21).value = f"=U{row_num-1}+T{row_num}"
-                    # V: Cumulative Max Reward (was U)
-                    if row_num == first_data_row: ws.cell(row=row_num, column=22).value = f"=S{row_num}"
-                    elif row_num == first_row_of_day_data: ws.cell(row=row_num, column=22).value = f"=V{row_num-2}+S{row_num}"
-                    else: ws.cell(row=row_num, column=22).value = f"=V{row_num-1}+S{row_num}"
-                    # W: Balance (was V)
-                    if row_num == first_data_row: ws.cell(row=row_num, column=23).value = f"=IF(T{row_num}=0,{initial_capital},{initial_capital}*(1+T{row_num}*P{row_num}/100))" # T, P (was S, O)
-                    elif row_num == first_row_of_day_data: ws.cell(row=row_num, column=23).value = f"=IF(T{row_num}=0,W{row_num-2},W{row_num-2} + T{row_num}*{initial_capital}*{risk_percentage_actual_cell}/100)" # T, W (was S, V)
-                    else: ws.cell(row=row_num, column=23).value = f"=IF(T{row_num}=0,W{row_num-1},W{row_num-1} + T{row_num}*{initial_capital}*{risk_percentage_actual_cell}/100)" # T, W (was S, V)
-                    # X: Max Reward Balance (was W)
-                    if row_num == first_data_row: ws.cell(row=row_num, column=24).value = f"=IF(S{row_num}=0,{initial_capital},{initial_capital}*(1+S{row_num}*P{row_num}/100))" # S, P (was R, O)
-                    elif row_num == first_row_of_day_data: ws.cell(row=row_num, column=24).value = f"=IF(S{row_num}=0,X{row_num-2},X{row_num-2} + S{row_num}*{initial_capital}*{risk_percentage_actual_cell}/100)" # S, X (was R, W)
-                    else: ws.cell(row=row_num, column=24).value = f"=IF(S{row_num}=0,X{row_num-1},X{row_num-1} + S{row_num}*{initial_capital}*{risk_percentage_actual_cell}/100)" # S, X (was R, W)
-                    # Y: Min Balance (was X)
-                    if row_num == first_data_row: ws.cell(row=row_num, column=25).value = f"=W{row_num}" # W (was V)
-                    elif row_num == first_row_of_day_data: ws.cell(row=row_num, column=25).value = f"=MIN(Y{row_num-2},W{row_num})" # Y, W (was X, V)
-                    else: ws.cell(row=row_num, column=25).value = f"=MIN(Y{row_num-1},W{row_num})" # Y, W (was X, V)
-                    # Z: Max Balance (was Y)
-                    if row_num == first_data_row: ws.cell(row=row_num, column=26).value = f"=W{row_num}" # W (was V)
-                    elif row_num == first_row_of_day_data: ws.cell(row=row_num, column=26).value = f"=MAX(Z{row_num-2},W{row_num})" # Z, W (was Y, V)
-                    else: ws.cell(row=row_num, column=26).value = f"=MAX(Z{row_num-1},W{row_num})" # Z, W (was Y, V)
-                    # AA: Min Lows % Drawdown (was Z)
-                    ws.cell(row=row_num, column=27).value = f"=IF(Y{row_num}={initial_capital},0,(Y{row_num}-{initial_capital})/{initial_capital}*100)" # Y (was X)
-                    
-                    dv_entry_for_slot.add(f"B{row_num}"); dv_exit_for_slot.add(f"C{row_num}")
-                    ws.cell(row=row_num, column=2).number_format = "HH:mm"; ws.cell(row=row_num, column=3).number_format = "HH:mm"
+                    for first_letter, last_letter in layout["row_span_merges"]: _merge(ws, first_letter, row_num, last_letter, row_num)
+
+                    # The first row of a day chains past the date row to the previous summary row
+                    prev_row = chain_from_row if row_num == first_data_row else (row_num - 2 if row_num == first_row_of_day_data else row_num - 1)
+                    for col, value in _data_row_values(layout, row_num, prev_row, current_slot_start_row).items():
+                        ws.cell(row=row_num, column=col).value = value
                     row_num += 1
 
-                ws.merge_cells(start_row=current_slot_start_row, start_column=1, end_row=current_slot_start_row + 1, end_column=1)
-                ws.merge_cells(start_row=current_slot_start_row, start_column=4, end_row=current_slot_start_row + 1, end_column=4)
-                ws.merge_cells(start_row=current_slot_start_row, start_column=5, end_row=current_slot_start_row + 1, end_column=5)
-                ws.merge_cells(start_row=current_slot_start_row, start_column=6, end_row=current_slot_start_row + 1, end_column=6)
-                ws.merge_cells(start_row=current_slot_start_row, start_column=16, end_row=current_slot_start_row + 1, end_column=16) # Risk (%) shifted from 15 to 16
+                for col_letter in layout["slot_merge_letters"]: _merge(ws, col_letter, current_slot_start_row, col_letter, current_slot_start_row + 1)
 
             last_row_of_day_data = row_num -1
-            if first_row_of_day_data <= last_row_of_day_data :
-                 # Adjusted for new column (was 27-35, now 28-36)
-                 ws.merge_cells(start_row=first_row_of_day_data, start_column=28, end_row=last_row_of_day_data, end_column=36)
+            for first_letter, last_letter in layout["day_span_merges"]: _merge(ws, first_letter, first_row_of_day_data, last_letter, last_row_of_day_data)
+            data_row_ranges.append((first_row_of_day_data, last_row_of_day_data))
+            _add_day_validations(dvs, layout, first_row_of_day_data)
             for r_idx in range(first_row_of_day_data, row_num): ws.row_dimensions[r_idx].height = 50
 
-            summary_fill = PatternFill(start_color="E6E6FA", end_color="E6E6FA", fill_type="solid")
-            ws.merge_cells(start_row=row_num, start_column=1, end_row=row_num, end_column=2)
-            # Adjusted end_column for summary merge (was 13, now 14)
-            ws.merge_cells(start_row=row_num, start_column=3, end_row=row_num, end_column=14)
-            for col in range(1, len(headers) + 1):
-                cell = ws.cell(row=row_num, column=col); cell.fill = summary_fill
-                cell.font = Font(bold=True, name="Dana"); cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+            profiler.start("summary_rows")
+            for first_letter, last_letter in layout["summary_merges"]: _merge(ws, first_letter, row_num, last_letter, row_num)
+            for col in range(1, num_cols + 1):
+                ws.cell(row=row_num, column=col).style = styles["daily_summary"][col - 1]
             ws.row_dimensions[row_num].height = 22.5
             ws.cell(row=row_num, column=1).value = "Daily Summary"
-            
-            if first_row_of_day_data <= last_row_of_day_data:
-                ws.cell(row=row_num, column=15).value = f"=IFERROR(AVERAGE(N{first_row_of_day_data}:N{last_row_of_day_data}),\"\")" # N -> O
-                ws.cell(row=row_num, column=16).value = f"=IFERROR(SUM(P{first_row_of_day_data}:P{last_row_of_day_data}),\"\")" # O -> P
-                ws.cell(row=row_num, column=17).value = f"=IFERROR(SUM(Q{first_row_of_day_data}:Q{last_row_of_day_data}),\"\")" # P -> Q
-                ws.cell(row=row_num, column=18).value = f"=IFERROR(AVERAGE(R{first_row_of_day_data}:R{last_row_of_day_data}),\"\")" # Q -> R
-                ws.cell(row=row_num, column=20).value = f"=SUM(T{first_row_of_day_data}:T{last_row_of_day_data})" # S -> T
-                ws.cell(row=row_num, column=21).value = f"=U{last_row_of_day_data}" # T -> U
-                ws.cell(row=row_num, column=22).value = f"=V{last_row_of_day_data}" # U -> V
-                ws.cell(row=row_num, column=23).value = f"=W{last_row_of_day_data}" # V -> W
-                ws.cell(row=row_num, column=24).value = f"=X{last_row_of_day_data}" # W -> X
-                ws.cell(row=row_num, column=25).value = f"=Y{last_row_of_day_data}" # X -> Y
-                ws.cell(row=row_num, column=26).value = f"=Z{last_row_of_day_data}" # Y -> Z
-                ws.cell(row=row_num, column=27).value = f"=AA{last_row_of_day_data}" # Z -> AA
-            
+
+            for col, value in _daily_summary_values(layout, first_row_of_day_data, last_row_of_day_data).items():
+                ws.cell(row=row_num, column=col).value = value
+
             daily_summary_rows_info.append({
                 "summary_row": row_num, "data_start_row": first_row_of_day_data,
                 "data_end_row": last_row_of_day_data, "date_str": day_date_str
@@ -293,8 +772,6 @@ def generate_trading_journal_excel(start_date_str, initial_capital, num_weeks, f
             current_date += timedelta(days=1)
 
         if daily_summary_rows_info:
-            weekly_fill = PatternFill(start_color="4682B4", end_color="4682B4", fill_type="solid")
-            
             first_day_info = daily_summary_rows_info[0]
             date_cell_value_first_day = ws.cell(row=first_day_info["data_start_row"] - 1, column=1).value
             if date_cell_value_first_day and isinstance(date_cell_value_first_day, str) and " " in date_cell_value_first_day:
@@ -303,138 +780,1134 @@ def generate_trading_journal_excel(start_date_str, initial_capital, num_weeks, f
                 first_day_date_str_for_range = first_day_info.get("date_str", "Unknown_Start")
 
             last_day_info = daily_summary_rows_info[-1]
-            date_cell_value_last_day = ws.cell(row=last_day_info["summary_row"] - 1, column=1).value
+            date_cell_value_last_day = ws.cell(row=last_day_info["data_start_row"] - 1, column=1).value
             if date_cell_value_last_day and isinstance(date_cell_value_last_day, str) and " " in date_cell_value_last_day:
                 last_day_date_str_for_range = date_cell_value_last_day.split(" ", 1)[1]
             else:
                 last_day_date_str_for_range = last_day_info.get("date_str", "Unknown_End")
-            
+
             week_range = f"{first_day_date_str_for_range} to {last_day_date_str_for_range}"
 
-            ws.merge_cells(start_row=row_num, start_column=1, end_row=row_num, end_column=2)
-            # Adjusted end_column for weekly summary merge (was 13, now 14)
-            ws.merge_cells(start_row=row_num, start_column=3, end_row=row_num, end_column=14)
-            for col in range(1, len(headers) + 1):
-                cell = ws.cell(row=row_num, column=col); cell.fill = weekly_fill
-                cell.font = Font(bold=True, color="FFFFFF", name="Dana"); cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-            ws.cell(row=row_num, column=1).value = f"Week {week + 1} ({week_range})"
+            for first_letter, last_letter in layout["summary_merges"]: _merge(ws, first_letter, row_num, last_letter, row_num)
+            for col in range(1, num_cols + 1):
+                ws.cell(row=row_num, column=col).style = styles["weekly_summary"][col - 1]
+            ws.cell(row=row_num, column=1).value = f"Week {first_week_number + week} ({week_range})"
             ws.row_dimensions[row_num].height = 30
-            
-            avg_sl_daily_cells = ",".join([f"O{info['summary_row']}" for info in daily_summary_rows_info if info['data_start_row'] <= info['data_end_row']]) # N -> O
-            sum_risk_daily_cells = ",".join([f"P{info['summary_row']}" for info in daily_summary_rows_info if info['data_start_row'] <= info['data_end_row']]) # O -> P
-            sum_target_r_daily_cells = ",".join([f"Q{info['summary_row']}" for info in daily_summary_rows_info if info['data_start_row'] <= info['data_end_row']]) # P -> Q
-            avg_duration_daily_cells = ",".join([f"R{info['summary_row']}" for info in daily_summary_rows_info if info['data_start_row'] <= info['data_end_row']]) # Q -> R
-            sum_result_daily_cells = ",".join([f"T{info['summary_row']}" for info in daily_summary_rows_info if info['data_start_row'] <= info['data_end_row']]) # S -> T
-
-            if avg_sl_daily_cells: ws.cell(row=row_num, column=15).value = f"=IFERROR(AVERAGE({avg_sl_daily_cells}),\"\")" # 14 -> 15
-            if sum_risk_daily_cells: ws.cell(row=row_num, column=16).value = f"=IFERROR(SUM({sum_risk_daily_cells}),\"\")" # 15 -> 16
-            if sum_target_r_daily_cells: ws.cell(row=row_num, column=17).value = f"=IFERROR(SUM({sum_target_r_daily_cells}),\"\")" # 16 -> 17
-            if avg_duration_daily_cells: ws.cell(row=row_num, column=18).value = f"=IFERROR(AVERAGE({avg_duration_daily_cells}),\"\")" # 17 -> 18
-            if sum_result_daily_cells: ws.cell(row=row_num, column=20).value = f"=SUM({sum_result_daily_cells})" # 19 -> 20
-            
-            last_daily_summary_row = daily_summary_rows_info[-1]["summary_row"]
-            ws.cell(row=row_num, column=21).value = f"=U{last_daily_summary_row}" # 20 -> 21
-            ws.cell(row=row_num, column=22).value = f"=V{last_daily_summary_row}" # 21 -> 22
-            ws.cell(row=row_num, column=23).value = f"=W{last_daily_summary_row}" # 22 -> 23
-            ws.cell(row=row_num, column=24).value = f"=X{last_daily_summary_row}" # 23 -> 24
-            ws.cell(row=row_num, column=25).value = f"=Y{last_daily_summary_row}" # 24 -> 25
-            ws.cell(row=row_num, column=26).value = f"=Z{last_daily_summary_row}" # 25 -> 26
-            ws.cell(row=row_num, column=27).value = f"=AA{last_daily_summary_row}" # 26 -> 27
-            
+
+            for col, value in _weekly_summary_values(layout, daily_summary_rows_info).items():
+                ws.cell(row=row_num, column=col).value = value
+
             last_weekly_summary_row = row_num
             row_num += 1
 
     if first_data_row:
-        monthly_fill = PatternFill(start_color="87CEEB", end_color="87CEEB", fill_type="solid")
-        ws.merge_cells(start_row=row_num, start_column=1, end_row=row_num, end_column=2)
-        # Adjusted end_column for monthly summary merge (was 13, now 14)
-        ws.merge_cells(start_row=row_num, start_column=3, end_row=row_num, end_column=14)
-        for col in range(1, len(headers) + 1):
-            cell = ws.cell(row=row_num, column=col); cell.fill = monthly_fill
-            cell.font = Font(bold=True, name="Dana"); cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+        for first_letter, last_letter in layout["summary_merges"]: _merge(ws, first_letter, row_num, last_letter, row_num)
+        for col in range(1, num_cols + 1):
+            ws.cell(row=row_num, column=col).style = styles["monthly_summary"][col - 1]
         ws.cell(row=row_num, column=1).value = "Monthly Summary"
         ws.row_dimensions[row_num].height = 30
-        
+
         source_summary_row = last_weekly_summary_row if last_weekly_summary_row is not None else (daily_summary_rows_info[-1]["summary_row"] if daily_summary_rows_info else first_data_row -1)
         if source_summary_row < 2 : source_summary_row = row_num -1
 
         if source_summary_row >= first_data_row-1 :
-            ws.cell(row=row_num, column=15).value = f"=O{source_summary_row}" # 14 -> 15
-            ws.cell(row=row_num, column=16).value = f"=P{source_summary_row}" # 15 -> 16
-            ws.cell(row=row_num, column=17).value = f"=Q{source_summary_row}" # 16 -> 17
-            ws.cell(row=row_num, column=18).value = f"=R{source_summary_row}" # 17 -> 18
-            ws.cell(row=row_num, column=20).value = f"=T{source_summary_row}" # 19 -> 20
-            ws.cell(row=row_num, column=21).value = f"=U{source_summary_row}" # 20 -> 21
-            ws.cell(row=row_num, column=22).value = f"=V{source_summary_row}" # 21 -> 22
-            ws.cell(row=row_num, column=23).value = f"=W{source_summary_row}" # 22 -> 23
-            ws.cell(row=row_num, column=24).value = f"=X{source_summary_row}" # 23 -> 24
-            ws.cell(row=row_num, column=25).value = f"=Y{source_summary_row}" # 24 -> 25
-            ws.cell(row=row_num, column=26).value = f"=Z{source_summary_row}" # 25 -> 26
-            ws.cell(row=row_num, column=27).value = f"=AA{source_summary_row}" # 26 -> 27
+            for col, value in _monthly_summary_values(layout, source_summary_row).items():
+                ws.cell(row=row_num, column=col).value = value
+    return data_row_ranges
+
+
+def _build_journal_workbook(layout, start_date, initial_capital, num_weeks, consolidated_formatting=False, profiler=_NULL_PROFILER):
+    """Builds the journal workbook in memory, addressing cells through ws.cell()."""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+
+    ws.title = "Trading Journal"
+    ws.freeze_panes = "A2"
 
+    styles = _register_journal_styles(wb, layout)
+
+    for col in layout["header_cells"]:
+        cell = ws.cell(row=1, column=col)
+        cell.value = layout["headers"][col - 1]
+        cell.style = styles["header"][col - 1]
+
+    _apply_column_widths(ws, layout)
+
+    # "Reason / Flex / Mistakes" and "Trade Screenshot" span several columns
+    for first_letter, last_letter in layout["header_spans"]: _merge(ws, first_letter, 1, last_letter, 1)
+
+    dvs = _create_validations(ws)
     green_fill = PatternFill(start_color='90EE90', end_color='90EE90', fill_type='solid')
     red_fill = PatternFill(start_color='FFB6C1', end_color='FFB6C1', fill_type='solid')
-    for r in all_data_rows:
-        ws.conditional_formatting.add(f"P{r}", CellIsRule(operator='lessThan', formula=['1'], stopIfTrue=True, fill=green_fill)) # O -> P
-        for col_letter in ['T', 'U', 'V']: # S, T, U -> T, U, V
-            cell_ref = f"{col_letter}{r}"
-            ws.conditional_formatting.add(cell_ref, CellIsRule(operator='greaterThan', formula=['0'], stopIfTrue=True, fill=green_fill))
-            ws.conditional_formatting.add(cell_ref, CellIsRule(operator='lessThan', formula=['0'], stopIfTrue=True, fill=red_fill))
-        for col_letter in ['W', 'X', 'Y', 'Z']: # V, W, X, Y -> W, X, Y, Z
-            cell_ref = f"{col_letter}{r}"
-            ws.conditional_formatting.add(cell_ref, CellIsRule(operator='greaterThanOrEqual', formula=[str(initial_capital)], stopIfTrue=True, fill=green_fill))
-            ws.conditional_formatting.add(cell_ref, CellIsRule(operator='lessThan', formula=[str(initial_capital)], stopIfTrue=True, fill=red_fill))
-        cell_ref_aa = f"AA{r}" # Z -> AA
-        ws.conditional_formatting.add(cell_ref_aa, CellIsRule(operator='greaterThanOrEqual', formula=['0'], stopIfTrue=True, fill=green_fill))
-        ws.conditional_formatting.add(cell_ref_aa, CellIsRule(operator='lessThan', formula=['0'], stopIfTrue=True, fill=red_fill))
-        cell_ref_d = f"D{r}"
-        ws.conditional_formatting.add(cell_ref_d, FormulaRule(formula=[f'OR(EXACT(D{r},"Strong"), EXACT(D{r},"Normal"), EXACT(D{r},"V-Strong"), EXACT(D{r},"V-Normal"))'], stopIfTrue=True, fill=green_fill))
-        ws.conditional_formatting.add(cell_ref_d, FormulaRule(formula=[f'OR(EXACT(D{r},"Weak"), EXACT(D{r},"V-Weak"))'], stopIfTrue=True, fill=red_fill))
-        cell_ref_e = f"E{r}"
-        ws.conditional_formatting.add(cell_ref_e, FormulaRule(formula=[f'AND(NOT(ISBLANK(E{r})),OR(EXACT(E{r},"Range"),EXACT(E{r},"V-Range")) )'], stopIfTrue=True, fill=red_fill))
-        ws.conditional_formatting.add(cell_ref_e, FormulaRule(formula=[f'AND(NOT(ISBLANK(E{r})),NOT(OR(EXACT(E{r},"Range"),EXACT(E{r},"V-Range"))))'], stopIfTrue=True, fill=green_fill))
-        cell_ref_f = f"F{r}"
-        ws.conditional_formatting.add(cell_ref_f, FormulaRule(formula=[f'AND(NOT(ISBLANK(F{r})),OR(EXACT(F{r},"Increasing"),EXACT(F{r},"V-Increasing")) )'], stopIfTrue=True, fill=green_fill))
-        ws.conditional_formatting.add(cell_ref_f, FormulaRule(formula=[f'AND(NOT(ISBLANK(F{r})),NOT(OR(EXACT(F{r},"Increasing"),EXACT(F{r},"V-Increasing"))))'], stopIfTrue=True, fill=red_fill))
-
-        # Conditional formatting for "Plan Adherence" (Column N, shifted from M)
-        cell_ref_n = f"N{r}"
-        ws.conditional_formatting.add(cell_ref_n, CellIsRule(operator='equal', formula=['"Full Adherence"'], stopIfTrue=True, fill=green_fill))
-        ws.conditional_formatting.add(cell_ref_n, FormulaRule(formula=[f'AND(N{r}<>"", N{r}<>"Full Adherence")'], stopIfTrue=True, fill=red_fill))
+
+    data_row_ranges = _write_journal_weeks(ws, layout, styles, dvs, start_date, num_weeks, 2, profiler=profiler)
+
+    profiler.start("conditional_formatting")
+    if consolidated_formatting:
+        _add_conditional_formatting(ws, layout, data_row_ranges, initial_capital, green_fill, red_fill)
+    else:
+        for first_row, last_row in data_row_ranges:
+            for r in range(first_row, last_row + 1):
+                _add_conditional_formatting(ws, layout, [(r, r)], initial_capital, green_fill, red_fill)
+    return wb
+
+
+class _StreamingSheetWriter(WorksheetWriter):
+    """
+    Writes a streamed journal sheet whose merged ranges and dropdown ranges are only
+    serialised at save time. openpyxl would hold every range as an object until then and
+    build the whole mergeCells element at once, which made memory grow with the number
+    of weeks; here the merge refs are spooled to a temporary file as rows are written and
+    each dropdown's sqref is rebuilt from the day blocks when its element is written.
+    """
+
+    def __init__(self, ws, layout, dvs, data_row_ranges):
+        super().__init__(ws)
+        self.layout = layout
+        self.dvs = dvs
+        self.data_row_ranges = data_row_ranges # Filled in by the builder as days are written
+        self.merge_count = 0
+        self.merge_spool = tempfile.TemporaryFile("w+", encoding="ascii")
+
+    def merge(self, refs):
+        for ref in refs:
+            self.merge_spool.write(f"{ref}\n")
+            self.merge_count += 1
+
+    def write_merged_cells(self):
+        if not self.merge_count: return
+        self.merge_spool.seek(0)
+        xf = self.xf.send(True)
+        with xf.element("mergeCells", {"count": str(self.merge_count)}):
+            for ref in self.merge_spool:
+                xf.write(Element("mergeCell", ref=ref.rstrip("\n")))
+        self.xf.send(None)
+        self.merge_spool.close()
+
+    def write_validations(self):
+        validations = self.ws.data_validations.dataValidation
+        if not validations or not self.data_row_ranges: return
+        xf = self.xf.send(True)
+        with xf.element("dataValidations", {"count": str(len(validations))}):
+            for dv in validations: # One sqref in memory at a time
+                tree = dv.to_tree()
+                tree.set("sqref", " ".join(ref for first_row, _ in self.data_row_ranges
+                                           for day_dv, ref in _day_validation_refs(self.dvs, self.layout, first_row) if day_dv is dv))
+                xf.write(tree)
+        self.xf.send(None)
+
+
+def _build_journal_workbook_streaming(layout, start_date, initial_capital, num_weeks, consolidated_formatting=False, filled_values=None,
+                                      profiler=_NULL_PROFILER, first_week_number=1, brought_forward=None, canonical_styles=False):
+    """
+    Builds the same layout as _build_journal_workbook on a write-only worksheet.
+
+    Every row is emitted once, in order, through ws.append(); cells that the
+    in-memory build loses to merged ranges are simply left out, so the saved
+    file is identical while no cell objects are kept after their row is written.
+    Merged and dropdown ranges are serialised by _StreamingSheetWriter at save time.
+    Memory is not entirely flat: the day blocks of data rows are kept for the
+    consolidated formatting rules and the dropdowns, and the rules' sqrefs hold one
+    range per day, which adds about 11 KiB per week (0.66 MiB at 4 weeks, 1.05 MiB
+    at 52, 2.3 MiB at 156 with consolidated formatting).
+
+    filled_values optionally pre-fills data rows: {(date, slot index): [row values, ...]}
+    with one {column key: value} dict per row of the slot, e.g. from broker_import.py.
+
+    brought_forward optionally adds a (label, {column: value}) row under the header that
+    the first data row's cumulative formulas chain from, as generate_yearly_journal()
+    does to continue the previous month's sheet. canonical_styles fixes the order of
+    the cell styles (see _prime_journal_styles) so the sheet can be moved into another
+    workbook built the same way.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Trading Journal")
+    ws.freeze_panes = "A2"
+
+    num_cols = layout["num_cols"]
+    _apply_column_widths(ws, layout)
+    styles = _register_journal_styles(wb, layout)
+    if canonical_styles: _prime_journal_styles(wb)
+
+    def styled_cell(value, style):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
+
+    def append_row(row_num, height, cells):
+        # Row dimensions are written with the row itself, so they must be set first and can go afterwards
+        ws.row_dimensions[row_num].height = height
+        ws.append(cells)
+        del ws.row_dimensions[row_num]
+        profiler.count("cells", len(cells) - cells.count(None))
+
+    green_fill = PatternFill(start_color='90EE90', end_color='90EE90', fill_type='solid')
+    red_fill = PatternFill(start_color='FFB6C1', end_color='FFB6C1', fill_type='solid')
+
+    # Merges and dropdown ranges go to the writer, which serialises them at save time
+    dvs = _create_validations(ws)
+    data_row_ranges = []
+    writer = ws._writer = _StreamingSheetWriter(ws, layout, dvs, data_row_ranges)
+    writer.write_top()
+
+    def merge(refs):
+        refs = list(refs)
+        writer.merge(refs)
+        profiler.count("merges", len(refs))
+
+    header_cells = [None] * num_cols
+    for col in layout["header_cells"]: header_cells[col - 1] = styled_cell(layout["headers"][col - 1], styles["header"][col - 1])
+    ws.append(header_cells)
+    profiler.count("cells", len(header_cells) - header_cells.count(None))
+    merge(f"{first_letter}1:{last_letter}1" for first_letter, last_letter in layout["header_spans"])
+
+    def summary_cells(row_num, label, values, style):
+        cells = [styled_cell(None, column_style) for column_style in style]
+        cells[0].value = label
+        for col, value in values.items(): cells[col - 1].value = value
+        merge(f"{first_letter}{row_num}:{last_letter}{row_num}" for first_letter, last_letter in layout["summary_merges"])
+        return cells
+
+    current_date = start_date
+    row_num = 2
+    chain_from_row = None
+    if brought_forward:
+        append_row(row_num, 30, summary_cells(row_num, brought_forward[0], brought_forward[1], styles["monthly_summary"]))
+        chain_from_row = row_num
+        row_num += 1
+    first_data_row = None
+    last_weekly_summary_row = None
+
+    for week in range(num_weeks):
+        daily_summary_rows_info = []
+        for day in range(5):
+            while current_date.weekday() >= 5:
+                current_date += timedelta(days=1)
+            profiler.start("data_rows")
+            day_date_str = current_date.strftime('%Y-%m-%d')
+
+            date_cells = [None] * num_cols
+            for col in layout["date_cells"]: date_cells[col - 1] = styled_cell(None, styles["date"][col - 1])
+            date_cells[0].value = f"{current_date.strftime('%A')} {day_date_str}"
+            append_row(row_num, 35, date_cells)
+            merge(f"{first_letter}{row_num}:{last_letter}{row_num}" for first_letter, last_letter in layout["date_merges"])
+            row_num += 1
+
+            if first_data_row is None: first_data_row = row_num
+            first_row_of_day_data = row_num
+
+            for slot_idx, slot_time_str in enumerate(TIME_SLOTS):
+                current_slot_start_row = row_num
+                slot_filled_values = filled_values.get((current_date, slot_idx), ()) if filled_values else ()
+                for sub_row_idx in range(2):
+                    row_styles = _data_row_styles(layout, styles, row_num, current_slot_start_row, first_row_of_day_data)
+                    if row_num == first_row_of_day_data: present_cols = layout["first_of_day_cells"]
+                    else: present_cols = layout["slot_start_cells"] if sub_row_idx == 0 else layout["slot_second_cells"]
+                    prev_row = chain_from_row if row_num == first_data_row else (row_num - 2 if row_num == first_row_of_day_data else row_num - 1)
+                    values = _data_row_values(layout, row_num, prev_row, current_slot_start_row)
+                    if sub_row_idx == 0: values[1] = slot_time_str
+                    if sub_row_idx < len(slot_filled_values):
+                        for key, value in slot_filled_values[sub_row_idx].items(): values[layout["cols"][key]] = value
+                    cells = [None] * num_cols
+                    for col in present_cols: cells[col - 1] = styled_cell(values.get(col), row_styles[col - 1])
+                    append_row(row_num, 50, cells)
+
+                    merge(f"{first_letter}{row_num}:{last_letter}{row_num}" for first_letter, last_letter in layout["row_span_merges"])
+                    if not consolidated_formatting: _add_conditional_formatting(ws, layout, [(row_num, row_num)], initial_capital, green_fill, red_fill)
+                    row_num += 1
+
+                merge(f"{col_letter}{current_slot_start_row}:{col_letter}{current_slot_start_row + 1}" for col_letter in layout["slot_merge_letters"])
+
+            last_row_of_day_data = row_num - 1
+            merge(f"{first_letter}{first_row_of_day_data}:{last_letter}{last_row_of_day_data}" for first_letter, last_letter in layout["day_span_merges"])
+            data_row_ranges.append((first_row_of_day_data, last_row_of_day_data))
+            profiler.count("validation_ranges", sum(1 for _ in _day_validation_refs(dvs, layout, first_row_of_day_data)))
+
+            profiler.start("summary_rows")
+            append_row(row_num, 22.5, summary_cells(row_num, "Daily Summary", _daily_summary_values(layout, first_row_of_day_data, last_row_of_day_data), styles["daily_summary"]))
+            daily_summary_rows_info.append({
+                "summary_row": row_num, "data_start_row": first_row_of_day_data,
+                "data_end_row": last_row_of_day_data, "date_str": day_date_str
+            })
+            row_num += 1
+            current_date += timedelta(days=1)
+
+        week_range = f"{daily_summary_rows_info[0]['date_str']} to {daily_summary_rows_info[-1]['date_str']}"
+        append_row(row_num, 30, summary_cells(row_num, f"Week {first_week_number + week} ({week_range})", _weekly_summary_values(layout, daily_summary_rows_info), styles["weekly_summary"]))
+        last_weekly_summary_row = row_num
+        row_num += 1
+
+    if first_data_row:
+        append_row(row_num, 30, summary_cells(row_num, "Monthly Summary", _monthly_summary_values(layout, last_weekly_summary_row), styles["monthly_summary"]))
+    profiler.start("conditional_formatting")
+    if consolidated_formatting:
+        _add_conditional_formatting(ws, layout, data_row_ranges, initial_capital, green_fill, red_fill)
+    return wb
+
+
+# Start date and capital the cached templates are built with. The capital is chosen so
+# that its text never occurs in a journal by accident.
+_TEMPLATE_START_DATE = date(2001, 1, 1) # A Monday
+_TEMPLATE_CAPITAL = 918273645.5
+
+
+def _template_cache_key(num_weeks, streaming, consolidated_formatting, compact=False):
+    """Hashes everything the sheet structure depends on, so editing the layout invalidates the cache."""
+    layout_spec = json.dumps([LAYOUT_SCHEMA_VERSION, TIME_SLOTS, JOURNAL_COLUMNS, SUMMARY_FORMULAS, num_weeks, streaming, consolidated_formatting, compact],
+                             sort_keys=True, default=str)
+    return hashlib.sha1(layout_spec.encode("utf-8")).hexdigest()[:16]
+
+
+def _cached_template(num_weeks, streaming=False, consolidated_formatting=False, compact=False, cache_dir=TEMPLATE_CACHE_DIR, profiler=_NULL_PROFILER):
+    """
+    Returns the path of the cached skeleton for this layout, building and storing it first if needed.
+    A profiler sees the builder phases and counts only when the template is built here.
+    """
+    template_path = os.path.join(cache_dir, f"journal_{num_weeks}w_{_template_cache_key(num_weeks, streaming, consolidated_formatting, compact)}.xlsx")
+    if not os.path.exists(template_path):
+        build = _build_journal_workbook_streaming if streaming else _build_journal_workbook
+        profiler.start("setup")
+        wb = build(_compile_layout(_TEMPLATE_CAPITAL, compact), _TEMPLATE_START_DATE, _TEMPLATE_CAPITAL, num_weeks, consolidated_formatting, profiler=profiler)
+        profiler.record_workbook(wb.worksheets[0])
+        profiler.start("template")
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_path = f"{template_path[:-5]}.{os.getpid()}.tmp.xlsx" # Concurrent batch workers may build the same template
+        wb.save(temp_path)
+        os.replace(temp_path, template_path)
+    return template_path
+
+
+def _journal_labels(start_date, num_weeks):
+    """Returns the date row labels followed by the week row labels the builders write for start_date."""
+    days = []
+    current_date = start_date
+    while len(days) < num_weeks * 5: # Weekends are skipped, as in the builders
+        if current_date.weekday() < 5: days.append(current_date)
+        current_date += timedelta(days=1)
+    day_labels = [f"{day.strftime('%A')} {day.strftime('%Y-%m-%d')}" for day in days]
+    week_labels = [f"Week {week + 1} ({days[week * 5]:%Y-%m-%d} to {days[week * 5 + 4]:%Y-%m-%d})" for week in range(num_weeks)]
+    return day_labels + week_labels
+
+
+class _PatchedTemplate:
+    """
+    A cached template with its dates and capital replaced. The dates only occur in
+    the date and week row labels and the capital only in formulas and formatting
+    thresholds, so every part but the sheet (and shared strings, where a writer
+    uses them) is copied as it is. Saves like a Workbook.
+    """
+
+    def __init__(self, template_path, start_date, initial_capital, num_weeks):
+        self.template_path = template_path
+        template_labels = _journal_labels(_TEMPLATE_START_DATE, num_weeks)
+        self.labels = {old.encode("utf-8"): new.encode("utf-8") for old, new in zip(template_labels, _journal_labels(start_date, num_weeks))}
+        # Same text the formula templates and formatting rules produce for the capital
+        self.capital = (str(_TEMPLATE_CAPITAL).encode("ascii"), str(initial_capital).encode("ascii"))
+
+    def _patch_label(self, match):
+        return b"<t>" + self.labels.get(match.group(1), match.group(1)) + b"</t>"
+
+    def save(self, filename):
+        now = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ").encode("ascii")
+        with zipfile.ZipFile(self.template_path) as template, zipfile.ZipFile(filename, "w", zipfile.ZIP_DEFLATED) as journal:
+            for item in template.infolist():
+                data = template.read(item.filename)
+                if item.filename.startswith("xl/worksheets/") or item.filename == "xl/sharedStrings.xml":
+                    data = re.sub(rb"<t>([^<]*)</t>", self._patch_label, data.replace(*self.capital))
+                elif item.filename == "docProps/core.xml":
+                    data = re.sub(rb"(<dcterms:(?:created|modified)[^>]*>)[^<]*", lambda m: m.group(1) + now, data)
+                journal.writestr(item, data)
+
+
+# Worksheet child elements in the order the schema requires them
+_SHEET_ELEMENT_ORDER = ["sheetData", "sheetCalcPr", "sheetProtection", "protectedRanges", "scenarios", "autoFilter", "sortState",
+                        "dataConsolidate", "customSheetViews", "mergeCells", "phoneticPr", "conditionalFormatting", "dataValidations",
+                        "hyperlinks", "printOptions", "pageMargins", "pageSetup", "headerFooter", "rowBreaks", "colBreaks",
+                        "customProperties", "cellWatches", "ignoredErrors", "smartTags", "drawing", "legacyDrawing", "legacyDrawingHF",
+                        "drawingHF", "picture", "oleObjects", "controls", "webPublishItems", "tableParts", "extLst"]
+_XML_ROW_START = re.compile(r'<row\b[^>]*?\sr="(\d+)"')
+_XML_REF = re.compile(r"([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?")
+
+
+def _xml_attr(element, name):
+    """Returns the unescaped value of attribute name in an element's start tag, or None."""
+    match = re.search(rf'\s{name}="([^"]*)"', element)
+    return html.unescape(match.group(1)) if match else None
+
+
+def _cell_style_names(styles_xml):
+    """
+    Returns [(named style, plain)] for every cell style id of a styles part, where plain
+    tells whether the id only applies its named style, without formatting of its own.
+    """
+    def xfs(tag):
+        section = re.search(rf"<{tag}\b[^>]*>(.*?)</{tag}>", styles_xml, re.S)
+        return re.findall(r"<xf\b[^>]*?(?:/>|>.*?</xf>)", section.group(1), re.S) if section else []
+    def look(xf): return [_xml_attr(xf, attr) for attr in ("numFmtId", "fontId", "fillId", "borderId")] + [re.sub(r"^<xf\b[^>]*>", "", xf)]
+
+    names = {_xml_attr(style, "xfId"): _xml_attr(style, "name") for style in re.findall(r"<cellStyle\b[^>]*>", styles_xml)}
+    style_xfs = xfs("cellStyleXfs")
+    cell_styles = []
+    for xf in xfs("cellXfs"):
+        xf_id = _xml_attr(xf, "xfId") or "0"
+        cell_styles.append((names.get(xf_id), int(xf_id) < len(style_xfs) and look(xf) == look(style_xfs[int(xf_id)])))
+    return cell_styles
+
+
+def _insert_sheet_element(sheet, tag, element):
+    """Inserts element, a tag element, into worksheet XML before the first element the schema puts after it."""
+    for following in _SHEET_ELEMENT_ORDER[_SHEET_ELEMENT_ORDER.index(tag) + 1:]:
+        match = re.search(rf"<{following}\b", sheet)
+        if match: return sheet[:match.start()] + element + sheet[match.start():]
+    return sheet.replace("</worksheet>", element + "</worksheet>")
+
+
+def _extend_sheet_list(sheet, tag, elements):
+    """Adds elements to the tag list element (mergeCells, dataValidations) of worksheet XML, creating it if needed."""
+    if not elements: return sheet
+    match = re.search(rf"<{tag}\b[^>]*>(.*?)</{tag}>", sheet, re.S)
+    if not match: return _insert_sheet_element(sheet, tag, f'<{tag} count="{len(elements)}">{"".join(elements)}</{tag}>')
+    count = _xml_attr(match.group(0), "count")
+    start_tag = re.match(rf"<{tag}\b[^>]*>", match.group(0)).group(0)
+    if count is not None: start_tag = start_tag.replace(f'count="{count}"', f'count="{int(count) + len(elements)}"')
+    return sheet[:match.start()] + start_tag + match.group(1) + "".join(elements) + f"</{tag}>" + sheet[match.end():]
+
+
+class _AppendedJournal:
+    """
+    A journal with weeks appended to its first sheet without loading it into openpyxl.
+    The new weeks are written to a fresh workbook at the rows they will occupy, and
+    their row XML is spliced in after the journal's last summary row, with cell style
+    ids mapped through the named styles both share. Their merges are added, the list
+    validations and the formatting rules over data rows are extended over their days,
+    and every other part (other sheets, images, charts) is copied as it is. Raises
+    ValueError for a file that does not end like a journal. Saves like a Workbook.
+    """
+
+    def __init__(self, filepath, num_weeks, initial_capital=None):
+        with zipfile.ZipFile(filepath) as source:
+            self.items = [(item, source.read(item.filename)) for item in source.infolist()]
+        parts = {item.filename: data for item, data in self.items}
+        sheets = _package_sheets(parts)
+        if not sheets: raise ValueError(f"{filepath} has no worksheet.")
+        self.sheet_part = sheets[0][1]
+        sheet = parts[self.sheet_part].decode("utf-8")
+        strings = _shared_strings(parts)
+
+        balance_letter = _compile_layout(0)["letters"]["balance"] # Only the column letters are needed here
+        first_data_row = last_data_row = last_summary_row = last_date = day_start_row = balance_formula = None
+        last_week_number = last_content_row = 0
+        data_blocks = [] # (first_row, last_row) of each day's data rows
+        for col, row, attrs, inner in _XML_CELL.findall(sheet):
+            row = int(row)
+            formula = _XML_FORMULA.match(inner or "")
+            value = None if formula else _xml_cell_value(attrs, inner, strings)
+            if formula or value not in (None, ""): last_content_row = max(last_content_row, row)
+            if formula and col == balance_letter and row == first_data_row: balance_formula = _xml_formula_text(formula.group(0))
+            if col != "A" or not isinstance(value, str): continue
+            label = value.strip()
+            date_match, week_match = DATE_LABEL_PATTERN.match(label), WEEK_LABEL_PATTERN.match(label)
+            if date_match:
+                last_date = datetime.strptime(date_match.group(1), "%Y-%m-%d").date()
+                day_start_row = row + 1
+                if first_data_row is None: first_data_row = day_start_row
+            elif label == "Daily Summary":
+                last_data_row = row - 1
+                if day_start_row is not None: data_blocks.append((day_start_row, last_data_row))
+            elif week_match or label == "Monthly Summary":
+                last_summary_row = row
+                if week_match: last_week_number = int(week_match.group(1))
+        if last_data_row is None or last_summary_row is None or last_summary_row < last_data_row:
+            raise ValueError(f"{filepath} does not end with a weekly or monthly summary row of a trading journal.")
+        if last_content_row > last_summary_row:
+            raise ValueError(f"{filepath} has content below its last summary row (row {last_summary_row}).")
+
+        if initial_capital is None:
+            capital_match = FIRST_BALANCE_CAPITAL_PATTERN.match(str(balance_formula))
+            if not capital_match:
+                raise ValueError(f"{filepath}: initial capital not found in the balance formulas, pass initial_capital.")
+            capital_text = capital_match.group(1) # Parsed back to the type that produced it, so new formulas read the same
+            initial_capital = int(capital_text) if capital_text.lstrip("+-").isdigit() else float(capital_text)
+
+        # Compact journals have no merged ranges at all, not even in the header
+        layout = _compile_layout(initial_capital, compact=not re.search(r"<mergeCell\b", sheet))
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        data_row_ranges = _write_journal_weeks(ws, layout, _register_journal_styles(wb, layout), _create_validations(ws), last_date + timedelta(days=1),
+                                               num_weeks, last_summary_row + 1, first_week_number=last_week_number + 1, chain_from_row=last_data_row)
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        with zipfile.ZipFile(buffer) as package:
+            weeks = {name: package.read(name).decode("utf-8") for name in package.namelist() if name.endswith(".xml")}
+        weeks_sheet = weeks["xl/worksheets/sheet1.xml"]
+
+        # Style ids differ between the two packages, the named styles behind them do not
+        journal_styles = {}
+        for style_id, (name, plain) in enumerate(_cell_style_names(parts["xl/styles.xml"].decode("utf-8"))):
+            if name is not None and (name not in journal_styles or plain and not journal_styles[name][1]): journal_styles[name] = (style_id, plain)
+        weeks_styles = [name for name, _ in _cell_style_names(weeks["xl/styles.xml"])]
+        rows = re.search(r"<sheetData>(.*)</sheetData>", weeks_sheet, re.S).group(1)
+        missing = {weeks_styles[int(style_id)] for style_id in re.findall(r'<c\b[^>]*?\ss="(\d+)"', rows)} - set(journal_styles)
+        if missing: raise ValueError(f"{filepath} lacks the journal cell style(s) {', '.join(sorted(missing))}; it was not made by this generator.")
+        rows = re.sub(r'(<(?:c|row)\b[^>]*?\ss=")(\d+)"', lambda m: f'{m.group(1)}{journal_styles[weeks_styles[int(m.group(2))]][0]}"', rows)
+        weeks_strings = _shared_strings({name: data.encode("utf-8") for name, data in weeks.items()})
+        if weeks_strings: # Older openpyxl releases share strings; the journal's table is left alone
+            rows = re.sub(r'(<c\b[^>]*?)\st="s"([^>]*)><v>(\d+)</v></c>',
+                          lambda m: f'{m.group(1)} t="inlineStr"{m.group(2)}><is><t>{html.escape(weeks_strings[int(m.group(3))], quote=False)}</t></is></c>', rows)
+
+        # Rows below the last summary row hold no content (checked above), only formatting
+        cut = next((match.start() for match in _XML_ROW_START.finditer(sheet) if int(match.group(1)) > last_summary_row), sheet.index("</sheetData>"))
+        sheet = sheet[:cut] + rows + sheet[sheet.index("</sheetData>"):]
+        last_row = max(int(row) for row in _XML_ROW_START.findall(rows))
+        sheet = re.sub(r'(<dimension ref="[A-Z]+\d+:[A-Z]+)\d+"', lambda m: f'{m.group(1)}{last_row}"', sheet, count=1)
+        sheet = _extend_sheet_list(sheet, "mergeCells", re.findall(r"<mergeCell\b[^>]*/>", weeks_sheet))
+
+        new_validations = {}
+        for dv in re.findall(r"<dataValidation\b[^>]*?(?:/>|>.*?</dataValidation>)", weeks_sheet, re.S):
+            new_validations[re.search(r"<formula1>(.*?)</formula1>", dv, re.S).group(1)] = dv
+        def extend_validation(match):
+            formula1 = re.search(r"<formula1>(.*?)</formula1>", match.group(0), re.S)
+            if _xml_attr(match.group(0), "type") != "list" or not formula1 or formula1.group(1) not in new_validations: return match.group(0)
+            sqref = _xml_attr(new_validations.pop(formula1.group(1)), "sqref")
+            return re.sub(r'(\ssqref="[^"]*)"', lambda m: f'{m.group(1)} {sqref}"', match.group(0), count=1)
+        sheet = re.sub(r"<dataValidation\b[^>]*?(?:/>|>.*?</dataValidation>)", extend_validation, sheet, flags=re.S)
+        sheet = _extend_sheet_list(sheet, "dataValidations", list(new_validations.values()))
+
+        # Each set of columns the rules cover over data rows keeps its rules: the first
+        # (topmost) sqref over them is extended, its relative formulas still anchored on
+        # its top-left cell, instead of adding a rule per column for every append.
+        block_of_row = {row: idx for idx, (first, last) in enumerate(data_blocks) for row in range(first, last + 1)}
+        extended_spans = set()
+        def extend_rules(match):
+            sqref, spans = _xml_attr(match.group(0), "sqref") or "", set()
+            for ref in sqref.split():
+                cells = _XML_REF.fullmatch(ref)
+                if not cells: return match.group(0)
+                first_row, last_row = int(cells.group(2)), int(cells.group(4) or cells.group(2))
+                if block_of_row.get(first_row) is None or block_of_row.get(first_row) != block_of_row.get(last_row): return match.group(0)
+                spans.add((cells.group(1), cells.group(3) or cells.group(1)))
+            spans = tuple(sorted(spans))
+            if not spans or spans in extended_spans: return match.group(0)
+            extended_spans.add(spans)
+            refs = " ".join(f"{first_col}{first}:{last_col}{last}" for first, last in data_row_ranges for first_col, last_col in spans)
+            return match.group(0).replace(f'sqref="{sqref}"', f'sqref="{sqref} {refs}"', 1)
+        sheet = re.sub(r"<conditionalFormatting\b[^>]*>", extend_rules, sheet)
+
+        # The new formulas have no cached results, so Excel has to calculate on opening
+        workbook = re.sub(rb"<calcPr\b[^>]*/>", lambda m: re.sub(rb'\s*fullCalcOnLoad="[^"]*"|\s*/>$', b"", m.group(0)) + b' fullCalcOnLoad="1" />',
+                          parts["xl/workbook.xml"])
+        self.replaced = {self.sheet_part: sheet.encode("utf-8"), "xl/workbook.xml": workbook}
+
+    def save(self, filename):
+        now = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ").encode("ascii")
+        with zipfile.ZipFile(filename, "w", zipfile.ZIP_DEFLATED) as journal:
+            for item, data in self.items:
+                data = self.replaced.get(item.filename, data)
+                if item.filename == "docProps/core.xml":
+                    data = re.sub(rb"(<dcterms:modified[^>]*>)[^<]*", lambda m: m.group(1) + now, data)
+                journal.writestr(item, data)
+
+
+# Cached formula results. openpyxl saves formulas without their results, so Excel
+# recalculates the whole journal on first open and headless readers (pandas, openpyxl
+# with data_only=True) see empty cells. Every formula the generator writes comes from the
+# layout's templates, so the results follow from the recurrences those templates encode
+# and are written next to each formula without evaluating any formula text.
+_XML_CELL = re.compile(r'<c r="([A-Z]+)(\d+)"([^>]*?)(?:/>|>(.*?)</c>)', re.S)
+_XML_FORMULA = re.compile(r'<f\b[^>]*(?:/>|>.*?</f>)', re.S)
+_XML_VALUE = re.compile(r'<v>(.*?)</v>', re.S)
+_XML_TEXT = re.compile(r'<t\b[^>]*>(.*?)</t>', re.S)
+_XML_TYPE = re.compile(r'\s+t="[^"]*"')
+_FORMULA_REF = re.compile(r"(?:'((?:[^']|'')+)'!)?([A-Z]{1,3})(\d+)(?::([A-Z]{1,3})(\d+))?")
+_TIME_TEXT = re.compile(r"\s*(\d{1,2}):(\d{2})(?::(\d{2}))?\s*")
+
+
+class _UncachedFormula(Exception):
+    """A formula whose result cannot be computed from the journal's recurrences, such as one added by hand."""
+
+
+def _template_pattern(template):
+    """Compiles a formula template into a regex capturing its placeholders; a repeated placeholder must repeat the same text."""
+    pattern, seen = "", set()
+    for idx, part in enumerate(re.split(r"\{(\w+)\}", template)):
+        if idx % 2 == 0:
+            pattern += re.escape(part)
+        else:
+            pattern += f"(?P={part})" if part in seen else f"(?P<{part}>{'[-+0-9.eE]+' if part == 'cap' else '[0-9]+'})"
+            seen.add(part)
+    return re.compile(pattern)
+
+
+def _summary_patterns():
+    """Returns [(kind, regex)] matching the summary formulas of SUMMARY_FORMULAS, with the cells they cover captured."""
+    patterns = []
+    for kind, templates in SUMMARY_FORMULAS.items():
+        for template in templates:
+            literals = re.split(r"\{self\}\{first\}:\{self\}\{last\}|\{cells\}|\{self\}\{last\}", template)
+            patterns.append((kind, re.compile("(.+)".join(map(re.escape, literals)))))
+    return patterns
+
+
+def _time_number(value):
+    """Coerces a Trade Duration operand the way Excel arithmetic does: numbers, and numeric or time text."""
+    if isinstance(value, (bool, float)): return float(value)
     try:
-        script_dir = os.path.dirname(os.path.abspath(__file__)) if "__file__" in locals() or "__file__" in globals() else os.getcwd()
-        output_dir = os.path.join(script_dir, 'output')
-        os.makedirs(output_dir, exist_ok=True)
-        output_path = os.path.join(output_dir, filename)
-        wb.save(output_path)
-        print(f"Successfully generated Excel file at:\n{os.path.abspath(output_path)}")
-        open_file_os_agnostic(output_path) # Open the file
+        return float(value)
+    except ValueError:
+        time_match = _TIME_TEXT.fullmatch(value)
+        if not time_match: raise _UncachedFormula(f"{value!r} is not a time")
+        return (int(time_match.group(1)) * 3600 + int(time_match.group(2)) * 60 + int(time_match.group(3) or 0)) / 86400
+
+
+def _package_sheets(parts):
+    """Returns [(sheet name, part name)] of a workbook package in workbook order."""
+    workbook = parts["xl/workbook.xml"].decode("utf-8")
+    rels = parts["xl/_rels/workbook.xml.rels"].decode("utf-8")
+    targets = {}
+    for rel in re.findall(r"<Relationship\b[^>]*>", rels):
+        rel_id, target = re.search(r'\bId="([^"]*)"', rel), re.search(r'\bTarget="([^"]*)"', rel)
+        if rel_id and target: targets[rel_id.group(1)] = target.group(1).lstrip("/") if target.group(1).startswith("/") else f"xl/{target.group(1)}"
+    sheets = []
+    for sheet in re.findall(r"<sheet\b[^>]*>", workbook):
+        name, rel_id = re.search(r'\bname="([^"]*)"', sheet), re.search(r'\br:id="([^"]*)"', sheet)
+        if name and rel_id and targets.get(rel_id.group(1)) in parts: sheets.append((html.unescape(name.group(1)), targets[rel_id.group(1)]))
+    return sheets
+
+
+def _shared_strings(parts):
+    """Returns the shared strings of a workbook package, in the order t="s" cells refer to them."""
+    if "xl/sharedStrings.xml" not in parts: return []
+    return [html.unescape("".join(_XML_TEXT.findall(item)))
+            for item in re.findall(r"<si>(.*?)</si>", parts["xl/sharedStrings.xml"].decode("utf-8"), re.S)]
+
+
+def _xml_cell_value(attrs, inner, strings):
+    """Returns the value of a cell without a formula from its attributes and inner XML, or None if it has none."""
+    if not inner: return None
+    if 't="inlineStr"' in attrs: return html.unescape("".join(_XML_TEXT.findall(inner)))
+    value = _XML_VALUE.search(inner)
+    if value is None: return None
+    text = html.unescape(value.group(1))
+    if 't="s"' in attrs: return strings[int(text)]
+    if 't="str"' in attrs or 't="d"' in attrs: return text
+    if 't="b"' in attrs: return text == "1"
+    if 't="e"' in attrs: return text # The error's text, such as #N/A
+    return float(text)
+
+
+def _xml_formula_text(formula_element):
+    """Returns the formula of an <f> element as it reads in Excel ("=..."), or None for an element without text."""
+    text = re.match(r"<f\b[^>]*>(.*)</f>", formula_element, re.S)
+    return "=" + html.unescape(text.group(1)) if text else None
+
+
+def _journal_formula_results(parts):
+    """
+    Computes the result of every formula of a workbook package ({part name: bytes}) and
+    returns {(sheet name, column letter, row): result}. Data row formulas must be the
+    layout's templates: each run of rows chaining from the row before is computed with
+    journal_metrics.compute_metrics, from the capital or from the values the first row
+    chains from (a "Brought Forward" row or an earlier block). Summary formulas, an
+    AVERAGE, SUM or plain reference over other cells (possibly on an earlier sheet), are
+    computed from the cells they cover. Raises _UncachedFormula for any other formula,
+    or for text where a chain needs a number.
+    """
+    from journal_metrics import compute_metrics # Imported here, as it imports this module
+
+    layout = _compile_layout("{cap}") # Leaves the capital as a placeholder in the templates
+    letters = layout["letters"]
+    chained_keys = [column["key"] for column in JOURNAL_COLUMNS if "{prev}" in column.get("formula", ("", ""))[1]]
+    data_patterns = {get_column_letter(col): (_template_pattern(chain), _template_pattern(first))
+                     for (col, first), (_, chain) in zip(layout["first_row_formulas"], layout["chain_row_formulas"])}
+    summary_patterns = _summary_patterns()
+    strings = _shared_strings(parts)
+    sheet_names = [name for name, _ in _package_sheets(parts)]
+
+    values, summaries, data_rows = {}, {}, {name: {} for name in sheet_names}
+    for name, part in _package_sheets(parts):
+        for col, row, attrs, inner in _XML_CELL.findall(parts[part].decode("utf-8")):
+            key, formula = (name, col, int(row)), _XML_FORMULA.match(inner or "")
+            if not formula:
+                if 't="e"' in attrs: raise _UncachedFormula(f"'{name}'!{col}{row} holds an error value")
+                value = _xml_cell_value(attrs, inner, strings)
+                if value is not None: values[key] = value
+                continue
+            text = _xml_formula_text(formula.group(0))
+            if text is None: raise _UncachedFormula(f"'{name}'!{col}{row} shares another cell's formula")
+            matches = [pattern.fullmatch(text) for pattern in data_patterns.get(col, ())]
+            match = next((m for m in matches if m), None)
+            if match and int(match.group("r")) == key[2]:
+                fields = data_rows[name].setdefault(key[2], {"cols": set(), "chain_cols": set()})
+                fields["cols"].add(col)
+                if matches[0]: fields["chain_cols"].add(col)
+                for field, field_value in match.groupdict().items():
+                    if fields.setdefault(field, field_value) != field_value: raise _UncachedFormula(f"'{name}'!{col}{row}: {text}")
+                continue
+            for kind, pattern in summary_patterns:
+                match = pattern.fullmatch(text)
+                refs = list(_FORMULA_REF.finditer(match.group(1))) if match else []
+                if refs and ",".join(ref.group(0) for ref in refs) == match.group(1) and (kind != "last" or len(refs) == 1 and not refs[0].group(4)):
+                    summaries[key] = (kind, [(ref.group(1).replace("''", "'") if ref.group(1) else name, ref.group(2), int(ref.group(3)),
+                                              ref.group(4) or ref.group(2), int(ref.group(5) or ref.group(3))) for ref in refs])
+                    break
+            else:
+                raise _UncachedFormula(f"'{name}'!{col}{row}: {text}")
+
+    results, pending = {}, set()
+
+    def value(key):
+        if key in results: return results[key]
+        if key in summaries: return summary(key)
+        if key[2] in data_rows.get(key[0], ()) and key[1] in data_patterns:
+            compute_chains(key[0])
+            return results[key]
+        return values.get(key)
+
+    def summary(key):
+        if key in pending: raise _UncachedFormula(f"'{key[0]}'!{key[1]}{key[2]} refers to itself")
+        pending.add(key)
+        kind, refs = summaries[key]
+        cells = []
+        for sheet, first_col, first_row, last_col, last_row in refs:
+            if sheet not in data_rows: raise _UncachedFormula(f"'{key[0]}'!{key[1]}{key[2]} refers to a missing sheet")
+            cells += [value((sheet, get_column_letter(col), row)) for col in range(column_index_from_string(first_col), column_index_from_string(last_col) + 1)
+                      for row in range(first_row, last_row + 1)]
+        numbers = [cell for cell in cells if isinstance(cell, float)] # AVERAGE and SUM skip text, booleans and blanks they refer to
+        if kind == "last": result = 0.0 if cells[0] is None else cells[0] # A reference to a blank cell reads 0
+        elif kind == "average": result = sum(numbers) / len(numbers) if numbers else "" # IFERROR turns #DIV/0! into ""
+        else: result = float(sum(numbers))
+        pending.discard(key)
+        results[key] = result
+        return result
+
+    def mirrored_row(sheet, col, row):
+        """Follows plain references down the same column of the sheet to the row whose value a cell repeats."""
+        seen = set()
+        while (sheet, col, row) in summaries and row not in seen:
+            seen.add(row)
+            kind, refs = summaries[sheet, col, row]
+            if kind != "last" or refs[0][:2] != (sheet, col): break
+            row = refs[0][2]
+        return row
+
+    def number(sheet, key, row):
+        cell = value((sheet, letters[key], row))
+        if cell is None: return 0.0
+        if not isinstance(cell, float): raise _UncachedFormula(f"'{sheet}'!{letters[key]}{row} is not a number")
+        return cell
+
+    def compute_chains(sheet):
+        if sheet in pending: raise _UncachedFormula(f"the running columns of '{sheet}' chain from themselves")
+        pending.add(sheet)
+        runs = []
+        for row in sorted(data_rows[sheet]):
+            fields = data_rows[sheet][row]
+            if fields["cols"] != set(data_patterns): raise _UncachedFormula(f"'{sheet}' row {row} lacks some of its formulas")
+            if "prev" in fields and not fields["chain_cols"].issuperset(letters[key] for key in chained_keys):
+                raise _UncachedFormula(f"'{sheet}' row {row} mixes first row and chained formulas")
+            prev = fields.get("prev")
+            if prev is not None and runs and all(mirrored_row(sheet, letters[key], int(prev)) == runs[-1][-1] for key in chained_keys):
+                runs[-1].append(row)
+            else:
+                runs.append([row])
+        for run in runs:
+            caps = {data_rows[sheet][row]["cap"] for row in run}
+            if len(caps) != 1: raise _UncachedFormula(f"'{sheet}' rows {run[0]}-{run[-1]} use different capitals")
+            prev = data_rows[sheet][run[0]].get("prev")
+            brought_forward = None if prev is None else {key: number(sheet, key, int(prev)) for key in chained_keys}
+            slot_rows = [int(data_rows[sheet][row].get("slot", row)) for row in run]
+            metrics = compute_metrics([number(sheet, "result", row) for row in run], [number(sheet, "max_reward", row) for row in run],
+                                      [number(sheet, "risk", row) for row in slot_rows], float(caps.pop()), brought_forward)
+            for idx, row in enumerate(run):
+                for key, column_values in metrics.items(): results[sheet, letters[key], row] = float(column_values[idx])
+                entry, exit_time = value((sheet, letters["entry_time"], row)), value((sheet, letters["exit_time"], row))
+                results[sheet, letters["duration"], row] = ("" if entry in (None, "") or exit_time in (None, "")
+                                                            else (_time_number(exit_time) - _time_number(entry)) * 24 * 4)
+        pending.discard(sheet)
+
+    for name in sheet_names:
+        for row in data_rows[name]: value((name, letters["balance"], row))
+    for key in summaries: value(key)
+    return results
+
+
+def _cache_formula_results(parts):
+    """
+    Returns the parts of a workbook package ({part name: bytes}) with the result of every
+    formula (see _journal_formula_results) written as the formula cell's cached value, and
+    the full recalculation Excel would otherwise run on opening the file switched off.
+    A package with a formula the journal does not write, such as one added by hand, is
+    returned unchanged and Excel calculates it on opening as usual.
+    """
+    try:
+        results = _journal_formula_results(parts)
+    except _UncachedFormula as e:
+        print(f"Formula results are not cached, Excel calculates them on opening instead ({e}).")
+        return parts
+
+    def cached_cell(name, match):
+        result = results.get((name, match.group(1), int(match.group(2))))
+        formula = _XML_FORMULA.match(match.group(4) or "")
+        if result is None or formula is None: return match.group(0)
+        attrs = _XML_TYPE.sub("", match.group(3))
+        if isinstance(result, bool): cell_type, text = ' t="b"', "1" if result else "0"
+        elif isinstance(result, str): cell_type, text = ' t="str"', html.escape(result, quote=False)
+        else: cell_type, text = "", str(int(result)) if float(result).is_integer() and abs(result) < 1e15 else repr(float(result))
+        return f'<c r="{match.group(1)}{match.group(2)}"{attrs}{cell_type}>{formula.group(0)}<v>{text}</v></c>'
+
+    parts = dict(parts)
+    for name, part in _package_sheets(parts):
+        parts[part] = _XML_CELL.sub(lambda match: cached_cell(name, match), parts[part].decode("utf-8")).encode("utf-8")
+    parts["xl/workbook.xml"] = re.sub(rb"<calcPr\b[^>]*/>", b'<calcPr calcId="191029" />', parts["xl/workbook.xml"])
+    return parts
+
+
+class _CachedResultsWorkbook:
+    """
+    A workbook saved with the result of every formula cached alongside it (see
+    _cache_formula_results). Wraps anything with a save(filename) method: a Workbook,
+    _PatchedTemplate or _AssembledWorkbook. Saves like a Workbook.
+    """
+
+    def __init__(self, wb):
+        self.wb = wb
+
+    def save(self, filename):
+        buffer = io.BytesIO()
+        self.wb.save(buffer)
+        with zipfile.ZipFile(buffer) as package:
+            items = [(item, package.read(item.filename)) for item in package.infolist()]
+        parts = _cache_formula_results({item.filename: data for item, data in items})
+        with zipfile.ZipFile(filename, "w", zipfile.ZIP_DEFLATED) as journal:
+            for item, _ in items: journal.writestr(item, parts[item.filename])
+
+
+def default_journal_filename(start_date_str, num_weeks, account=None):
+    """Returns the default output name, e.g. trading_journal_2025-04-28_to_2025-05-26.xlsx."""
+    end_date_str = (datetime.strptime(start_date_str, '%Y-%m-%d').date() + timedelta(weeks=num_weeks)).strftime('%Y-%m-%d')
+    account_part = f"{account}_" if account else ""
+    return f"trading_journal_{account_part}{start_date_str}_to_{end_date_str}.xlsx"
+
+
+def load_batch_manifest(manifest_path):
+    """
+    Reads a batch manifest and returns one job dict per journal.
+
+    The manifest is either a CSV file with the header
+    account,start_date,capital,weeks,output or a JSON list of objects with the
+    same keys. Only start_date is required; capital defaults to 25000, weeks to
+    4 and output to default_journal_filename(). A job whose entry is invalid is
+    returned with its reason in "error", so run_batch() reports it as failed and
+    still generates the others.
+    """
+    if manifest_path.lower().endswith(".json"):
+        with open(manifest_path, encoding="utf-8") as f:
+            entries = json.load(f)
+        if not isinstance(entries, list):
+            raise ValueError(f"{manifest_path}: expected a JSON list of jobs.")
+    else:
+        with open(manifest_path, newline="", encoding="utf-8") as f:
+            entries = list(csv.DictReader(f))
+
+    jobs = []
+    for line_no, entry in enumerate(entries, 1):
+        entry = {str(key).strip().lower(): (str(value).strip() if value is not None else "") for key, value in entry.items()}
+        try:
+            start_date_str = entry.get("start_date", "")
+            datetime.strptime(start_date_str, "%Y-%m-%d")
+            capital = float(entry.get("capital") or 25000)
+            weeks = int(entry.get("weeks") or 4)
+            if weeks < 1: raise ValueError("weeks must be at least 1")
+        except ValueError as e:
+            jobs.append({"account": entry.get("account", ""), "start_date": entry.get("start_date", ""), "capital": entry.get("capital", ""),
+                         "weeks": entry.get("weeks", ""), "output": entry.get("output", ""), "error": f"job {line_no} is invalid ({e})"})
+            continue
+        account = entry.get("account", "")
+        jobs.append({
+            "account": account, "start_date": start_date_str, "capital": capital, "weeks": weeks,
+            "output": entry.get("output") or default_journal_filename(start_date_str, weeks, account), "error": None,
+        })
+    return jobs
+
+
+def _run_batch_job(job):
+    """Generates one manifest journal in a worker process and returns its outcome and timing."""
+    started = time.perf_counter()
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log): # Keep the per-file messages out of the batch summary
+            path = generate_trading_journal_excel(job["start_date"], job["capital"], job["weeks"], job["output"],
+                                                  streaming=job["weeks"] > STREAMING_WEEKS_THRESHOLD,
+                                                  consolidated_formatting=True, open_after=False, template_cache=True, compact=job.get("compact", False),
+                                                  cached_values=job.get("cached_values", False))
+        error = None if path else (log.getvalue().strip().splitlines() or ["generation failed"])[-1]
     except Exception as e:
-        print(f"Error saving file: {e}")
-        if "__file__" not in locals() and "__file__" not in globals():
-            alt_output_path = os.path.join(os.getcwd(), filename)
-            try:
-                wb.save(alt_output_path)
-                print(f"Successfully generated Excel file (fallback location):\n{os.path.abspath(alt_output_path)}")
-                open_file_os_agnostic(alt_output_path) # Open the file from fallback location
-            except Exception as e_alt:
-                print(f"Error saving file (fallback attempt) or opening it: {e_alt}")
+        path, error = None, str(e)
+    return dict(job, path=path, error=error, seconds=time.perf_counter() - started)
+
+
+def run_batch(jobs, max_workers=None, open_after=True):
+    """
+    Generates every job on a process pool of at most max_workers processes
+    (default: one per CPU), prints a line per finished job and a summary, and
+    returns the results in manifest order.
+    """
+    started = time.perf_counter()
+    results = [None] * len(jobs)
+
+    def report(idx, result):
+        results[idx] = result
+        status = "OK  " if result["path"] else "FAIL"
+        print(f"[{status}] {result['account'] or '-'} {result['start_date']} x{result['weeks']}w "
+              f"{result['seconds']:.2f}s {result['path'] or result['error']}")
+        if open_after and result["path"]: open_file_os_agnostic(result["path"])
+
+    for idx, job in enumerate(jobs): # Invalid manifest entries fail without being run
+        if job.get("error"): report(idx, dict(job, path=None, seconds=0.0))
+    valid_jobs = [(idx, job) for idx, job in enumerate(jobs) if not job.get("error")]
+    if valid_jobs:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(_run_batch_job, job): idx for idx, job in valid_jobs}
+            for future in as_completed(futures): report(futures[future], future.result())
+
+    succeeded = sum(1 for result in results if result["path"])
+    print(f"\nBatch summary: {succeeded}/{len(results)} journals generated in {time.perf_counter() - started:.2f}s")
+    print(f"{'account':<16} {'start':<10} {'weeks':>5} {'seconds':>8}  output")
+    for result in results:
+        print(f"{(result['account'] or '-'):<16} {result['start_date']:<10} {result['weeks']:>5} {result['seconds']:>8.2f}  "
+              f"{result['path'] or 'FAILED: ' + result['error']}")
+    return results
+
+
+def _year_months(year):
+    """Returns (month name, first Monday, number of weeks) for each month of year; a week belongs to the month its Monday falls in."""
+    months = []
+    monday = date(year, 1, 1) + timedelta(days=-date(year, 1, 1).weekday() % 7)
+    while monday.year == year:
+        if not months or months[-1][1].month != monday.month: months.append([monday.strftime("%B"), monday, 0])
+        months[-1][2] += 1
+        monday += timedelta(weeks=1)
+    return [tuple(month) for month in months]
+
+
+def _month_sheet_summary_rows(num_weeks, brought_forward):
+    """
+    Rows of the weekly summaries and of the "Monthly Summary" on a streamed month sheet:
+    the header, the optional brought-forward row, then whole weeks. Returns (weekly rows, monthly row).
+    """
+    rows_per_week = 5 * (2 + 2 * len(TIME_SLOTS)) + 1 # Per day a date row, the slot rows and a summary, plus the week row
+    first_week_row = 3 if brought_forward else 2
+    return [first_week_row + week * rows_per_week - 1 for week in range(1, num_weeks + 1)], first_week_row + num_weeks * rows_per_week
+
+
+def _sheet_package(wb):
+    """Saves a workbook to memory and returns its package parts as {part name: bytes}."""
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    with zipfile.ZipFile(buffer) as package:
+        return {name: package.read(name) for name in package.namelist()}
+
+
+def _build_month_sheet(job):
+    """Builds one month of a yearly journal in a worker process and returns its package parts."""
+    layout = _compile_layout(job["capital"], job["compact"])
+    wb = _build_journal_workbook_streaming(layout, job["start_date"], job["capital"], job["weeks"], True, first_week_number=job["first_week_number"],
+                                           brought_forward=job["brought_forward"], canonical_styles=True)
+    return _sheet_package(wb)
+
+
+def _build_year_summary_sheet(layout, month_rows):
+    """
+    Builds the yearly roll-up sheet from month_rows, [(sheet name, weekly summary rows, monthly summary row)]:
+    a row per month combining its sheet's weekly summaries the way a weekly row combines its days (the
+    running columns mirror the "Monthly Summary" row), then a "Yearly Summary" over the month rows.
+    Returns package parts.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Year")
+    ws.freeze_panes = "A2"
+    _apply_column_widths(ws, layout)
+    styles = _register_journal_styles(wb, layout)
+    _prime_journal_styles(wb)
+
+    def append_summary_row(row_num, label, values, style):
+        cells = [WriteOnlyCell(ws) for _ in range(layout["num_cols"])]
+        for col, cell in enumerate(cells, 1):
+            cell.style = style[col - 1]
+            cell.value = label if col == 1 else values.get(col)
+        ws.row_dimensions[row_num].height = 30
+        ws.append(cells)
+        merge_refs.extend(f"{first_letter}{row_num}:{last_letter}{row_num}" for first_letter, last_letter in layout["summary_merges"])
+
+    header_cells = [None] * layout["num_cols"]
+    for col in layout["header_cells"]:
+        header_cells[col - 1] = WriteOnlyCell(ws, value=layout["headers"][col - 1])
+        header_cells[col - 1].style = styles["header"][col - 1]
+    ws.append(header_cells)
+    merge_refs = [f"{first_letter}1:{last_letter}1" for first_letter, last_letter in layout["header_spans"]]
+
+    for row_num, (sheet_name, weekly_rows, summary_row) in enumerate(month_rows, 2):
+        values = {col: f"='{sheet_name}'!{template[1:].format(source=summary_row)}" for col, template in layout["monthly_summary"]}
+        for col, col_letter, template in layout["weekly_summary"]:
+            if "{cells}" in template: # Sums and averages cover every week of the month, not just the last one
+                values[col] = template.format(cells=",".join(f"'{sheet_name}'!{col_letter}{row}" for row in weekly_rows))
+        append_summary_row(row_num, sheet_name, values, styles["weekly_summary"])
+    month_summary_rows = range(2, len(month_rows) + 2)
+    year_values = {col: template.format(cells=",".join(f"{col_letter}{row}" for row in month_summary_rows), last=month_summary_rows[-1])
+                   for col, col_letter, template in layout["weekly_summary"]}
+    append_summary_row(len(month_rows) + 2, "Yearly Summary", year_values, styles["monthly_summary"])
+    ws.merged_cells = MultiCellRange([CellRange(ref) for ref in merge_refs])
+    return _sheet_package(wb)
+
+
+class _AssembledWorkbook:
+    """
+    A workbook assembled from single-sheet packages built with canonical styles: the
+    first package supplies the shared parts, every package contributes its worksheet
+    XML under the given sheet name. Saves like a Workbook.
+    """
+
+    def __init__(self, packages, sheet_names):
+        strip_dxfs = lambda styles: re.sub(rb"<dxfs.*?</dxfs>|<dxfs[^>]*/>", b"", styles)
+        if len({strip_dxfs(package["xl/styles.xml"]) for package in packages}) != 1:
+            raise RuntimeError("Sheets were built with different cell styles and cannot share one workbook.")
+        self.packages = packages
+        self.sheet_names = sheet_names
+
+    def save(self, filename):
+        base = self.packages[0]
+        sheet_type = b"application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+        sheet_overrides = b"".join(b'<Override PartName="/xl/worksheets/sheet%d.xml" ContentType="%s" />' % (idx, sheet_type)
+                                   for idx in range(1, len(self.packages) + 1))
+        content_types = re.sub(rb'<Override PartName="/xl/worksheets/sheet1\.xml"[^>]*/>', lambda m: sheet_overrides, base["[Content_Types].xml"])
+        sheets = "".join(f'<sheet name="{html.escape(name)}" sheetId="{idx}" state="visible" r:id="rId{idx}" />'
+                         for idx, name in enumerate(self.sheet_names, 1))
+        workbook = re.sub(rb"<sheets>.*?</sheets>", lambda m: f"<sheets>{sheets}</sheets>".encode("utf-8"), base["xl/workbook.xml"])
+        relationship = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/"
+        rels = "".join(f'<Relationship Type="{relationship}worksheet" Target="/xl/worksheets/sheet{idx}.xml" Id="rId{idx}" />'
+                       for idx in range(1, len(self.packages) + 1))
+        rels += (f'<Relationship Type="{relationship}styles" Target="styles.xml" Id="rId{len(self.packages) + 1}" />'
+                 f'<Relationship Type="{relationship}theme" Target="theme/theme1.xml" Id="rId{len(self.packages) + 2}" />')
+        replaced = {
+            "[Content_Types].xml": content_types,
+            "xl/workbook.xml": workbook,
+            "xl/_rels/workbook.xml.rels": f'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">{rels}</Relationships>'.encode("utf-8"),
+        }
+        with zipfile.ZipFile(filename, "w", zipfile.ZIP_DEFLATED) as journal:
+            for name, data in base.items():
+                if name != "xl/worksheets/sheet1.xml": journal.writestr(name, replaced.get(name, data))
+            for idx, package in enumerate(self.packages, 1):
+                journal.writestr(f"xl/worksheets/sheet{idx}.xml", package["xl/worksheets/sheet1.xml"])
+
+
+def generate_yearly_journal(year, initial_capital, filename=None, max_workers=None, open_after=True, compact=False, cached_values=False):
+    """
+    Generates one workbook for a year with a sheet per month and a closing "Year" roll-up
+    sheet with a row per month over that sheet's weekly summaries. Each month holds the weeks whose
+    Monday falls in it; every month after the first starts with a "Brought Forward" row
+    that carries the previous sheet's cumulative columns, so the Cumulative Result through
+    Max Balance chain runs unbroken across the sheets.
+
+    The month sheets are built independently on a process pool of at most max_workers
+    processes (default: one per CPU) and their sheet XML is assembled into one package.
+    compact=True uses the merge-free layout and cached_values=True saves every formula with
+    its computed result, across the sheets. Returns the saved path.
+    """
+    layout = _compile_layout(initial_capital, compact)
+    chained_letters = [layout["letters"][column["key"]] for column in JOURNAL_COLUMNS if "{prev}" in column.get("formula", ("", ""))[1]]
+    jobs, month_rows, first_week_number = [], [], 1
+    for month_name, monday, num_weeks in _year_months(year):
+        brought_forward = None
+        if month_rows:
+            previous_name, _, previous_row = month_rows[-1]
+            brought_forward = (f"Brought Forward ({previous_name})",
+                               {column_index_from_string(letter): f"='{previous_name}'!{letter}{previous_row}" for letter in chained_letters})
+        jobs.append({"start_date": monday, "capital": initial_capital, "weeks": num_weeks, "first_week_number": first_week_number,
+                     "brought_forward": brought_forward, "compact": compact})
+        month_rows.append((month_name, *_month_sheet_summary_rows(num_weeks, brought_forward)))
+        first_week_number += num_weeks
+
+    if max_workers == 1:
+        packages = [_build_month_sheet(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            packages = list(pool.map(_build_month_sheet, jobs))
+    packages.append(_build_year_summary_sheet(layout, month_rows))
+    workbook = _AssembledWorkbook(packages, [name for name, _, _ in month_rows] + [f"Year {year}"])
+    if cached_values: workbook = _CachedResultsWorkbook(workbook)
+    return _save_workbook(workbook, filename or f"trading_journal_{year}.xlsx", open_after)
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate Excel trading journals. Without --batch the start date, capital and weeks are prompted for.")
+    parser.add_argument("--batch", metavar="MANIFEST", help="CSV or JSON manifest of journals to generate (account, start_date, capital, weeks, output)")
+    parser.add_argument("--append", metavar="JOURNAL", help="append --weeks more weeks to an existing journal, continuing its cumulative columns")
+    parser.add_argument("--weeks", type=int, default=4, help="number of weeks to append with --append (default: 4)")
+    parser.add_argument("--in-place", action="store_true", help="with --append, overwrite JOURNAL instead of saving JOURNAL_extended.xlsx next to it")
+    parser.add_argument("--year", type=int, help="generate one workbook for this year, with a sheet per month and a yearly roll-up sheet")
+    parser.add_argument("--capital", type=float, default=25000, help="initial capital for --year (default: 25000)")
+    parser.add_argument("--jobs", type=int, default=None, help="maximum number of journals (or --year month sheets) generated in parallel (default: CPU count)")
+    parser.add_argument("--compact", action="store_true", help="use the merge-free layout, which opens and saves faster")
+    parser.add_argument("--cached-values", action="store_true", help="save formulas with their computed results, for instant opening and headless readers")
+    parser.add_argument("--no-open", action="store_true", help="do not open the generated files")
+    parser.add_argument("--profile", metavar="REPORT", help="write a JSON report of per-phase time, peak memory and cell/merge/validation/rule counts")
+    return parser.parse_args(argv)
+
 
 if __name__ == "__main__":
+    args = _parse_args()
+    if args.append:
+        try:
+            if args.weeks < 1: raise ValueError("Number of weeks must be at least 1.")
+            append_weeks_to_journal(args.append, args.weeks, open_after=not args.no_open, cached_values=args.cached_values, in_place=args.in_place)
+        except (OSError, ValueError) as e:
+            print(f"Input Error: {e}")
+            sys.exit(1)
+        except Exception as e:
+            print(f"An unexpected error occurred: {e}")
+            sys.exit(1)
+        sys.exit(0)
+
+    if args.year:
+        try:
+            if not 1900 < args.year < 10000: raise ValueError("Year must have four digits.")
+            path = generate_yearly_journal(args.year, args.capital, max_workers=args.jobs, open_after=not args.no_open, compact=args.compact,
+                                           cached_values=args.cached_values)
+        except (OSError, ValueError) as e:
+            print(f"Input Error: {e}")
+            sys.exit(1)
+        sys.exit(0 if path else 1)
+
+    if args.batch:
+        try:
+            batch_jobs = [dict(job, compact=args.compact, cached_values=args.cached_values) for job in load_batch_manifest(args.batch)]
+            batch_results = run_batch(batch_jobs, max_workers=args.jobs, open_after=not args.no_open)
+        except (OSError, ValueError) as e:
+            print(f"Input Error: {e}")
+            sys.exit(1)
+        sys.exit(0 if all(result["path"] for result in batch_results) else 1)
+
     try:
         date_input = input("Enter start date (YYYY-MM-DD) or press Enter for default (2025-04-28): ").strip()
         capital_input = input("Enter initial capital or press Enter for default (25000): ").strip()
-        weeks_input = input("Enter number of weeks (1-4) or press Enter for default (4): ").strip()
+        weeks_input = input("Enter number of weeks or press Enter for default (4): ").strip()
 
         date_str = date_input if date_input else "2025-04-28"
         initial_capital = float(capital_input) if capital_input else 25000
         num_weeks_val = int(weeks_input) if weeks_input else 4
 
-        if not 1 <= num_weeks_val <= 4:
-            raise ValueError("Number of weeks must be between 1 and 4.")
-        
-        filename = f"trading_journal_{date_str}_to_{(datetime.strptime(date_str, '%Y-%m-%d').date() + timedelta(weeks=num_weeks_val)).strftime('%Y-%m-%d')}.xlsx"
-        generate_trading_journal_excel(date_str, initial_capital, num_weeks_val, filename)
+        if num_weeks_val < 1:
+            raise ValueError("Number of weeks must be at least 1.")
+
+        filename = default_journal_filename(date_str, num_weeks_val)
+        profiler = JournalProfiler() if args.profile else None
+        # A cached template skips the builder, so a profiled run builds the journal directly
+        generate_trading_journal_excel(date_str, initial_capital, num_weeks_val, filename, streaming=num_weeks_val > STREAMING_WEEKS_THRESHOLD,
+                                       consolidated_formatting=True, open_after=not args.no_open, template_cache=not profiler, profiler=profiler,
+                                       compact=args.compact, cached_values=args.cached_values)
+        if profiler:
+            profiler.write_json(args.profile)
+            print(f"Profile written to {os.path.abspath(args.profile)}")
 
     except KeyboardInterrupt: print("\nOperation cancelled by user.")
     except ValueError as ve: print(f"Input Error: {ve}")
@@ -0,0 +1,153 @@
+"""
+Benchmark suite for journal generation. Sweeps the number of weeks, the number of
+time slots per day and the generation modes, and records for each combination the
+build time, save time, peak memory (tracemalloc, measured in a separate run so
+tracing does not inflate the timings), output size and the time openpyxl takes to
+load the output again, using Journal.JournalProfiler.
+
+Results can be written to JSON and compared with an earlier run; the script exits
+with status 1 if any combination got slower, bigger or hungrier than the baseline
+by more than the tolerance.
+
+Usage: python benchmarks/bench_generation.py [--weeks 1,4,13] [--slots 4] [--modes memory,streaming,...]
+                                             [--repeats 3] [--output results.json] [--baseline old.json] [--tolerance 0.25]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+import openpyxl
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Journal
+
+# generate_trading_journal_excel() keyword arguments of each mode
+MODES = {
+    "memory": dict(streaming=False, consolidated_formatting=False),
+    "memory-consolidated": dict(streaming=False, consolidated_formatting=True),
+    "streaming": dict(streaming=True, consolidated_formatting=False),
+    "streaming-consolidated": dict(streaming=True, consolidated_formatting=True),
+    "template": dict(streaming=True, consolidated_formatting=True, template_cache=True),
+    "memory-compact": dict(streaming=False, consolidated_formatting=True, compact=True),
+    "streaming-compact": dict(streaming=True, consolidated_formatting=True, compact=True),
+    "streaming-cached": dict(streaming=True, consolidated_formatting=True, cached_values=True),
+}
+# Measurements compared against a baseline, and the counts reported alongside them
+MEASURES = ["build_seconds", "save_seconds", "peak_bytes", "output_bytes", "load_seconds"]
+
+
+@contextlib.contextmanager
+def time_slots(count):
+    """Temporarily gives the journal count hourly time slots ending with the usual 21:30 slot."""
+    saved_slots, saved_options = Journal.TIME_SLOTS, dict(Journal.SLOT_TIME_OPTIONS)
+    Journal.TIME_SLOTS = [f"{hour:02d}:30" for hour in range(22 - count, 22)]
+    Journal.SLOT_TIME_OPTIONS.update({slot: Journal._slot_time_options(slot) for slot in Journal.TIME_SLOTS})
+    try:
+        yield
+    finally:
+        Journal.TIME_SLOTS = saved_slots
+        Journal.SLOT_TIME_OPTIONS.clear()
+        Journal.SLOT_TIME_OPTIONS.update(saved_options)
+
+
+def generate(weeks, mode, trace_memory):
+    """Generates one journal under a profiler and returns (profiler report, output size in bytes, load time in seconds)."""
+    profiler = Journal.JournalProfiler(trace_memory=trace_memory)
+    with contextlib.redirect_stdout(io.StringIO()):
+        path = Journal.generate_trading_journal_excel("2025-04-28", 25000, weeks, f"bench_{mode}_{weeks}w.xlsx", open_after=False,
+                                                      profiler=profiler, **MODES[mode])
+    if not path: raise RuntimeError(f"generation failed for {mode} x {weeks} weeks")
+    size = os.path.getsize(path)
+    started = time.perf_counter()
+    openpyxl.load_workbook(path).close()
+    load_seconds = time.perf_counter() - started
+    os.remove(path)
+    return profiler.report(), size, load_seconds
+
+
+def run_case(weeks, slots, mode, repeats):
+    """Best-of-repeats build, save and load time, then one traced run for the peak memory."""
+    with time_slots(slots):
+        if mode == "template": generate(weeks, mode, False) # Builds the cached template outside the measurement
+        best = fastest_load = None
+        for _ in range(repeats):
+            report, size, load_seconds = generate(weeks, mode, False)
+            save_seconds = report["phases"]["save"]["seconds"]
+            timing = (report["total_seconds"] - save_seconds, save_seconds)
+            if best is None or sum(timing) < sum(best): best = timing
+            fastest_load = load_seconds if fastest_load is None else min(fastest_load, load_seconds)
+        traced, _, _ = generate(weeks, mode, True)
+    return {
+        "weeks": weeks, "slots": slots, "mode": mode,
+        "build_seconds": best[0], "save_seconds": best[1], "peak_bytes": traced["peak_bytes"], "output_bytes": size, "load_seconds": fastest_load,
+        "phases": {name: stats["seconds"] for name, stats in report["phases"].items()},
+        "counts": report["counts"],
+    }
+
+
+def find_regressions(results, baseline, tolerance):
+    """Returns a line per measurement that grew by more than tolerance (a fraction) over the matching baseline case."""
+    previous = {(case["weeks"], case["slots"], case["mode"]): case for case in baseline["results"]}
+    regressions = []
+    for case in results:
+        old = previous.get((case["weeks"], case["slots"], case["mode"]))
+        if old is None: continue
+        for measure in MEASURES:
+            if old.get(measure) and case[measure] > old[measure] * (1 + tolerance):
+                regressions.append(f"{case['mode']} {case['weeks']}w {case['slots']} slots: {measure} "
+                                   f"{old[measure]:.4g} -> {case[measure]:.4g} (+{(case[measure] / old[measure] - 1) * 100:.0f}%)")
+    return regressions
+
+
+def int_list(text):
+    return [int(value) for value in text.split(",") if value.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark journal generation across weeks, time slots and modes.")
+    parser.add_argument("--weeks", type=int_list, default=[1, 4, 13], help="comma-separated week counts (default: 1,4,13)")
+    parser.add_argument("--slots", type=int_list, default=[len(Journal.TIME_SLOTS)], help="comma-separated time slots per day (1-12)")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"comma-separated modes out of {', '.join(MODES)}")
+    parser.add_argument("--repeats", type=int, default=3, help="timed runs per case; the best one is kept")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed growth over the baseline as a fraction (default: 0.25)")
+    args = parser.parse_args()
+
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown or not all(1 <= slots <= 12 for slots in args.slots):
+        parser.error(f"unknown mode(s) {', '.join(unknown)}" if unknown else "time slots must be between 1 and 12")
+
+    print(f"{'mode':<24} {'weeks':>5} {'slots':>5} {'build (s)':>10} {'save (s)':>9} {'peak (MiB)':>11} {'size (KiB)':>11} {'load (s)':>9} {'merges':>7} {'rules':>6}")
+    results = []
+    for slots in args.slots:
+        for weeks in args.weeks:
+            for mode in modes:
+                case = run_case(weeks, slots, mode, args.repeats)
+                results.append(case)
+                print(f"{mode:<24} {weeks:>5} {slots:>5} {case['build_seconds']:>10.3f} {case['save_seconds']:>9.3f} "
+                      f"{case['peak_bytes'] / 2 ** 20:>11.1f} {case['output_bytes'] / 1024:>11.0f} {case['load_seconds']:>9.3f} "
+                      f"{case['counts'].get('merges', '-'):>7} {case['counts'].get('formatting_rules', '-'):>6}")
+
+    run = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(), "openpyxl": openpyxl.__version__, "platform": platform.platform(),
+        "repeats": args.repeats, "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        print(f"\n{len(regressions)} regression(s) against {args.baseline} (tolerance {args.tolerance:.0%})")
+        for line in regressions: print(f"  {line}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,74 @@
+"""
+Compares styling journal data rows cell by cell (a new Alignment per cell and a
+new PatternFill per shaded row, as the generator used to do) against assigning
+the precomputed named styles from Journal._register_journal_styles().
+
+Usage: python benchmarks/bench_styles.py [rows] [repeats]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+import openpyxl
+from openpyxl.styles import Alignment, PatternFill
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Journal
+
+
+def style_rows_per_cell(ws, headers, num_rows):
+    """Old inner loop: builds and hashes fresh style objects for every cell. Returns the number of style objects created."""
+    created = 0
+    for row_num in range(2, num_rows + 2):
+        row_fill = PatternFill(start_color="F5F5F5", end_color="F5F5F5", fill_type="solid") if row_num % 2 == 0 else None
+        if row_fill: created += 1
+        for col_idx_plus_1 in range(1, len(headers) + 1):
+            cell = ws.cell(row=row_num, column=col_idx_plus_1)
+            if row_fill: cell.fill = row_fill
+            current_alignment = Alignment(horizontal='center', vertical='center'); created += 1
+            header_name_for_col = headers[col_idx_plus_1-1]
+            if header_name_for_col == "Reason / Flex / Mistakes": current_alignment.wrap_text = True
+            elif col_idx_plus_1 == 9 : current_alignment.wrap_text = True
+            elif header_name_for_col == "Plan Adherence": current_alignment.wrap_text = True
+            cell.alignment = current_alignment
+            if col_idx_plus_1 in (2, 3): cell.number_format = "HH:mm"
+    return created
+
+
+def style_rows_registry(ws, headers, num_rows):
+    """New inner loop: assigns the registered named styles by name. Returns the number of style objects created."""
+    styles = Journal._register_journal_styles(ws.parent, Journal._compile_layout(25000))
+    for row_num in range(2, num_rows + 2):
+        row_styles = styles["data_shaded"] if row_num % 2 == 0 else styles["data"]
+        for col_idx_plus_1 in range(1, len(headers) + 1):
+            ws.cell(row=row_num, column=col_idx_plus_1).style = row_styles[col_idx_plus_1 - 1]
+    return len(ws.parent.named_styles) # Created once per workbook, independent of num_rows
+
+
+def run(style_rows, num_rows, repeats):
+    headers = Journal._compile_layout(25000)["headers"]
+    best_time, peak, created = None, None, None
+    for _ in range(repeats):
+        wb = openpyxl.Workbook()
+        start = time.perf_counter()
+        created = style_rows(wb.active, headers, num_rows)
+        elapsed = time.perf_counter() - start
+        best_time = elapsed if best_time is None else min(best_time, elapsed)
+
+    wb = openpyxl.Workbook()
+    tracemalloc.start()
+    style_rows(wb.active, headers, num_rows)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best_time, peak, created
+
+
+if __name__ == "__main__":
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    print(f"Styling {num_rows} data rows x {Journal._compile_layout(25000)['num_cols']} columns (best of {repeats})")
+    print(f"{'mode':<10} {'time (s)':>10} {'peak (KiB)':>12} {'style objects':>14}")
+    for name, style_rows in (("per-cell", style_rows_per_cell), ("registry", style_rows_registry)):
+        best_time, peak, created = run(style_rows, num_rows, repeats)
+        print(f"{name:<10} {best_time:>10.3f} {peak / 1024:>12.0f} {created:>14}")
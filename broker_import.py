@@ -0,0 +1,362 @@
+import argparse
+import csv
+import itertools
+import os
+import sys
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from html.parser import HTMLParser
+
+from Journal import (DATE_LABEL_PATTERN, TIME_SLOTS, _build_journal_workbook_streaming, _compile_layout,
+                     _CachedResultsWorkbook, _load_workbook_with_plain_merges, _save_workbook, open_file_os_agnostic, sibling_journal_path)
+
+# Column names of MT4 detailed statements and MT5 position reports, lower-cased without
+# spaces. MT5 repeats "Time" and "Price" for the closing side of a position.
+HEADER_ALIASES = {
+    "opentime": "open_time", "time": "open_time", "closetime": "close_time",
+    "openprice": "open_price", "price": "open_price", "closeprice": "close_price",
+    "type": "type", "s/l": "sl", "sl": "sl", "stoploss": "sl", "t/p": "tp", "tp": "tp", "takeprofit": "tp",
+    "profit": "profit", "mfe": "mfe", "ticket": "ticket", "position": "ticket", "item": "symbol", "symbol": "symbol",
+}
+_SECOND_OCCURRENCE = {"open_time": "close_time", "open_price": "close_price"}
+_REQUIRED_FIELDS = {"open_time", "close_time", "type", "open_price", "close_price", "profit"}
+
+REPORT_FIELDS = ["ticket", "symbol", "type", "open_time", "close_time", "profit", "reason"]
+
+
+def _slot_by_minute():
+    """Maps each minute of the day to the time slot whose hour-long entry window contains it."""
+    slot_by_minute = {}
+    for slot_idx, slot_time_str in enumerate(TIME_SLOTS):
+        hour, minute = map(int, slot_time_str.split(":"))
+        for offset in range(60): slot_by_minute.setdefault(hour * 60 + minute + offset, slot_idx)
+    return slot_by_minute
+
+
+# Entry minute -> slot index, so placing a trade is a dict lookup rather than a scan of the slots
+SLOT_BY_MINUTE = _slot_by_minute()
+
+
+class _TableRowParser(HTMLParser):
+    """Collects the cell texts of every <tr> fed to it; finished rows queue up in self.rows."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = deque()
+        self._row = self._cell = None
+        self._colspan = 1
+
+    def _close_cell(self):
+        if self._cell is not None:
+            self._row.append(" ".join("".join(self._cell).split()))
+            self._row.extend([""] * (self._colspan - 1)) # Keep later cells at their header's index
+            self._cell = None
+
+    def _close_row(self):
+        if self._row is not None:
+            self._close_cell()
+            self.rows.append(self._row)
+            self._row = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "tr":
+            self._close_row()
+            self._row = []
+        elif tag in ("td", "th") and self._row is not None:
+            self._close_cell() # MT4 statements do not always close their cells
+            self._cell = []
+            colspan = dict(attrs).get("colspan") or "1"
+            self._colspan = int(colspan) if colspan.isdigit() else 1
+
+    def handle_endtag(self, tag):
+        if tag in ("td", "th"): self._close_cell()
+        elif tag in ("tr", "table"): self._close_row()
+
+    def handle_data(self, data):
+        if self._cell is not None: self._cell.append(data)
+
+
+def _open_text(filepath):
+    # MT5 writes its exports as UTF-16 with a byte order mark
+    with open(filepath, "rb") as f: head = f.read(2)
+    encoding = "utf-16" if head in (b"\xff\xfe", b"\xfe\xff") else "utf-8-sig"
+    return open(filepath, encoding=encoding, errors="replace", newline="")
+
+
+def _history_rows(filepath, chunk_size=1 << 16):
+    """Yields the cells of each row of a CSV or HTML export, reading the file in chunks."""
+    with _open_text(filepath) as f:
+        first_line = f.readline()
+        while first_line and not first_line.strip(): first_line = f.readline()
+        if first_line.lstrip()[:1] == "<":
+            parser = _TableRowParser()
+            chunk = first_line
+            while chunk:
+                parser.feed(chunk)
+                while parser.rows: yield parser.rows.popleft()
+                chunk = f.read(chunk_size)
+            parser.close()
+            parser._close_row()
+            while parser.rows: yield parser.rows.popleft()
+        else:
+            yield from csv.reader(itertools.chain([first_line], f), delimiter=max("\t;,", key=first_line.count))
+
+
+def _trade_columns(cells):
+    """Returns {field: cell index} if the row is the header of a closed-trades table, else None."""
+    columns = {}
+    for idx, cell in enumerate(cells):
+        field = HEADER_ALIASES.get("".join(cell.lower().split()))
+        if field is None: continue
+        if field in columns: field = _SECOND_OCCURRENCE.get(field)
+        if field and field not in columns: columns[field] = idx
+    return columns if _REQUIRED_FIELDS <= columns.keys() else None
+
+
+def _parse_number(text):
+    text = "".join(text.split()) # MT5 groups thousands with spaces
+    return float(text) if text else 0.0
+
+
+def _parse_time(text):
+    # "2025.04.28 18:34[:12]" (MT4/MT5) or "2025-04-28 18:34[:12]", sliced rather than
+    # strptime()d since every trade has two of them
+    text = text.strip()
+    if len(text) not in (16, 19) or text[4] not in ".-" or text[10] != " ":
+        raise ValueError(f"unrecognised time {text!r}")
+    return datetime(int(text[:4]), int(text[5:7]), int(text[8:10]), int(text[11:13]), int(text[14:16]), int(text[17:19]) if len(text) == 19 else 0)
+
+
+def read_broker_trades(filepath):
+    """
+    Streams the closed trades of an MT4/MT5-style CSV or HTML statement, one dict per
+    trade (ticket, symbol, type, open/close time and price, sl, tp, profit, mfe).
+    Only the table whose header has open and close times and prices, a type and a
+    profit column is read; balance rows, cancelled orders and other sections are skipped.
+    """
+    columns = None
+    for cells in _history_rows(filepath):
+        trade_type = cells[columns["type"]].strip().lower() if columns and len(cells) > columns["type"] else None
+        if trade_type not in ("buy", "sell"):
+            header = _trade_columns(cells)
+            if header is not None or sum(1 for cell in cells if cell.strip()) == 1: # A section title such as "Orders" ends the table
+                columns = header
+            continue
+        try:
+            yield {
+                "ticket": cells[columns["ticket"]].strip() if "ticket" in columns else "",
+                "symbol": cells[columns["symbol"]].strip() if "symbol" in columns else "",
+                "type": trade_type,
+                "open_time": _parse_time(cells[columns["open_time"]]),
+                "close_time": _parse_time(cells[columns["close_time"]]),
+                "open_price": _parse_number(cells[columns["open_price"]]),
+                "close_price": _parse_number(cells[columns["close_price"]]),
+                "sl": _parse_number(cells[columns["sl"]]) if "sl" in columns else 0.0,
+                "tp": _parse_number(cells[columns["tp"]]) if "tp" in columns else 0.0,
+                "profit": _parse_number(cells[columns["profit"]]),
+                "mfe": _parse_number(cells[columns["mfe"]]) if "mfe" in columns else 0.0,
+            }
+        except (IndexError, ValueError):
+            continue # Totals and other non-trade rows inside the table
+
+
+def trade_r_multiples(trade, risk_amount=None):
+    """
+    Returns (result R, max reward R) of a trade. R is measured against the stop loss
+    distance; without a stop loss, profit / risk_amount is used when given. Max reward
+    needs the trade's most favourable price (an "MFE" column) and is None otherwise.
+    """
+    direction = 1 if trade["type"] == "buy" else -1
+    risk_per_unit = abs(trade["open_price"] - trade["sl"]) if trade["sl"] else 0.0
+    if risk_per_unit:
+        result = direction * (trade["close_price"] - trade["open_price"]) / risk_per_unit
+        max_reward = direction * (trade["mfe"] - trade["open_price"]) / risk_per_unit if trade["mfe"] else None
+    elif risk_amount:
+        result, max_reward = trade["profit"] / risk_amount, None
+    else:
+        return None, None
+    return round(result, 2), (round(max_reward, 2) if max_reward is not None else None)
+
+
+def place_trades(trades, slot_contents=None, first_date=None, last_date=None, time_offset_hours=0, risk_amount=None, report=None):
+    """
+    Assigns each trade to the journal row of its day and entry time slot.
+
+    slot_contents(date, slot_idx) returns the (entry time, exit time) already recorded
+    on each row of a slot, None for a free row, or returns None if the journal has no
+    such day; by default every weekday has both rows free. A trade whose times are
+    already recorded in its slot is not placed again. Trades are consumed one at a
+    time; those that do not fit are written to the optional report (a csv.DictWriter
+    with REPORT_FIELDS) and only counted here.
+    Returns ({(date, slot_idx): [(row in slot, values), ...]}, Counter).
+    """
+    placements = {}
+    available = {} # (date, slot_idx) -> (rows still free, recorded times), looked up once per slot
+    counts = Counter()
+    offset = timedelta(hours=time_offset_hours)
+    for trade in trades:
+        open_time, close_time = trade["open_time"] + offset, trade["close_time"] + offset
+        day = open_time.date()
+        slot_idx = SLOT_BY_MINUTE.get(open_time.hour * 60 + open_time.minute)
+        result, max_reward = trade_r_multiples(trade, risk_amount)
+        if day.weekday() >= 5: reason = "weekend"
+        elif (first_date and day < first_date) or (last_date and day > last_date): reason = "outside journal dates"
+        elif slot_idx is None: reason = "outside time slots"
+        elif result is None: reason = "no stop loss to measure R"
+        else:
+            key = (day, slot_idx)
+            times = (open_time.time().replace(second=0, microsecond=0), close_time.time().replace(second=0, microsecond=0))
+            if key not in available:
+                rows = [None, None] if slot_contents is None else slot_contents(day, slot_idx)
+                available[key] = None if rows is None else (deque(offset for offset, row in enumerate(rows) if row is None),
+                                                            {row for row in rows if row is not None})
+            if available[key] is None: reason = "outside journal dates"
+            elif times in available[key][1]: reason = "already in journal"
+            elif not available[key][0]: reason = "slot full"
+            else: reason = None
+        if reason:
+            counts[reason] += 1
+            if report:
+                report.writerow({"ticket": trade["ticket"], "symbol": trade["symbol"], "type": trade["type"], "open_time": open_time,
+                                 "close_time": close_time, "profit": trade["profit"], "reason": reason})
+            continue
+        values = {"entry_time": times[0], "exit_time": times[1], "result": result}
+        if max_reward is not None: values["max_reward"] = max_reward
+        free_offsets, recorded_times = available[key]
+        recorded_times.add(times)
+        placements.setdefault(key, []).append((free_offsets.popleft(), values))
+        counts["placed"] += 1
+    return placements, counts
+
+
+def _open_report(report_path):
+    if not report_path: return None, None
+    report_file = open(report_path, "w", newline="", encoding="utf-8")
+    report = csv.DictWriter(report_file, fieldnames=REPORT_FIELDS)
+    report.writeheader()
+    return report_file, report
+
+
+def _print_counts(counts, report_path):
+    unfit = sum(count for reason, count in counts.items() if reason != "placed")
+    print(f"Placed {counts['placed']} trade(s); {unfit} did not fit" + (f" (listed in {report_path})" if unfit and report_path else "") + ".")
+    for reason, count in counts.most_common():
+        if reason != "placed": print(f"  {reason}: {count}")
+
+
+def import_into_journal(history_path, journal_path, output_path=None, report_path=None, time_offset_hours=0, risk_amount=None, open_after=False,
+                        cached_values=False, in_place=False):
+    """
+    Fills entry/exit time, Result (R) and Max Reward (R) of an existing journal from a
+    broker history export. Rows that already have an entry or exit time, a Result (R)
+    other than the generated 0 or a Max Reward (R) are kept, and trades already
+    recorded there are skipped, so importing a statement again is harmless.
+    Saves to output_path, or next to the journal as <name>_imported.xlsx; in_place=True
+    saves over journal_path instead. The journal goes through openpyxl, which drops
+    anything it does not support (images, charts, ...), so the original is kept by
+    default. Returns (path, counts).
+    cached_values=True saves the formulas with their results recomputed from the new trades.
+    """
+    wb = _load_workbook_with_plain_merges(journal_path)
+    ws = wb.worksheets[0]
+    layout = _compile_layout(0)
+    cols = layout["cols"]
+    first_data_row_of_day = {}
+    for row_num, (label,) in enumerate(ws.iter_rows(min_row=2, max_col=1, values_only=True), 2):
+        date_match = DATE_LABEL_PATTERN.match(label.strip()) if isinstance(label, str) else None
+        if date_match: first_data_row_of_day[datetime.strptime(date_match.group(1), "%Y-%m-%d").date()] = row_num + 1
+
+    def slot_contents(day, slot_idx):
+        if day not in first_data_row_of_day: return None
+        slot_start_row = first_data_row_of_day[day] + 2 * slot_idx
+        contents = []
+        for row_num in (slot_start_row, slot_start_row + 1):
+            entry_time, exit_time, result, max_reward = (ws.cell(row=row_num, column=cols[key]).value
+                                                         for key in ("entry_time", "exit_time", "result", "max_reward"))
+            # Result (R) is generated as 0, so only another value means the row was filled in
+            occupied = entry_time not in (None, "") or exit_time not in (None, "") or result not in (None, "", 0) or max_reward not in (None, "")
+            contents.append((entry_time, exit_time) if occupied else None)
+        return contents
+
+    report_file, report = _open_report(report_path)
+    try:
+        placements, counts = place_trades(read_broker_trades(history_path), slot_contents, time_offset_hours=time_offset_hours,
+                                          risk_amount=risk_amount, report=report)
+    finally:
+        if report_file: report_file.close()
+    for (day, slot_idx), rows in placements.items():
+        for offset, values in rows:
+            for key, value in values.items():
+                ws.cell(row=first_data_row_of_day[day] + 2 * slot_idx + offset, column=cols[key]).value = value
+
+    output_path = output_path or (journal_path if in_place else sibling_journal_path(journal_path, "imported"))
+    (_CachedResultsWorkbook(wb) if cached_values else wb).save(output_path)
+    _print_counts(counts, report_path)
+    print(f"Updated journal:\n{os.path.abspath(output_path)}")
+    if open_after: open_file_os_agnostic(output_path)
+    return output_path, counts
+
+
+def import_to_new_journal(history_path, initial_capital, filename=None, start_date=None, num_weeks=None, report_path=None,
+                          time_offset_hours=0, risk_amount=None, open_after=False, cached_values=False):
+    """
+    Generates a new journal through the streaming builder with the trades of a broker
+    history export already filled in. Without start_date the journal starts on the
+    Monday of the first placed trade; without num_weeks it runs through the last one.
+    cached_values=True saves the formulas with their computed results. Returns (path, counts).
+    """
+    last_date = start_date + timedelta(weeks=num_weeks) - timedelta(days=1) if start_date and num_weeks else None
+    report_file, report = _open_report(report_path)
+    try:
+        placements, counts = place_trades(read_broker_trades(history_path), first_date=start_date, last_date=last_date,
+                                          time_offset_hours=time_offset_hours, risk_amount=risk_amount, report=report)
+    finally:
+        if report_file: report_file.close()
+    if not placements and not (start_date and num_weeks):
+        _print_counts(counts, report_path)
+        print("No trades fit the journal's time slots, so no journal was generated.")
+        return None, counts
+
+    placed_days = [day for day, _ in placements]
+    if start_date is None:
+        start_date = min(placed_days) - timedelta(days=min(placed_days).weekday())
+    if num_weeks is None: # Week k of the journal covers the calendar days start_date + 7k .. + 7k + 6
+        num_weeks = (max(placed_days) - start_date).days // 7 + 1
+    filled_values = {key: [values for _, values in sorted(rows, key=lambda row: row[0])] for key, rows in placements.items()}
+
+    layout = _compile_layout(initial_capital)
+    wb = _build_journal_workbook_streaming(layout, start_date, initial_capital, num_weeks, True, filled_values)
+    filename = filename or f"trading_journal_import_{start_date:%Y-%m-%d}_to_{start_date + timedelta(weeks=num_weeks):%Y-%m-%d}.xlsx"
+    _print_counts(counts, report_path)
+    return _save_workbook(_CachedResultsWorkbook(wb) if cached_values else wb, filename, open_after), counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import closed trades from an MT4/MT5-style CSV or HTML statement into a trading journal.")
+    parser.add_argument("history", help="broker statement or history export (.csv, .htm, .html)")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--journal", help="existing journal to fill in (saved as <name>_imported.xlsx unless --output or --in-place is given)")
+    target.add_argument("--capital", type=float, help="initial capital of a new journal generated from the history")
+    parser.add_argument("--start", help="start date of the new journal, YYYY-MM-DD (default: Monday of the first trade)")
+    parser.add_argument("--weeks", type=int, help="number of weeks of the new journal (default: through the last trade)")
+    parser.add_argument("--output", help="output file name")
+    parser.add_argument("--in-place", action="store_true", help="with --journal, save over the journal itself")
+    parser.add_argument("--report", help="CSV file listing the trades that did not fit the journal")
+    parser.add_argument("--offset", type=float, default=0, help="hours added to broker server times to get journal times")
+    parser.add_argument("--risk-amount", type=float, help="account currency risked per trade, used for trades without a stop loss")
+    parser.add_argument("--cached-values", action="store_true", help="save formulas with their computed results")
+    parser.add_argument("--no-open", action="store_true", help="do not open the resulting file")
+    args = parser.parse_args()
+
+    try:
+        if args.journal:
+            import_into_journal(args.history, args.journal, args.output, args.report, args.offset, args.risk_amount, not args.no_open,
+                                args.cached_values, args.in_place)
+        else:
+            start_date = datetime.strptime(args.start, "%Y-%m-%d").date() if args.start else None
+            path, _ = import_to_new_journal(args.history, args.capital, args.output, start_date, args.weeks, args.report,
+                                            args.offset, args.risk_amount, not args.no_open, args.cached_values)
+            if path is None: sys.exit(1)
+    except (OSError, ValueError) as e:
+        print(f"Input Error: {e}")
+        sys.exit(1)
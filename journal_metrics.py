@@ -0,0 +1,202 @@
+import numpy as np
+import openpyxl
+from openpyxl.utils import column_index_from_string
+from datetime import datetime
+import sys
+
+from Journal import DATE_LABEL_PATTERN, FIRST_BALANCE_CAPITAL_PATTERN, WEEK_LABEL_PATTERN, _compile_layout
+
+# Each time slot spans two data rows; Risk (%) is merged across them and lives in the first
+ROWS_PER_SLOT = 2
+
+# Column letters of the generated journal, resolved from the same schema the generator uses
+JOURNAL_LETTERS = _compile_layout(0)["letters"]
+
+PERIOD_FIELDS = [
+    ("period", "U10"), ("start", "datetime64[D]"), ("end", "datetime64[D]"),
+    ("trades", "i8"), ("wins", "i8"), ("losses", "i8"), ("result", "f8"), ("max_reward", "f8"),
+    ("cum_result", "f8"), ("cum_max_reward", "f8"), ("balance", "f8"), ("max_reward_balance", "f8"),
+    ("min_balance", "f8"), ("max_balance", "f8"), ("drawdown", "f8"),
+]
+# Running metrics whose period value is the one on the period's last data row, as in the summary rows
+_RUNNING_FIELDS = ["cum_result", "cum_max_reward", "balance", "max_reward_balance", "min_balance", "max_balance", "drawdown"]
+
+
+def _number(value):
+    """Converts a cell value to a float the way Excel arithmetic does: blanks and text count as 0."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool): return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def read_journal_rows(filepath):
+    """
+    Reads the data rows of a filled-in journal, skipping the header, date and summary
+    rows. Returns a dict of NumPy arrays with one entry per data row (row, date, day,
+    week, result, max_reward, slot_risk) plus the initial_capital found in the
+    balance formula of the first data row (None if the formula was overwritten).
+    """
+    col = {key: column_index_from_string(JOURNAL_LETTERS[key]) - 1 for key in ("time_slot", "risk", "max_reward", "result", "balance")}
+    wb = openpyxl.load_workbook(filepath, read_only=True)
+    try:
+        ws = wb.worksheets[0]
+        rows, dates, days, results, max_rewards, slot_risks = [], [], [], [], [], []
+        initial_capital = None
+        week_of_day = [] # Week number of each day, filled in when the day's "Week N" row is reached
+        day_date, row_in_day, slot_risk = None, 0, 0.0
+        for row_num, row in enumerate(ws.iter_rows(min_row=2, max_col=col["balance"] + 1, values_only=True), 2):
+            label = row[col["time_slot"]]
+            label = label.strip() if isinstance(label, str) else label
+            date_match = DATE_LABEL_PATTERN.match(label) if isinstance(label, str) else None
+            if date_match:
+                day_date, row_in_day = date_match.group(1), 0
+                week_of_day.append(None)
+                continue
+            if label == "Daily Summary" or label == "Monthly Summary":
+                day_date = None
+                continue
+            week_match = WEEK_LABEL_PATTERN.match(label) if isinstance(label, str) else None
+            if week_match:
+                week_of_day = [int(week_match.group(1)) if week is None else week for week in week_of_day]
+                continue
+            if day_date is None: continue # Anything outside a day block is not a data row
+
+            if row_in_day % ROWS_PER_SLOT == 0: slot_risk = _number(row[col["risk"]])
+            if initial_capital is None and isinstance(row[col["balance"]], str):
+                capital_match = FIRST_BALANCE_CAPITAL_PATTERN.match(row[col["balance"]])
+                if capital_match: initial_capital = float(capital_match.group(1))
+            rows.append(row_num)
+            dates.append(day_date)
+            days.append(len(week_of_day) - 1)
+            results.append(_number(row[col["result"]]))
+            max_rewards.append(_number(row[col["max_reward"]]))
+            slot_risks.append(slot_risk)
+            row_in_day += 1
+    finally:
+        wb.close()
+
+    # Days after the last "Week N" row belong to the week that follows it
+    last_week = max([week for week in week_of_day if week is not None], default=0)
+    week_of_day = [last_week + 1 if week is None else week for week in week_of_day]
+    days = np.array(days, dtype=np.int64)
+    return {
+        "row": np.array(rows, dtype=np.int64),
+        "date": np.array(dates, dtype="datetime64[D]"),
+        "day": days,
+        "week": np.array(week_of_day, dtype=np.int64)[days] if len(days) else np.zeros(0, dtype=np.int64),
+        "result": np.array(results, dtype=np.float64),
+        "max_reward": np.array(max_rewards, dtype=np.float64),
+        "slot_risk": np.array(slot_risks, dtype=np.float64),
+        "initial_capital": initial_capital,
+    }
+
+
+def compute_metrics(result, max_reward, slot_risk, initial_capital, brought_forward=None):
+    """
+    Computes the running columns U-AA for a sequence of data rows, matching the
+    journal formulas: every non-zero result moves the balance by
+    result * capital * risk / 100, where risk is the row's time slot risk (P), and
+    min/max balance and the drawdown follow the balance. The first row starts from
+    the capital, or chains from brought_forward, a dict of the running values
+    (cum_result through max_balance) of the row before it. Returns a dict of arrays.
+    """
+    result = np.asarray(result, dtype=np.float64)
+    max_reward = np.asarray(max_reward, dtype=np.float64)
+    slot_risk = np.asarray(slot_risk, dtype=np.float64)
+    start = brought_forward or {}
+
+    def running_balance(values, key):
+        # Multiplied and accumulated in the formulas' order of operations, so the results match Excel's exactly
+        moves = values * initial_capital * slot_risk / 100
+        if key in start: return np.cumsum(np.concatenate(([start[key]], moves)))[1:]
+        if len(values) and values[0] != 0: # The first row's formula scales the capital instead of adding to it
+            return np.cumsum(np.concatenate(([initial_capital * (1 + values[0] * slot_risk[0] / 100)], moves[1:])))
+        return np.cumsum(np.concatenate(([initial_capital], moves)))[1:]
+
+    balance = running_balance(result, "balance")
+    max_reward_balance = running_balance(max_reward, "max_reward_balance")
+    min_balance = np.minimum.accumulate(np.concatenate(([start.get("min_balance", np.inf)], balance)))[1:]
+    max_balance = np.maximum.accumulate(np.concatenate(([start.get("max_balance", -np.inf)], balance)))[1:]
+    drawdown = np.where(min_balance == initial_capital, 0.0, (min_balance - initial_capital) / initial_capital * 100)
+    return {
+        "cum_result": np.cumsum(np.concatenate(([start.get("cum_result", 0.0)], result)))[1:],
+        "cum_max_reward": np.cumsum(np.concatenate(([start.get("cum_max_reward", 0.0)], max_reward)))[1:],
+        "balance": balance,
+        "max_reward_balance": max_reward_balance,
+        "min_balance": min_balance,
+        "max_balance": max_balance,
+        "drawdown": drawdown,
+    }
+
+
+def _period_table(rows, metrics, period_of_row, labels):
+    """Aggregates consecutive data rows that share a period id into one PERIOD_FIELDS record per period."""
+    table = np.zeros(len(labels), dtype=PERIOD_FIELDS)
+    if not len(period_of_row): return table
+    starts = np.flatnonzero(np.r_[True, period_of_row[1:] != period_of_row[:-1]])
+    ends = np.r_[starts[1:], len(period_of_row)] - 1
+    result = rows["result"]
+    table["period"] = labels
+    table["start"] = rows["date"][starts]
+    table["end"] = rows["date"][ends]
+    table["trades"] = np.add.reduceat((result != 0).astype(np.int64), starts)
+    table["wins"] = np.add.reduceat((result > 0).astype(np.int64), starts)
+    table["losses"] = np.add.reduceat((result < 0).astype(np.int64), starts)
+    table["result"] = np.add.reduceat(result, starts)
+    table["max_reward"] = np.add.reduceat(rows["max_reward"], starts)
+    for field in _RUNNING_FIELDS: table[field] = metrics[field][ends]
+    return table
+
+
+def journal_metrics(filepath, initial_capital=None):
+    """
+    Reads a filled-in journal and returns its metrics without relying on Excel
+    having recalculated the file:
+      rows    -- the data rows from read_journal_rows() plus the U-AA columns
+      daily   -- one PERIOD_FIELDS record per journal day
+      weekly  -- one record per "Week N" block of the journal
+      monthly -- one record per calendar month
+    initial_capital defaults to the capital found in the journal's formulas.
+    """
+    rows = read_journal_rows(filepath)
+    if initial_capital is None: initial_capital = rows["initial_capital"]
+    if initial_capital is None:
+        raise ValueError(f"{filepath}: initial capital not found in the balance formulas, pass initial_capital.")
+    metrics = compute_metrics(rows["result"], rows["max_reward"], rows["slot_risk"], initial_capital)
+
+    def labels(period_of_row, label_of_row):
+        first_rows = np.flatnonzero(np.r_[True, period_of_row[1:] != period_of_row[:-1]]) if len(period_of_row) else []
+        return [label_of_row(i) for i in first_rows]
+
+    months = rows["date"].astype("datetime64[M]")
+    return {
+        "initial_capital": initial_capital,
+        "rows": dict(rows, **metrics),
+        "daily": _period_table(rows, metrics, rows["day"], labels(rows["day"], lambda i: str(rows["date"][i]))),
+        "weekly": _period_table(rows, metrics, rows["week"], labels(rows["week"], lambda i: f"Week {rows['week'][i]}")),
+        "monthly": _period_table(rows, metrics, months, labels(months, lambda i: str(months[i]))),
+    }
+
+
+def format_period_table(table):
+    """Formats a daily, weekly or monthly table as aligned text."""
+    lines = [f"{'period':<10} {'trades':>6} {'wins':>5} {'losses':>6} {'result':>8} {'cum R':>8} {'balance':>12} {'min bal':>12} {'max bal':>12} {'DD %':>7}"]
+    for record in table:
+        lines.append(f"{record['period']:<10} {record['trades']:>6} {record['wins']:>5} {record['losses']:>6} {record['result']:>8.2f} "
+                     f"{record['cum_result']:>8.2f} {record['balance']:>12.2f} {record['min_balance']:>12.2f} "
+                     f"{record['max_balance']:>12.2f} {record['drawdown']:>7.2f}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python journal_metrics.py <journal.xlsx>")
+        sys.exit(1)
+    started = datetime.now()
+    report = journal_metrics(sys.argv[1])
+    for name in ("daily", "weekly", "monthly"):
+        print(f"\n{name.capitalize()} ({len(report[name])})")
+        print(format_period_table(report[name]))
+    print(f"\n{len(report['rows']['row'])} data rows in {(datetime.now() - started).total_seconds():.3f}s")
@@ -0,0 +1,217 @@
+import argparse
+import glob
+import hashlib
+import html
+import json
+import os
+import re
+import sys
+import time
+import zipfile
+from datetime import datetime
+
+import numpy as np
+
+from Journal import DATE_LABEL_PATTERN, FIRST_BALANCE_CAPITAL_PATTERN, _compile_layout
+from journal_metrics import ROWS_PER_SLOT, _number, compute_metrics
+
+JOURNAL_LETTERS = _compile_layout(0)["letters"]
+
+_A_CELL = re.compile(r'<c r="A(\d+)"([^>]*?)(?:/>|>(.*?)</c>)', re.S)
+_ROW = re.compile(r'<row\b[^>]*?(?:/>|>(.*?)</row>)', re.S)
+_CELL = re.compile(r'<c r="([A-Z]+)\d+"([^>]*?)(?:/>|>(.*?)</c>)', re.S)
+_TEXT = re.compile(r'<t\b[^>]*>(.*?)</t>', re.S)
+_VALUE = re.compile(r'<v>(.*?)</v>', re.S)
+_FORMULA = re.compile(r'<f\b[^>]*>(.*?)</f>', re.S)
+_SHARED_STRING = re.compile(r'<si>(.*?)</si>', re.S)
+_SHARED_STRING_REF = re.compile(r't="s"[^>]*><v>(\d+)</v>')
+# Excel rewrites the cached results of every formula after an edit (the balance chain runs
+# through all later days), so they are left out of the day fingerprints
+_CACHED_FORMULA_VALUE = re.compile(r'(<f\b[^>]*(?:/>|>[^<]*</f>))<v>[^<]*</v>|(<f\b[^>]*(?:/>|>[^<]*</f>))<v\s*/>')
+
+
+def _sheet_parts(filepath):
+    """Returns the first worksheet's XML and the shared strings XML ("" if the file has none)."""
+    with zipfile.ZipFile(filepath) as archive:
+        names = archive.namelist()
+        sheets = sorted((name for name in names if re.fullmatch(r"xl/worksheets/sheet\d+\.xml", name)),
+                        key=lambda name: int(re.search(r"(\d+)\.xml$", name).group(1)))
+        if not sheets: raise ValueError(f"{filepath}: no worksheet found.")
+        strings = archive.read("xl/sharedStrings.xml").decode("utf-8") if "xl/sharedStrings.xml" in names else ""
+        return archive.read(sheets[0]).decode("utf-8"), strings
+
+
+def _cell_value(attrs, inner, strings):
+    """Decodes a cell's value from its attributes and inner XML (formula cells yield their cached result)."""
+    if not inner: return None
+    if 't="inlineStr"' in attrs: return html.unescape("".join(_TEXT.findall(inner)))
+    value = _VALUE.search(inner)
+    if value is None: return None
+    if 't="s"' in attrs: return strings[int(value.group(1))]
+    if 't="str"' in attrs or 't="e"' in attrs: return html.unescape(value.group(1))
+    return value.group(1)
+
+
+def _parse_day(block, strings):
+    """Parses a day's data rows into the lists the snapshot is built from, plus the capital found in a balance formula."""
+    day = {"result": [], "max_reward": [], "slot_risk": [], "adherence": [], "capital": None}
+    slot_risk = 0.0
+    for row_in_day, row in enumerate(_ROW.finditer(block)):
+        cells = {letter: (attrs, inner) for letter, attrs, inner in _CELL.findall(row.group(1) or "")}
+        value = lambda key: _cell_value(*cells[JOURNAL_LETTERS[key]], strings) if JOURNAL_LETTERS[key] in cells else None
+        if row_in_day % ROWS_PER_SLOT == 0: slot_risk = _number(value("risk"))
+        day["result"].append(_number(value("result")))
+        day["max_reward"].append(_number(value("max_reward")))
+        day["slot_risk"].append(slot_risk)
+        adherence = value("plan_adherence")
+        day["adherence"].append(adherence.strip() if isinstance(adherence, str) else "")
+        if day["capital"] is None and JOURNAL_LETTERS["balance"] in cells:
+            formula = _FORMULA.search(cells[JOURNAL_LETTERS["balance"]][1] or "")
+            capital_match = FIRST_BALANCE_CAPITAL_PATTERN.match("=" + html.unescape(formula.group(1))) if formula else None
+            if capital_match: day["capital"] = float(capital_match.group(1))
+    return day
+
+
+class JournalWatcher:
+    """
+    Keeps a metrics snapshot of a journal up to date as the file is saved. Each refresh
+    splits the sheet XML into day blocks at the date rows and "Daily Summary" rows,
+    fingerprints each block's input cells, and re-parses only the days whose
+    fingerprint changed; the running metrics are then recomputed from the cached days.
+    """
+
+    def __init__(self, filepath, initial_capital=None):
+        self.filepath = filepath
+        self.initial_capital = initial_capital
+        self.snapshot = None
+        self._file_state = None
+        self._strings_xml, self._strings = None, []
+        self._days = {} # date -> (fingerprint, parsed day)
+
+    def refresh(self, force=False):
+        """Re-reads the journal if it changed on disk. Returns the number of days re-parsed, or None if nothing changed."""
+        stat = os.stat(self.filepath)
+        file_state = (stat.st_mtime_ns, stat.st_size)
+        if not force and file_state == self._file_state: return None
+        started = time.perf_counter()
+        sheet_xml, strings_xml = _sheet_parts(self.filepath)
+        if strings_xml != self._strings_xml:
+            self._strings_xml = strings_xml
+            self._strings = [html.unescape("".join(_TEXT.findall(item))) for item in _SHARED_STRING.findall(strings_xml)]
+
+        days, parsed = {}, 0
+        day_date, block_start = None, None
+        for cell in _A_CELL.finditer(sheet_xml):
+            label = _cell_value(cell.group(2), cell.group(3), self._strings)
+            label = label.strip() if isinstance(label, str) else label
+            date_match = DATE_LABEL_PATTERN.match(label) if isinstance(label, str) else None
+            if date_match:
+                day_date, block_start = date_match.group(1), sheet_xml.index("</row>", cell.end()) + len("</row>")
+            elif label == "Daily Summary" and day_date is not None:
+                block = sheet_xml[block_start:sheet_xml.rindex("<row", 0, cell.start())]
+                referenced = "\0".join(self._strings[int(ref)] for ref in _SHARED_STRING_REF.findall(block))
+                fingerprint = hashlib.blake2b((_CACHED_FORMULA_VALUE.sub(r"\1\2", block) + "\0" + referenced).encode("utf-8"),
+                                              digest_size=16).digest()
+                cached = self._days.get(day_date)
+                if cached is None or cached[0] != fingerprint:
+                    cached = (fingerprint, _parse_day(block, self._strings))
+                    parsed += 1
+                days[day_date] = cached
+                day_date = None
+        self._days = days
+        self._file_state = file_state
+        self.snapshot = self._build_snapshot()
+        self.snapshot.update(days_parsed=parsed, refresh_seconds=time.perf_counter() - started)
+        return parsed
+
+    def _build_snapshot(self):
+        day_dates = sorted(self._days)
+        parsed_days = [self._days[day_date][1] for day_date in day_dates]
+        initial_capital = self.initial_capital
+        if initial_capital is None: initial_capital = next((day["capital"] for day in parsed_days if day["capital"] is not None), None)
+        if initial_capital is None:
+            raise ValueError(f"{self.filepath}: initial capital not found in the balance formulas, pass initial_capital.")
+        column = lambda key: np.array([value for day in parsed_days for value in day[key]], dtype=np.float64)
+        result = column("result")
+        metrics = compute_metrics(result, column("max_reward"), column("slot_risk"), initial_capital)
+        adherence = np.array([value for day in parsed_days for value in day["adherence"]], dtype=object)
+        traded = result != 0
+
+        adherence_stats = {}
+        for label in sorted(set(adherence[traded])):
+            selected = traded & (adherence == label)
+            adherence_stats[label or "(blank)"] = {
+                "trades": int(selected.sum()), "wins": int((result[selected] > 0).sum()),
+                "win_rate": float((result[selected] > 0).mean() * 100), "total_r": float(result[selected].sum()),
+            }
+        balance = metrics["balance"]
+        return {
+            "journal": os.path.abspath(self.filepath),
+            "updated": datetime.now().isoformat(timespec="seconds"),
+            "initial_capital": initial_capital,
+            "days": len(day_dates),
+            "trades": int(traded.sum()),
+            "wins": int((result > 0).sum()),
+            "losses": int((result < 0).sum()),
+            "win_rate": float((result[traded] > 0).mean() * 100) if traded.any() else 0.0,
+            "total_r": float(result.sum()),
+            "balance": float(balance[-1]) if len(balance) else float(initial_capital),
+            "max_balance": float(metrics["max_balance"][-1]) if len(balance) else float(initial_capital),
+            "drawdown": float(metrics["drawdown"][-1]) if len(balance) else 0.0,
+            "equity": [(day_date, float(balance[end - 1]))
+                       for day_date, end in zip(day_dates, np.cumsum([len(day["result"]) for day in parsed_days])) if end],
+            "adherence": adherence_stats,
+        }
+
+    def watch(self, interval=1.0, on_update=None):
+        """Polls the journal every interval seconds and calls on_update(snapshot) after each refresh, until interrupted."""
+        while True:
+            try:
+                if self.refresh() is not None and on_update: on_update(self.snapshot)
+            except (zipfile.BadZipFile, KeyError, OSError):
+                self._file_state = None # Caught the file mid-save; read it again on the next tick
+            time.sleep(interval)
+
+
+def format_snapshot(snapshot):
+    """Formats a snapshot as a short text summary."""
+    lines = [f"[{snapshot['updated']}] {snapshot['days_parsed']} of {snapshot['days']} day(s) re-parsed in {snapshot['refresh_seconds']:.3f}s",
+             f"  trades {snapshot['trades']}  wins {snapshot['wins']}  losses {snapshot['losses']}  win rate {snapshot['win_rate']:.1f}%  "
+             f"total R {snapshot['total_r']:.2f}",
+             f"  balance {snapshot['balance']:.2f}  max balance {snapshot['max_balance']:.2f}  drawdown {snapshot['drawdown']:.2f}%"]
+    for label, stats in snapshot["adherence"].items():
+        lines.append(f"  {label}: {stats['trades']} trade(s), win rate {stats['win_rate']:.1f}%, total R {stats['total_r']:.2f}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch a journal and refresh its metrics each time it is saved.")
+    parser.add_argument("journal", nargs="?", help="journal to watch (default: the most recently saved journal in output/)")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between checks for a new save")
+    parser.add_argument("--summary", help="also write each snapshot to this JSON file")
+    parser.add_argument("--capital", type=float, help="initial capital, if the balance formulas were overwritten")
+    args = parser.parse_args()
+
+    journal = args.journal
+    if journal is None:
+        journals = glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "output", "*.xlsx"))
+        journals = [path for path in journals if not os.path.basename(path).startswith("~$")]
+        if not journals:
+            print("Input Error: no journal found in output/.")
+            sys.exit(1)
+        journal = max(journals, key=os.path.getmtime)
+
+    def report(snapshot):
+        print(format_snapshot(snapshot))
+        if args.summary:
+            with open(args.summary, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, indent=2)
+
+    print(f"Watching {journal} (Ctrl+C to stop)")
+    try:
+        JournalWatcher(journal, args.capital).watch(args.interval, report)
+    except ValueError as e:
+        print(f"Input Error: {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,145 @@
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from journal_metrics import read_journal_rows
+
+PERCENTILES = [5, 25, 50, 75, 95]
+METHODS = ("bootstrap", "shuffle")
+# Equity, running peak and the sampled indices of a chunk stay around this many array elements each
+_CHUNK_ELEMENTS = 4_000_000
+
+
+def journal_trades(filepath, initial_capital=None):
+    """
+    Reads the recorded trades of a journal: the non-zero Result (R) values with the Risk (%)
+    of their time slot. Returns (result, risk, initial_capital).
+    """
+    rows = read_journal_rows(filepath)
+    if initial_capital is None: initial_capital = rows["initial_capital"]
+    if initial_capital is None:
+        raise ValueError(f"{filepath}: initial capital not found in the balance formulas, pass initial_capital.")
+    traded = rows["result"] != 0
+    return rows["result"][traded], rows["slot_risk"][traded], initial_capital
+
+
+def _simulate_chunk(steps, initial_capital, num_paths, num_trades, method, checkpoints, ruin_balance, seed):
+    """
+    Simulates num_paths trade sequences drawn from the per-trade balance steps. Returns the
+    balance at each checkpoint, the final balance, both drawdown measures and ruin flags.
+    """
+    rng = np.random.default_rng(seed)
+    if method == "bootstrap":
+        picks = rng.integers(0, len(steps), size=(num_paths, num_trades))
+    else: # Reorders the recorded trades; longer runs repeat the whole set
+        picks = rng.permuted(np.broadcast_to(np.resize(np.arange(len(steps)), num_trades), (num_paths, num_trades)), axis=1)
+    # Same rule as the Balance (W) formula: each trade adds result * capital * risk / 100 to the previous balance
+    balance = np.take(steps, picks)
+    del picks
+    np.cumsum(balance, axis=1, out=balance)
+    balance += initial_capital
+
+    lowest = np.minimum(balance.min(axis=1), initial_capital)
+    peak = np.maximum.accumulate(balance, axis=1)
+    np.maximum(peak, initial_capital, out=peak)
+    # Peak-to-trough drawdown as a percentage of the peak (<= 0)
+    np.divide(balance, peak, out=peak)
+    peak_drawdown = (peak.min(axis=1) - 1) * 100
+    return {
+        "checkpoints": balance[:, checkpoints - 1],
+        "final": balance[:, -1].copy(),
+        # Min Lows % Drawdown (AA): the lowest balance relative to the initial capital (<= 0)
+        "low_drawdown": (lowest - initial_capital) / initial_capital * 100,
+        "peak_drawdown": peak_drawdown,
+        "ruined": lowest <= ruin_balance,
+    }
+
+
+def simulate(result, risk, initial_capital, num_paths=10_000, num_trades=None, method="bootstrap", ruin_loss_pct=50.0,
+             num_checkpoints=100, seed=None, max_workers=1):
+    """
+    Monte Carlo simulation of equity curves from a recorded trade series.
+    method is "bootstrap" (draw trades with replacement) or "shuffle" (reorder the recorded
+    trades). Paths are simulated in chunks that bound memory; max_workers > 1 spreads the
+    chunks over a process pool. A path is ruined once its balance falls to
+    ruin_loss_pct % below the initial capital. Returns a dict with the trade numbers of
+    the equity checkpoints, percentile equity curves and final balances, the drawdown
+    distributions (Min Lows and peak-to-trough, in %), the risk of ruin and the
+    probability of finishing below the initial capital.
+    """
+    result, risk = np.asarray(result, dtype=np.float64), np.asarray(risk, dtype=np.float64)
+    if len(result) == 0: raise ValueError("No trades to simulate: every Result (R) is empty or zero.")
+    if method not in METHODS: raise ValueError(f"Unknown method {method!r}; use one of {', '.join(METHODS)}.")
+    num_trades = num_trades or len(result)
+    steps = result * initial_capital * risk / 100
+    checkpoints = np.unique(np.linspace(1, num_trades, min(num_checkpoints, num_trades)).round().astype(np.int64))
+    ruin_balance = initial_capital * (1 - ruin_loss_pct / 100)
+
+    chunk_paths = max(1, min(num_paths, _CHUNK_ELEMENTS // num_trades))
+    chunk_sizes = [min(chunk_paths, num_paths - start) for start in range(0, num_paths, chunk_paths)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    jobs = [(steps, initial_capital, size, num_trades, method, checkpoints, ruin_balance, chunk_seed)
+            for size, chunk_seed in zip(chunk_sizes, seeds)]
+    if max_workers and max_workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            chunks = list(pool.map(_simulate_chunk, *zip(*jobs)))
+    else:
+        chunks = [_simulate_chunk(*job) for job in jobs]
+    combined = {key: np.concatenate([chunk[key] for chunk in chunks]) for key in chunks[0]}
+
+    return {
+        "paths": num_paths,
+        "trades": num_trades,
+        "method": method,
+        "initial_capital": initial_capital,
+        "percentiles": PERCENTILES,
+        "checkpoints": checkpoints,
+        "equity": np.percentile(combined["checkpoints"], PERCENTILES, axis=0),
+        "final_balance": np.percentile(combined["final"], PERCENTILES),
+        "low_drawdown": np.percentile(combined["low_drawdown"], PERCENTILES),
+        "peak_drawdown": np.percentile(combined["peak_drawdown"], PERCENTILES),
+        "risk_of_ruin": float(combined["ruined"].mean()),
+        "losing_probability": float((combined["final"] < initial_capital).mean()),
+    }
+
+
+def format_simulation(report):
+    """Formats a simulate() report as text."""
+    header = "".join(f"{f'p{p}':>12}" for p in report["percentiles"])
+    lines = [f"{report['paths']} paths x {report['trades']} trades ({report['method']}), initial capital {report['initial_capital']:.2f}",
+             f"{'':<26}{header}",
+             f"{'Final balance':<26}" + "".join(f"{value:>12.2f}" for value in report["final_balance"]),
+             f"{'Min Lows % Drawdown':<26}" + "".join(f"{value:>12.2f}" for value in report["low_drawdown"]),
+             f"{'Peak-to-trough DD %':<26}" + "".join(f"{value:>12.2f}" for value in report["peak_drawdown"]),
+             "", "Equity percentiles by trade number"]
+    shown = np.unique(np.linspace(0, len(report["checkpoints"]) - 1, min(11, len(report["checkpoints"]))).round().astype(np.int64))
+    for i in shown:
+        lines.append(f"{'Trade ' + str(report['checkpoints'][i]):<26}" + "".join(f"{value:>12.2f}" for value in report["equity"][:, i]))
+    lines += ["", f"Risk of ruin: {report['risk_of_ruin'] * 100:.2f}%", f"Finishing below the initial capital: {report['losing_probability'] * 100:.2f}%"]
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo equity and drawdown distribution from a journal's recorded trades.")
+    parser.add_argument("journal")
+    parser.add_argument("--paths", type=int, default=10_000, help="number of simulated trade sequences")
+    parser.add_argument("--trades", type=int, help="trades per sequence (default: the number recorded)")
+    parser.add_argument("--method", choices=METHODS, default="bootstrap")
+    parser.add_argument("--ruin", type=float, default=50.0, help="loss of initial capital (%%) that counts as ruin")
+    parser.add_argument("--capital", type=float, help="initial capital, if the balance formulas were overwritten")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes for the simulation chunks")
+    args = parser.parse_args()
+
+    try:
+        started = datetime.now()
+        result, risk, capital = journal_trades(args.journal, args.capital)
+        report = simulate(result, risk, capital, args.paths, args.trades, args.method, args.ruin, seed=args.seed, max_workers=args.jobs)
+    except (OSError, ValueError) as e:
+        print(f"Input Error: {e}")
+        sys.exit(1)
+    print(format_simulation(report))
+    print(f"\n{len(result)} recorded trades, simulated in {(datetime.now() - started).total_seconds():.2f}s")
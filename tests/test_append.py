@@ -0,0 +1,78 @@
+"""Appended weeks continue the journal, and only extend its dropdowns and formatting rules."""
+from datetime import date
+
+import openpyxl
+import pytest
+
+import Journal
+
+# Two weeks end with the Monthly Summary in row 104, after the last data row 101
+LAST_DATA_ROW, MONTHLY_SUMMARY_ROW = 101, 104
+FIRST_NEW_DATA_ROW = MONTHLY_SUMMARY_ROW + 2
+
+
+def two_week_journal(tmp_path, compact=False):
+    layout = Journal._compile_layout(25000, compact)
+    wb = Journal._build_journal_workbook_streaming(layout, date(2025, 4, 28), 25000, 2, consolidated_formatting=True)
+    path = tmp_path / "journal.xlsx"
+    wb.save(path)
+    return layout, path
+
+
+def rule_refs(ws):
+    return {str(cf.sqref): len(cf.rules) for cf in ws.conditional_formatting}
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_appended_weeks_continue_the_journal(tmp_path, compact):
+    layout, path = two_week_journal(tmp_path, compact)
+    original = path.read_bytes()
+    L = layout["letters"]
+
+    appended = Journal.append_weeks_to_journal(str(path), 2, open_after=False)
+    assert appended == str(tmp_path / "journal_extended.xlsx")
+    assert path.read_bytes() == original # Written next to the journal unless in_place=True
+
+    ws = openpyxl.load_workbook(appended).worksheets[0]
+    assert ws[f"A{MONTHLY_SUMMARY_ROW + 1}"].value == "Monday 2025-05-12"
+    assert ws[f"A{MONTHLY_SUMMARY_ROW + 1}"].style == ("Journal Date Span" if compact else "Journal Date")
+    assert ws[f"{L['cum_result']}{FIRST_NEW_DATA_ROW}"].value.startswith(f"={L['cum_result']}{LAST_DATA_ROW}+")
+    assert ws[f"{L['entry_time']}{FIRST_NEW_DATA_ROW}"].number_format == "HH:mm"
+    assert any(str(label).startswith("Week 3 (") for (label,) in ws.iter_rows(min_row=MONTHLY_SUMMARY_ROW, max_col=1, values_only=True))
+    assert ws.cell(row=ws.max_row, column=1).value == "Monthly Summary"
+    assert bool(ws.merged_cells.ranges) != compact
+
+    entry_validation = next(dv for dv in ws.data_validations.dataValidation if f"{L['status']}3" in dv.sqref)
+    assert f"{L['status']}{FIRST_NEW_DATA_ROW}" in entry_validation.sqref
+
+
+def test_rules_are_extended_not_added(tmp_path):
+    layout, path = two_week_journal(tmp_path)
+    rules = rule_refs(openpyxl.load_workbook(path).worksheets[0])
+
+    for _ in range(2):
+        Journal.append_weeks_to_journal(str(path), 1, open_after=False, in_place=True)
+    ws = openpyxl.load_workbook(path).worksheets[0]
+    assert sum(rule_refs(ws).values()) == sum(rules.values())
+    risk = layout["letters"]["risk"]
+    assert any(f"{risk}3" in cf.sqref and f"{risk}{ws.max_row - 3}" in cf.sqref for cf in ws.conditional_formatting)
+
+
+def test_other_parts_are_kept(tmp_path):
+    layout = Journal._compile_layout(25000)
+    wb = Journal._build_journal_workbook(layout, date(2025, 4, 28), 25000, 1, consolidated_formatting=True)
+    wb.create_sheet("Notes")["A1"] = "kept"
+    path = tmp_path / "journal.xlsx"
+    wb.save(path)
+
+    wb = openpyxl.load_workbook(Journal.append_weeks_to_journal(str(path), 1, open_after=False))
+    assert wb.sheetnames[1:] == ["Notes"] and wb["Notes"]["A1"].value == "kept"
+
+
+def test_content_below_the_last_summary_is_refused(tmp_path):
+    _, path = two_week_journal(tmp_path)
+    wb = openpyxl.load_workbook(path)
+    wb.worksheets[0][f"B{MONTHLY_SUMMARY_ROW + 3}"] = "note"
+    wb.save(path)
+    with pytest.raises(ValueError, match="content below its last summary row"):
+        Journal.append_weeks_to_journal(str(path), 1, open_after=False)
@@ -0,0 +1,17 @@
+"""An invalid manifest row fails on its own instead of aborting the batch."""
+import Journal
+
+
+def test_invalid_rows_fail_alone(tmp_path):
+    manifest = tmp_path / "manifest.csv"
+    manifest.write_text("account,start_date,capital,weeks,output\n"
+                        f"main,2025-04-28,25000,1,{tmp_path / 'main.xlsx'}\n"
+                        "typo,2025-13-01,25000,1,\n"
+                        "short,2025-04-28,25000,0,\n", encoding="utf-8")
+    jobs = Journal.load_batch_manifest(str(manifest))
+    assert [bool(job["error"]) for job in jobs] == [False, True, True]
+
+    results = Journal.run_batch(jobs, max_workers=1, open_after=False)
+    assert results[0]["path"] == str(tmp_path / "main.xlsx") and (tmp_path / "main.xlsx").exists()
+    assert [result["path"] for result in results[1:]] == [None, None]
+    assert "job 2 is invalid" in results[1]["error"] and "job 3 is invalid" in results[2]["error"]
@@ -0,0 +1,83 @@
+"""Broker statements are parsed, converted to R and placed in the right journal rows."""
+from datetime import date, datetime, time
+
+import openpyxl
+
+import Journal
+from broker_import import SLOT_BY_MINUTE, import_into_journal, place_trades, read_broker_trades
+
+HEADER = ["Ticket", "Open Time", "Type", "Size", "Item", "Price", "S/L", "T/P", "Close Time", "Price", "Profit", "MFE"]
+TRADES = [
+    # A buy risking 10 pips that closes 20 pips up and ran 30 pips up
+    ["101", "2025.04.28 18:40", "buy", "1.00", "eurusd", "1.1000", "1.0990", "1.1030", "2025.04.28 19:10", "1.1020", "200.00", "1.1030"],
+    # A sell risking 10 pips that closes 10 pips down (in its favour) and ran 30 pips down
+    ["102", "2025.04.29 19:35", "sell", "1.00", "gbpusd", "1.2000", "1.2010", "1.1970", "2025.04.29 20:00", "1.1990", "100.00", "1.1970"],
+    # Entered at noon, outside every time slot
+    ["103", "2025.04.30 12:00", "buy", "1.00", "eurusd", "1.1000", "1.0990", "1.1030", "2025.04.30 12:30", "1.0990", "-100.00", "1.1005"],
+]
+
+
+def write_csv(path, rows=TRADES):
+    path.write_text("\n".join(",".join(row) for row in [HEADER] + rows) + "\n", encoding="utf-8")
+    return path
+
+
+def write_html(path, rows=TRADES):
+    table = "".join("<tr>" + "".join(f"<td>{cell}</td>" for cell in row) + "</tr>" for row in [HEADER] + rows)
+    path.write_text(f"<html><body><div>Closed Transactions:</div><table>{table}"
+                    "<tr><td colspan=\"10\">Closed P/L:</td><td>200.00</td></tr></table></body></html>", encoding="utf-8")
+    return path
+
+
+def test_csv_and_html_read_alike(tmp_path):
+    from_csv = list(read_broker_trades(write_csv(tmp_path / "history.csv")))
+    from_html = list(read_broker_trades(write_html(tmp_path / "statement.htm")))
+    assert from_csv == from_html
+    assert [trade["ticket"] for trade in from_csv] == ["101", "102", "103"]
+    assert from_csv[1]["type"] == "sell" and from_csv[1]["open_time"] == datetime(2025, 4, 29, 19, 35)
+
+
+def test_slot_by_minute():
+    assert [SLOT_BY_MINUTE.get(hour * 60 + minute) for hour, minute in [(18, 29), (18, 30), (19, 29), (19, 30), (21, 59), (22, 29), (22, 30)]] \
+        == [None, 0, 0, 1, 3, 3, None]
+
+
+def test_buy_sell_and_out_of_slot(tmp_path):
+    placements, counts = place_trades(read_broker_trades(write_csv(tmp_path / "history.csv")))
+    assert counts == {"placed": 2, "outside time slots": 1}
+    ((buy_offset, buy),) = placements[(date(2025, 4, 28), 0)]
+    ((sell_offset, sell),) = placements[(date(2025, 4, 29), 1)]
+    assert buy_offset == sell_offset == 0
+    assert buy == {"entry_time": time(18, 40), "exit_time": time(19, 10), "result": 2.0, "max_reward": 3.0}
+    # The favourable excursion of a sell is below the entry, and still counts as positive R
+    assert sell == {"entry_time": time(19, 35), "exit_time": time(20, 0), "result": 1.0, "max_reward": 3.0}
+
+
+def test_time_offset_moves_trades_between_slots(tmp_path):
+    # Server time 16:40 is 18:40 in the journal's time zone
+    shifted = [[*TRADES[0][:1], "2025.04.28 16:40", *TRADES[0][2:8], "2025.04.28 17:10", *TRADES[0][9:]]]
+    history = write_csv(tmp_path / "history.csv", shifted)
+    assert place_trades(read_broker_trades(history))[1] == {"outside time slots": 1}
+    placements, counts = place_trades(read_broker_trades(history), time_offset_hours=2)
+    assert counts == {"placed": 1} and placements[(date(2025, 4, 28), 0)][0][1]["entry_time"] == time(18, 40)
+
+
+def test_import_and_reimport(tmp_path):
+    layout = Journal._compile_layout(25000)
+    journal = tmp_path / "journal.xlsx"
+    Journal._build_journal_workbook(layout, date(2025, 4, 28), 25000, 1, consolidated_formatting=True).save(journal)
+    history = write_csv(tmp_path / "history.csv")
+
+    imported, counts = import_into_journal(str(history), str(journal), report_path=str(tmp_path / "unfit.csv"))
+    assert imported == str(tmp_path / "journal_imported.xlsx")  # The journal itself is left as it was
+    assert counts == {"placed": 2, "outside time slots": 1}
+    assert "103" in (tmp_path / "unfit.csv").read_text(encoding="utf-8")
+    ws = openpyxl.load_workbook(imported).worksheets[0]
+    assert ws.cell(row=3, column=layout["cols"]["result"]).value == 2
+    assert openpyxl.load_workbook(journal).worksheets[0].cell(row=3, column=layout["cols"]["entry_time"]).value is None
+
+    # Importing the same statement again finds both trades already recorded
+    _, counts = import_into_journal(str(history), imported, report_path=str(tmp_path / "unfit.csv"), in_place=True)
+    assert counts == {"already in journal": 2, "outside time slots": 1}
+    report = (tmp_path / "unfit.csv").read_text(encoding="utf-8")
+    assert report.count("already in journal") == 2
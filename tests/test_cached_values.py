@@ -0,0 +1,122 @@
+"""Cached formula results follow the journal's recurrences, and journals with formulas of their own are left to Excel."""
+import random
+import re
+import zipfile
+from datetime import date, time
+
+import openpyxl
+import pytest
+
+import Journal
+
+CAPITAL = 25000
+L = Journal._compile_layout(CAPITAL)["letters"]
+
+
+def filled_journal(num_weeks=3, seed=11):
+    """Returns a journal workbook with random results, max rewards and slot risks."""
+    wb = Journal._build_journal_workbook(Journal._compile_layout(CAPITAL), date(2025, 4, 28), CAPITAL, num_weeks, consolidated_formatting=True)
+    ws = wb.worksheets[0]
+    rng = random.Random(seed)
+    for row_num in range(2, ws.max_row + 1):
+        if ws[f"{L['time_slot']}{row_num}"].value in Journal.TIME_SLOTS: # First row of a slot
+            ws[f"{L['risk']}{row_num}"] = rng.choice([0.5, 1, 1.5, 2])
+        if ws[f"{L['result']}{row_num}"].value == 0 and rng.random() < 0.4:
+            ws[f"{L['result']}{row_num}"] = rng.choice([-1, -0.5, 1, 2, 3.5])
+            ws[f"{L['max_reward']}{row_num}"] = rng.choice([0, 1, 2, 4])
+    return wb
+
+
+def calc_pr(path):
+    with zipfile.ZipFile(path) as package:
+        return re.search(r"<calcPr\b[^>]*>", package.read("xl/workbook.xml").decode()).group(0)
+
+
+def test_cached_values_follow_the_recurrence(tmp_path):
+    path = tmp_path / "journal.xlsx"
+    Journal._CachedResultsWorkbook(filled_journal()).save(path)
+    assert "fullCalcOnLoad" not in calc_pr(path)
+    ws = openpyxl.load_workbook(path, data_only=True).worksheets[0]
+
+    # The journal's formulas, worked through one row at a time
+    state, day_results, data_rows = None, None, 0
+    for row_num in range(2, ws.max_row + 1):
+        label = ws[f"A{row_num}"].value
+        if isinstance(label, str) and Journal.DATE_LABEL_PATTERN.match(label):
+            day_results = []
+            continue
+        if label == "Daily Summary":
+            assert ws[f"{L['result']}{row_num}"].value == sum(day_results)
+            for key in ("cum_result", "balance", "min_balance", "max_balance", "drawdown"):
+                assert ws[f"{L[key]}{row_num}"].value == state[key], (row_num, key)
+            day_results = None
+            continue
+        if day_results is None: continue # Weekly and monthly summary rows
+        if label in Journal.TIME_SLOTS: slot_risk = ws[f"{L['risk']}{row_num}"].value
+        result, max_reward = ws[f"{L['result']}{row_num}"].value, ws[f"{L['max_reward']}{row_num}"].value or 0
+        if state is None:
+            balance = CAPITAL if result == 0 else CAPITAL * (1 + result * slot_risk / 100)
+            max_reward_balance = CAPITAL if max_reward == 0 else CAPITAL * (1 + max_reward * slot_risk / 100)
+            state = {"cum_result": result, "cum_max_reward": max_reward, "balance": balance, "max_reward_balance": max_reward_balance,
+                     "min_balance": balance, "max_balance": balance}
+        else:
+            balance = state["balance"] if result == 0 else state["balance"] + result * CAPITAL * slot_risk / 100
+            max_reward_balance = (state["max_reward_balance"] if max_reward == 0
+                                  else state["max_reward_balance"] + max_reward * CAPITAL * slot_risk / 100)
+            state = {"cum_result": state["cum_result"] + result, "cum_max_reward": state["cum_max_reward"] + max_reward,
+                     "balance": balance, "max_reward_balance": max_reward_balance,
+                     "min_balance": min(state["min_balance"], balance), "max_balance": max(state["max_balance"], balance)}
+        state["drawdown"] = 0 if state["min_balance"] == CAPITAL else (state["min_balance"] - CAPITAL) / CAPITAL * 100
+        for key, expected in state.items():
+            assert ws[f"{L[key]}{row_num}"].value == expected, (row_num, key)
+        assert ws[f"{L['duration']}{row_num}"].value is None # The cached "" reads back as blank
+        day_results.append(result)
+        data_rows += 1
+    assert data_rows == 3 * 5 * 2 * len(Journal.TIME_SLOTS)
+    assert state["balance"] != CAPITAL and state["min_balance"] < state["max_balance"]
+
+
+def test_trade_duration_reads_time_text(tmp_path):
+    wb = filled_journal(num_weeks=1)
+    ws = wb.worksheets[0]
+    ws[f"{L['entry_time']}3"], ws[f"{L['exit_time']}3"] = "18:30", time(19, 15)
+    path = tmp_path / "journal.xlsx"
+    Journal._CachedResultsWorkbook(wb).save(path)
+    assert openpyxl.load_workbook(path, data_only=True).worksheets[0][f"{L['duration']}3"].value == pytest.approx(3)
+
+
+@pytest.mark.parametrize("cell, formula", [
+    ("AZ5", "=1+1"), # A formula the journal does not write
+    (f"{L['balance']}5", f"=IF({L['result']}5=0,{L['balance']}4,{L['balance']}4 + {L['result']}5*25000*{L['risk']}5/10)"), # An edited one
+])
+def test_other_formulas_are_left_to_excel(tmp_path, capsys, cell, formula):
+    wb = filled_journal(num_weeks=1)
+    wb.worksheets[0][cell] = formula
+    path = tmp_path / "journal.xlsx"
+    Journal._CachedResultsWorkbook(wb).save(path)
+
+    assert "Formula results are not cached" in capsys.readouterr().out
+    assert 'fullCalcOnLoad="1"' in calc_pr(path)
+    ws = openpyxl.load_workbook(path, data_only=True).worksheets[0]
+    assert ws[f"{L['balance']}3"].value is None
+    assert openpyxl.load_workbook(path).worksheets[0][cell].value == formula
+
+
+def test_yearly_chain_crosses_sheets(tmp_path):
+    path = Journal.generate_yearly_journal(2025, CAPITAL, str(tmp_path / "2025.xlsx"), max_workers=1, open_after=False, cached_values=True)
+    wb = openpyxl.load_workbook(path)
+    january = wb["January"]
+    first_row = next(row for row in range(2, january.max_row + 1) if january[f"A{row}"].value in Journal.TIME_SLOTS)
+    january[f"{L['result']}{first_row}"] = 2 # 2R at the default 1% risk
+    Journal._CachedResultsWorkbook(wb).save(path)
+
+    wb = openpyxl.load_workbook(path, data_only=True)
+    february = wb["February"]
+    forward_row = next(row for row in range(1, february.max_row + 1) if str(february[f"A{row}"].value).startswith("Brought Forward"))
+    assert february[f"{L['balance']}{forward_row}"].value == 25500
+    assert february[f"{L['cum_result']}{forward_row}"].value == 2
+    year = wb["Year 2025"]
+    month_rows = {year[f"A{row}"].value: row for row in range(2, year.max_row + 1)}
+    assert year[f"{L['result']}{month_rows['January']}"].value == 2
+    assert year[f"{L['result']}{month_rows['February']}"].value == 0
+    assert year[f"{L['balance']}{month_rows['December']}"].value == 25500
@@ -0,0 +1,23 @@
+"""Consolidated conditional formatting keeps one set of rules however long the journal is."""
+from datetime import date
+
+import openpyxl
+import pytest
+
+import Journal
+
+# Risk, then green/red for the results, the balances, the drawdown, signal, status, momentum and plan adherence
+CONSOLIDATED_RULES = 15
+BUILDERS = {"memory": Journal._build_journal_workbook, "streaming": Journal._build_journal_workbook_streaming}
+
+
+@pytest.mark.parametrize("builder", sorted(BUILDERS))
+@pytest.mark.parametrize("num_weeks", [1, 4, 12])
+def test_rule_count_is_constant(tmp_path, builder, num_weeks):
+    layout = Journal._compile_layout(25000)
+    wb = BUILDERS[builder](layout, date(2025, 4, 28), 25000, num_weeks, consolidated_formatting=True)
+    path = tmp_path / "journal.xlsx"
+    wb.save(path)
+
+    ws = openpyxl.load_workbook(path).worksheets[0]
+    assert sum(len(cf.rules) for cf in ws.conditional_formatting) == CONSOLIDATED_RULES
@@ -0,0 +1,84 @@
+"""journal_metrics.py recomputes the running columns exactly as the journal's own formulas do."""
+import random
+from datetime import date
+
+import numpy as np
+import openpyxl
+
+import Journal
+from journal_metrics import JOURNAL_LETTERS, journal_metrics
+
+RUNNING_KEYS = ["cum_result", "cum_max_reward", "balance", "max_reward_balance", "min_balance", "max_balance", "drawdown"]
+
+
+def filled_journal(path, num_weeks=6, initial_capital=25000, seed=7):
+    """
+    Saves a journal with random results, max rewards and slot risks, with every formula's
+    result cached. Returns the path and the (result, max reward, slot risk) of each data row.
+    """
+    layout = Journal._compile_layout(initial_capital)
+    wb = Journal._build_journal_workbook(layout, date(2025, 4, 28), initial_capital, num_weeks, consolidated_formatting=True)
+    ws = wb.worksheets[0]
+    rng = random.Random(seed)
+    inputs, slot_risk = [], None
+    for row_num in range(2, ws.max_row + 1):
+        label = ws[f"{JOURNAL_LETTERS['time_slot']}{row_num}"].value
+        if label in Journal.TIME_SLOTS: # First row of a slot
+            slot_risk = rng.choice([0.5, 1, 1.5, 2])
+            ws[f"{JOURNAL_LETTERS['risk']}{row_num}"] = slot_risk
+        if ws[f"{JOURNAL_LETTERS['result']}{row_num}"].value == 0: # A data row
+            result, max_reward = 0, 0
+            if rng.random() < 0.4:
+                result, max_reward = rng.choice([-1, -0.5, 1, 2, 3.5]), rng.choice([0, 1, 2, 4])
+                ws[f"{JOURNAL_LETTERS['result']}{row_num}"] = result
+                ws[f"{JOURNAL_LETTERS['max_reward']}{row_num}"] = max_reward
+            inputs.append((result, max_reward, slot_risk))
+    Journal._CachedResultsWorkbook(wb).save(path)
+    return path, inputs
+
+
+def expected_running_values(inputs, capital):
+    """Works the journal's U-AA formulas through the data rows one at a time."""
+    expected = {key: [] for key in RUNNING_KEYS}
+    for idx, (result, max_reward, slot_risk) in enumerate(inputs):
+        if idx == 0:
+            balance = capital if result == 0 else capital * (1 + result * slot_risk / 100)
+            max_reward_balance = capital if max_reward == 0 else capital * (1 + max_reward * slot_risk / 100)
+            values = {"cum_result": result, "cum_max_reward": max_reward, "min_balance": balance, "max_balance": balance}
+        else:
+            balance = expected["balance"][-1] if result == 0 else expected["balance"][-1] + result * capital * slot_risk / 100
+            max_reward_balance = (expected["max_reward_balance"][-1] if max_reward == 0
+                                  else expected["max_reward_balance"][-1] + max_reward * capital * slot_risk / 100)
+            values = {"cum_result": expected["cum_result"][-1] + result, "cum_max_reward": expected["cum_max_reward"][-1] + max_reward,
+                      "min_balance": min(expected["min_balance"][-1], balance), "max_balance": max(expected["max_balance"][-1], balance)}
+        values.update(balance=balance, max_reward_balance=max_reward_balance)
+        values["drawdown"] = 0 if values["min_balance"] == capital else (values["min_balance"] - capital) / capital * 100
+        for key in RUNNING_KEYS: expected[key].append(values[key])
+    return expected
+
+
+def test_rows_match_formulas(tmp_path):
+    path, inputs = filled_journal(tmp_path / "journal.xlsx")
+    report = journal_metrics(path)
+    assert report["initial_capital"] == 25000
+
+    rows = report["rows"]
+    assert len(rows["row"]) == len(inputs) == 6 * 5 * 2 * len(Journal.TIME_SLOTS)
+    assert [tuple(values) for values in zip(rows["result"], rows["max_reward"], rows["slot_risk"])] == inputs
+    assert np.count_nonzero(rows["result"]) and len(set(rows["slot_risk"])) > 1
+    expected = expected_running_values(inputs, 25000)
+    for key in RUNNING_KEYS:
+        np.testing.assert_allclose(rows[key], expected[key], rtol=0, atol=1e-9, err_msg=key)
+
+
+def test_daily_table_matches_summary_rows(tmp_path):
+    path, _ = filled_journal(tmp_path / "journal.xlsx")
+    report = journal_metrics(path)
+
+    ws = openpyxl.load_workbook(path, data_only=True).worksheets[0]
+    summary_rows = [row_num for row_num in range(2, ws.max_row + 1) if ws[f"A{row_num}"].value == "Daily Summary"]
+    assert len(summary_rows) == len(report["daily"])
+    for record, row_num in zip(report["daily"], summary_rows):
+        assert record["result"] == ws[f"{JOURNAL_LETTERS['result']}{row_num}"].value
+        for key in RUNNING_KEYS:
+            assert abs(record[key] - ws[f"{JOURNAL_LETTERS[key]}{row_num}"].value) < 1e-9, key
@@ -0,0 +1,45 @@
+"""Journals go into the trade store and come back out unchanged."""
+from datetime import date
+
+import Journal
+from trade_store import export_journal, ingest_journal, open_store, read_journal_trades, trade_stats
+
+# (day offset from the Monday, slot index, row in slot) -> entered values
+FILLED = {
+    (0, 0, 0): {"entry_time": "18:30", "exit_time": "19:00", "signal": "Strong", "status": "Trend", "trade_type": "Reversal", "result": 2},
+    (0, 0, 1): {"entry_time": "18:45", "exit_time": "19:15", "result": -1},
+    (1, 1, 0): {"entry_time": "19:30", "exit_time": "20:15", "signal": "Weak", "status": "Trend", "result": 1},
+    (2, 2, 0): {"entry_time": "20:45", "exit_time": "21:00", "signal": "Strong", "status": "Range", "result": -1, "max_reward": 1.5},
+}
+
+
+def filled_journal(path):
+    layout = Journal._compile_layout(25000)
+    wb = Journal._build_journal_workbook(layout, date(2025, 4, 28), 25000, 1, consolidated_formatting=True)
+    ws = wb.worksheets[0]
+    rows_per_day = 2 + 2 * len(Journal.TIME_SLOTS) # Date row, data rows, daily summary
+    for (day, slot, slot_row), values in FILLED.items():
+        row_num = 3 + day * rows_per_day + 2 * slot + slot_row
+        for key, value in values.items(): ws.cell(row=row_num, column=layout["cols"][key]).value = value
+    wb.save(path)
+    return path
+
+
+def test_ingest_query_export(tmp_path):
+    journal = filled_journal(tmp_path / "journal.xlsx")
+    conn = open_store(str(tmp_path / "trades.sqlite"))
+    # Slot fields are stored on both rows of a slot, so the two slots with only a first row filled count twice
+    assert ingest_journal(conn, journal, "main") == 6
+    assert ingest_journal(conn, journal, "main") == 6 # Ingesting again replaces, not duplicates
+    assert conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0] == 6
+
+    # The second row of the first slot takes its signal and status from the slot's first row
+    (stats,) = trade_stats(conn, account="main", status="Trend", signal="Strong")
+    assert (stats["trades"], stats["wins"], stats["losses"], stats["win_rate"], stats["total_r"]) == (2, 1, 1, 50.0, 1.0)
+    by_status = {row["group"]: row["trades"] for row in trade_stats(conn, "status", account="main")}
+    assert by_status == {"Range": 1, "Trend": 3}
+
+    exported = export_journal(conn, date(2025, 4, 28), date(2025, 5, 2), str(tmp_path / "export.xlsx"), account="main")
+    capital, first_date, last_date, rows = read_journal_trades(exported)
+    assert (capital, first_date, last_date) == (25000, "2025-04-28", "2025-05-02")
+    assert rows == read_journal_trades(journal)[3]
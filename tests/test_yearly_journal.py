@@ -0,0 +1,26 @@
+"""The Year sheet rolls each month up from all of its weeks."""
+import re
+
+import openpyxl
+
+import Journal
+
+SHEET_REF = re.compile(r"'([^']+)'!([A-Z]+)(\d+)")
+
+
+def test_month_rows_cover_every_week(tmp_path):
+    path = Journal.generate_yearly_journal(2025, 25000, str(tmp_path / "2025.xlsx"), max_workers=1, open_after=False)
+    wb = openpyxl.load_workbook(path)
+    letters = Journal._compile_layout(25000)["letters"]
+    year = wb["Year 2025"]
+    march_row = next(row for row in range(2, year.max_row + 1) if year[f"A{row}"].value == "March")
+
+    march = wb["March"] # Mondays 3, 10, 17, 24 and 31
+    week_rows = [row for row in range(1, march.max_row + 1) if Journal.WEEK_LABEL_PATTERN.match(str(march[f"A{row}"].value))]
+    assert len(week_rows) == 5
+    for key in ("result", "risk", "target_reward", "duration"):
+        refs = SHEET_REF.findall(year[f"{letters[key]}{march_row}"].value)
+        assert refs == [("March", letters[key], str(row)) for row in week_rows], key
+
+    monthly_row = next(row for row in range(1, march.max_row + 1) if march[f"A{row}"].value == "Monthly Summary")
+    assert year[f"{letters['balance']}{march_row}"].value == f"='March'!{letters['balance']}{monthly_row}"
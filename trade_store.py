@@ -0,0 +1,234 @@
+import argparse
+import glob
+import os
+import sqlite3
+import sys
+import time as timer
+from datetime import date, datetime, time, timedelta
+
+import openpyxl
+
+from Journal import (DATE_LABEL_PATTERN, FIRST_BALANCE_CAPITAL_PATTERN, TIME_SLOTS, _build_journal_workbook_streaming, _CachedResultsWorkbook,
+                     _compile_layout, _save_workbook)
+
+# Journal columns kept per data row, in table order. Signal, status, momentum and risk are
+# merged across a time slot's two rows in the journal and are stored on both rows here.
+TRADE_FIELDS = ["entry_time", "exit_time", "signal", "status", "momentum", "enter_type", "trade_type", "reason",
+                "plan_adherence", "stop_loss", "risk", "target_reward", "max_reward", "result"]
+_SLOT_MERGED_FIELDS = {"signal", "status", "momentum", "risk"}
+_TEXT_FIELDS = {"entry_time", "exit_time", "signal", "status", "momentum", "enter_type", "trade_type", "reason", "plan_adherence"}
+# Fields that can filter or group queries
+CATEGORY_FIELDS = ["slot", "signal", "status", "momentum", "enter_type", "trade_type", "plan_adherence"]
+PERIODS = {"day": "date", "week": "strftime('%Y-W%W', date)", "month": "substr(date, 1, 7)", "year": "substr(date, 1, 4)"}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS journals (
+    path TEXT PRIMARY KEY,
+    account TEXT NOT NULL DEFAULT '',
+    initial_capital REAL,
+    first_date TEXT,
+    last_date TEXT,
+    ingested_at TEXT
+);
+CREATE TABLE IF NOT EXISTS trades (
+    account TEXT NOT NULL DEFAULT '',
+    date TEXT NOT NULL,
+    slot TEXT NOT NULL,
+    slot_row INTEGER NOT NULL,
+    {", ".join(f"{field} {'TEXT' if field in _TEXT_FIELDS else 'REAL'}" for field in TRADE_FIELDS)},
+    PRIMARY KEY (account, date, slot, slot_row)
+);
+CREATE INDEX IF NOT EXISTS trades_date ON trades (date);
+{"".join(f"CREATE INDEX IF NOT EXISTS trades_{field} ON trades ({field});" for field in CATEGORY_FIELDS)}
+"""
+
+
+def open_store(db_path):
+    """Opens (creating if needed) a trade store and returns the connection."""
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _cell_text(value):
+    if value is None: return None
+    if isinstance(value, datetime): value = value.time()
+    if isinstance(value, time): return value.strftime("%H:%M")
+    text = str(value).strip()
+    return text or None
+
+
+def _cell_number(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool): return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def read_journal_trades(filepath):
+    """
+    Reads a journal's filled-in data rows. Returns (initial capital or None, first date,
+    last date, rows), one row dict per data row that has anything entered besides the
+    default risk and zero result.
+    """
+    layout = _compile_layout(0)
+    cols = {key: layout["cols"][key] - 1 for key in TRADE_FIELDS + ["time_slot", "balance"]}
+    wb = openpyxl.load_workbook(filepath, read_only=True)
+    try:
+        rows, initial_capital, first_date, last_date = [], None, None, None
+        day, row_in_day, slot_values = None, 0, {}
+        for cells in wb.worksheets[0].iter_rows(min_row=2, max_col=max(cols.values()) + 1, values_only=True):
+            label = cells[cols["time_slot"]]
+            date_match = DATE_LABEL_PATTERN.match(label.strip()) if isinstance(label, str) else None
+            if date_match:
+                day, row_in_day = date_match.group(1), 0
+                first_date, last_date = first_date or day, day
+                continue
+            if day is None or row_in_day >= 2 * len(TIME_SLOTS): # Summary rows end a day's block
+                day = None
+                continue
+            if initial_capital is None and isinstance(cells[cols["balance"]], str):
+                capital_match = FIRST_BALANCE_CAPITAL_PATTERN.match(cells[cols["balance"]])
+                if capital_match: initial_capital = float(capital_match.group(1))
+            values = {key: (_cell_text if key in _TEXT_FIELDS else _cell_number)(cells[cols[key]]) for key in TRADE_FIELDS}
+            if row_in_day % 2 == 0: slot_values = {key: values[key] for key in _SLOT_MERGED_FIELDS}
+            else: values.update(slot_values)
+            row = {"date": day, "slot": TIME_SLOTS[row_in_day // 2], "slot_row": row_in_day % 2, **values}
+            row_in_day += 1
+            if any(values[key] is not None for key in TRADE_FIELDS if key not in ("risk", "result")) or values["result"]:
+                rows.append(row)
+    finally:
+        wb.close()
+    return initial_capital, first_date, last_date, rows
+
+
+def ingest_journal(conn, filepath, account=""):
+    """
+    Loads a journal's filled-in rows into the store, replacing whatever the store held
+    for the account over the journal's dates. Returns the number of rows stored.
+    """
+    initial_capital, first_date, last_date, rows = read_journal_trades(filepath)
+    if first_date is None: return 0
+    with conn:
+        conn.execute("DELETE FROM trades WHERE account = ? AND date BETWEEN ? AND ?", (account, first_date, last_date))
+        conn.executemany(f"INSERT OR REPLACE INTO trades (account, date, slot, slot_row, {', '.join(TRADE_FIELDS)}) "
+                         f"VALUES (?, ?, ?, ?, {', '.join('?' * len(TRADE_FIELDS))})",
+                         ([account, row["date"], row["slot"], row["slot_row"]] + [row[key] for key in TRADE_FIELDS] for row in rows))
+        conn.execute("INSERT OR REPLACE INTO journals VALUES (?, ?, ?, ?, ?, ?)",
+                     (os.path.abspath(filepath), account, initial_capital, first_date, last_date, datetime.now().isoformat(timespec="seconds")))
+    return len(rows)
+
+
+def _where(start=None, end=None, account=None, **filters):
+    clauses, params = ["result IS NOT NULL", "result <> 0"], []
+    if account is not None: clauses.append("account = ?"); params.append(account)
+    if start: clauses.append("date >= ?"); params.append(str(start))
+    if end: clauses.append("date <= ?"); params.append(str(end))
+    for field, value in filters.items():
+        if value is None: continue
+        if field not in CATEGORY_FIELDS: raise ValueError(f"Cannot filter on {field!r}; use one of {', '.join(CATEGORY_FIELDS)}.")
+        clauses.append(f"{field} = ?")
+        params.append(value)
+    return " AND ".join(clauses), params
+
+
+def trade_stats(conn, group_by=None, start=None, end=None, account=None, **filters):
+    """
+    Aggregates the trades (rows with a non-zero result) matching the filters, e.g.
+    trade_stats(conn, status="Trend", signal="Strong", trade_type="Reversal").
+    group_by is a category field or a period (day, week, month, year). Returns a list
+    of dicts with group, trades, wins, losses, win_rate (%), total_r and average_r.
+    """
+    if group_by is not None and group_by not in CATEGORY_FIELDS and group_by not in PERIODS:
+        raise ValueError(f"Cannot group by {group_by!r}; use one of {', '.join(CATEGORY_FIELDS + list(PERIODS))}.")
+    group = PERIODS.get(group_by, group_by) or "'all'"
+    where, params = _where(start, end, account, **filters)
+    query = (f"SELECT {group} AS grp, COUNT(*), SUM(result > 0), SUM(result < 0), SUM(result), AVG(result) "
+             f"FROM trades WHERE {where} GROUP BY grp ORDER BY grp")
+    return [{"group": grp, "trades": trades, "wins": wins, "losses": losses, "win_rate": 100.0 * wins / trades,
+             "total_r": total_r, "average_r": average_r}
+            for grp, trades, wins, losses, total_r, average_r in conn.execute(query, params)]
+
+
+def export_journal(conn, start, end, filename, initial_capital=None, account="", open_after=False, cached_values=False):
+    """
+    Renders the stored rows between start and end (dates) into a journal in the current
+    layout, through the streaming generator. The journal starts on the Monday of start
+    and runs for whole weeks through end; initial_capital defaults to the capital of
+    the account's earliest ingested journal. cached_values=True saves the formulas with
+    their computed results. Returns the saved path.
+    """
+    if initial_capital is None:
+        found = conn.execute("SELECT initial_capital FROM journals WHERE account = ? AND initial_capital IS NOT NULL "
+                             "ORDER BY first_date LIMIT 1", (account,)).fetchone()
+        if found is None: raise ValueError("No initial capital stored for this account; pass initial_capital.")
+        initial_capital = int(found[0]) if float(found[0]).is_integer() else found[0]
+
+    start_date = start - timedelta(days=start.weekday())
+    num_weeks = (end - start_date).days // 7 + 1
+    filled_values = {}
+    query = (f"SELECT date, slot, slot_row, {', '.join(TRADE_FIELDS)} FROM trades "
+             f"WHERE account = ? AND date BETWEEN ? AND ? ORDER BY date, slot, slot_row")
+    for day, slot, slot_row, *values in conn.execute(query, (account, str(start), str(end))):
+        if slot not in TIME_SLOTS: continue
+        row_values = {key: value for key, value in zip(TRADE_FIELDS, values) if value is not None}
+        for key in ("entry_time", "exit_time"):
+            if key in row_values:
+                try:
+                    row_values[key] = datetime.strptime(row_values[key], "%H:%M").time()
+                except ValueError:
+                    pass # Free text typed into the cell is written back as it was
+        slot_rows = filled_values.setdefault((date.fromisoformat(day), TIME_SLOTS.index(slot)), [{}, {}])
+        slot_rows[slot_row] = row_values
+
+    layout = _compile_layout(initial_capital)
+    wb = _build_journal_workbook_streaming(layout, start_date, initial_capital, num_weeks, True, filled_values)
+    return _save_workbook(_CachedResultsWorkbook(wb) if cached_values else wb, filename, open_after)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite store of journal trades: ingest journals, query across them, export date ranges.")
+    parser.add_argument("--db", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "output", "trades.sqlite"),
+                        help="store file (default: output/trades.sqlite)")
+    parser.add_argument("--account", default="", help="account the journals belong to")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="load journals into the store (default: every journal in output/)")
+    ingest.add_argument("journals", nargs="*")
+    query = commands.add_parser("query", help="win rate and R statistics of matching trades")
+    query.add_argument("--group-by", choices=CATEGORY_FIELDS + list(PERIODS))
+    query.add_argument("--start")
+    query.add_argument("--end")
+    for field in CATEGORY_FIELDS: query.add_argument(f"--{field.replace('_', '-')}", dest=field)
+    export = commands.add_parser("export", help="write a date range of stored trades as a journal")
+    export.add_argument("start")
+    export.add_argument("end")
+    export.add_argument("--capital", type=float)
+    export.add_argument("--output")
+    export.add_argument("--cached-values", action="store_true", help="save formulas with their computed results")
+    export.add_argument("--no-open", action="store_true")
+    args = parser.parse_args()
+
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(args.db)), exist_ok=True)
+        conn = open_store(args.db)
+        if args.command == "ingest":
+            journals = args.journals or sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "output", "*.xlsx")))
+            for journal in journals:
+                print(f"{journal}: {ingest_journal(conn, journal, args.account)} row(s)")
+        elif args.command == "query":
+            started = timer.perf_counter()
+            filters = {field: getattr(args, field) for field in CATEGORY_FIELDS}
+            stats = trade_stats(conn, args.group_by, args.start, args.end, args.account, **filters)
+            print(f"{'group':<24} {'trades':>7} {'wins':>6} {'losses':>6} {'win %':>7} {'total R':>9} {'avg R':>7}")
+            for row in stats:
+                print(f"{str(row['group']):<24} {row['trades']:>7} {row['wins']:>6} {row['losses']:>6} {row['win_rate']:>7.1f} "
+                      f"{row['total_r']:>9.2f} {row['average_r']:>7.2f}")
+            print(f"({(timer.perf_counter() - started) * 1000:.1f} ms)")
+        else:
+            start, end = (datetime.strptime(value, "%Y-%m-%d").date() for value in (args.start, args.end))
+            export_journal(conn, start, end, args.output or f"trading_journal_export_{start}_to_{end}.xlsx", args.capital, args.account,
+                           not args.no_open, args.cached_values)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"Input Error: {e}")
+        sys.exit(1)